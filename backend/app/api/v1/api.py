@@ -1,10 +1,12 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, chat, users
+from app.api.v1.endpoints import admin, auth, chat, materials, users
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(chat.router, prefix="/chat", tags=["Chat"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
+api_router.include_router(materials.router, prefix="/materials", tags=["Course Materials"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
@@ -0,0 +1,29 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import get_current_admin, get_read_db
+from app.db.models import Subject, User
+from app.schemas.model_stats import ModelStatsResponse
+from app.services.model_stats_service import model_stats_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/model-stats",
+    response_model=ModelStatsResponse,
+    summary="Get LLM latency and token percentiles and error rates per model, subject and time bucket",
+)
+def get_model_stats(
+    hours: int = Query(24, ge=1, le=settings.MODEL_STATS_MAX_HOURS),
+    bucket: Literal["hour", "day", "total"] = Query("hour"),
+    group_by: List[Literal["model", "subject"]] = Query(["model"]),
+    model: Optional[str] = Query(None, max_length=50),
+    subject: Optional[Subject] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    return model_stats_service.get_model_stats(db, hours, bucket, group_by, model, subject)
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
-from app.schemas.user import UserCreate, UserLogin, TokenResponse
+from app.schemas.user import UserCreate, UserLogin, RefreshTokenRequest, TokenResponse
+from app.services.token_service import token_service
 from app.services.user_service import user_service
 from app.core.security import create_access_token
 
@@ -21,10 +22,12 @@ def register(
 ):
     user = user_service.create_user(db, user_data)
     access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = token_service.issue_refresh_token(db, user)
     from app.schemas.user import UserResponse
     return TokenResponse(
         access_token=access_token,
         token_type="bearer",
+        refresh_token=refresh_token,
         user=UserResponse.from_orm(user)
     )
 
@@ -57,10 +60,44 @@ def login(
             detail="Account is inactive"
         )
     access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = token_service.issue_refresh_token(db, user)
     from app.schemas.user import UserResponse
     return TokenResponse(
         access_token=access_token,
         token_type="bearer",
+        refresh_token=refresh_token,
         user=UserResponse.from_orm(user)
     )
 
+
+@router.post(
+    "/refresh",
+    response_model=TokenResponse,
+    summary="Exchange a refresh token for new access and refresh tokens",
+)
+def refresh(
+    refresh_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    user, refresh_token = token_service.rotate_refresh_token(db, refresh_data.refresh_token)
+    access_token = create_access_token(data={"sub": str(user.id)})
+    from app.schemas.user import UserResponse
+    return TokenResponse(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=refresh_token,
+        user=UserResponse.from_orm(user)
+    )
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Revoke the login session of a refresh token",
+)
+def logout(
+    refresh_data: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+):
+    token_service.revoke_refresh_token(db, refresh_data.refresh_token)
+
@@ -1,24 +1,31 @@
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.db.models import User
-from app.core.security import get_current_user
+from app.core.encoding import MSGPACK_MEDIA_TYPE, negotiated_response
+from app.core.security import get_current_read_user, get_current_user, get_read_db
 from app.schemas.chat import (
     ChatSessionCreate,
     ChatSessionResponse,
     ChatSessionUpdate,
     MessageCreate,
+    MessageBatchCreate,
     MessageResponse,
-    ChatResponse
+    ChatResponse,
+    ChatBatchResponse
 )
 from app.services.chat_service import chat_service
+from app.services.idempotency_service import idempotency_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+MSGPACK_RESPONSES = {200: {"content": {MSGPACK_MEDIA_TYPE: {}}}}
+
 
 @router.post(
     "/sessions",
@@ -26,45 +33,61 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     summary="Create a new chat session",
 )
-def create_session(
+async def create_session(
     session_data: ChatSessionCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
-    session = chat_service.create_session(db, current_user, session_data)
-    return ChatSessionResponse.from_orm(session)
+    async def create():
+        session = chat_service.create_session(db, current_user, session_data)
+        return ChatSessionResponse.from_orm(session)
+    
+    return await idempotency_service.run(
+        db,
+        current_user,
+        "chat.create_session",
+        idempotency_key,
+        session_data.model_dump(mode="json"),
+        create,
+        status_code=status.HTTP_201_CREATED
+    )
 
 
 @router.get(
     "/sessions",
     response_model=List[ChatSessionResponse],
     summary="Get all user's chat sessions",
+    responses=MSGPACK_RESPONSES,
 )
 def get_sessions(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     active_only: bool = False,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_read_user)
 ):
     sessions = chat_service.get_user_sessions(
         db, current_user, skip, limit, active_only
     )
-    return [ChatSessionResponse.from_orm(s) for s in sessions]
+    return negotiated_response(request, [ChatSessionResponse.from_orm(s) for s in sessions])
 
 
 @router.get(
     "/sessions/{session_id}",
     response_model=ChatSessionResponse,
     summary="Get specific chat session",
+    responses=MSGPACK_RESPONSES,
 )
 def get_session(
+    request: Request,
     session_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_read_user)
 ):
     session = chat_service.get_session(db, session_id, current_user)
-    return ChatSessionResponse.from_orm(session)
+    return negotiated_response(request, ChatSessionResponse.from_orm(session))
 
 
 @router.patch(
@@ -102,28 +125,64 @@ def delete_session(
     summary="Send message to AI assistant",
 )
 async def send_message(
+    request: Request,
     message_data: MessageCreate,
     db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    # A disconnect cancels the LLM call even with an Idempotency-Key: the failed handler
+    # releases the key, so the client's retry runs the request again instead of replaying
+    return await idempotency_service.run(
+        db,
+        current_user,
+        "chat.send_message",
+        idempotency_key,
+        message_data.model_dump(mode="json"),
+        lambda: chat_service.send_message(db, current_user, message_data, request=request),
+        status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post(
+    "/message/batch",
+    response_model=ChatBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Send several messages to AI assistant at once",
+    responses={201: {"content": {"application/x-ndjson": {}}}},
+)
+async def send_message_batch(
+    request: Request,
+    batch_data: MessageBatchCreate,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    response = await chat_service.send_message(db, current_user, message_data)
-    return response
+    if batch_data.stream:
+        events = await chat_service.stream_message_batch(db, current_user, batch_data)
+        return StreamingResponse(
+            events,
+            status_code=status.HTTP_201_CREATED,
+            media_type="application/x-ndjson"
+        )
+    return await chat_service.send_message_batch(db, current_user, batch_data, request=request)
 
 
 @router.get(
     "/sessions/{session_id}/messages",
     response_model=List[MessageResponse],
     summary="Get all messages in a session",
+    responses=MSGPACK_RESPONSES,
 )
 def get_session_messages(
+    request: Request,
     session_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_read_user)
 ):
     messages = chat_service.get_session_messages(
         db, session_id, current_user, skip, limit
     )
-    return [MessageResponse.from_orm(m) for m in messages]
+    return negotiated_response(request, [MessageResponse.from_orm(m) for m in messages])
 
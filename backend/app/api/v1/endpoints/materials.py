@@ -0,0 +1,80 @@
+import logging
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Form, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.db.models import Subject, User
+from app.core.security import get_current_user
+from app.schemas.material import CourseMaterialCreate, CourseMaterialResponse
+from app.services.material_service import material_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.post(
+    "",
+    response_model=CourseMaterialResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Add course notes as text",
+)
+async def create_material(
+    material_data: CourseMaterialCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    material = await material_service.create_material(db, current_user, material_data)
+    return CourseMaterialResponse.from_orm(material)
+
+
+@router.post(
+    "/upload",
+    response_model=CourseMaterialResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Upload course notes as a text or PDF file",
+)
+async def upload_material(
+    subject: Subject = Form(...),
+    file: UploadFile = File(...),
+    title: Optional[str] = Form(None, max_length=255),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    content = await material_service.extract_upload_text(file)
+    material_data = CourseMaterialCreate(
+        title=title or file.filename or "Course notes",
+        subject=subject,
+        content=content
+    )
+    material = await material_service.create_material(
+        db, current_user, material_data, filename=file.filename
+    )
+    return CourseMaterialResponse.from_orm(material)
+
+
+@router.get(
+    "",
+    response_model=List[CourseMaterialResponse],
+    summary="List uploaded course notes",
+)
+def get_materials(
+    subject: Optional[Subject] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    materials = material_service.get_user_materials(db, current_user, subject)
+    return [CourseMaterialResponse.from_orm(m) for m in materials]
+
+
+@router.delete(
+    "/{material_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete course notes",
+)
+def delete_material(
+    material_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    material_service.delete_material(db, material_id, current_user)
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.db.models import User
-from app.core.security import get_current_user
+from app.core.security import get_current_read_user, get_current_user, get_read_db
+from app.schemas.stats import StudyStatsResponse
 from app.schemas.user import UserResponse, UserUpdate
+from app.services.stats_service import stats_service
 from app.services.user_service import user_service
 
 router = APIRouter()
@@ -16,7 +19,7 @@ router = APIRouter()
     summary="Get current user profile",
 )
 def get_current_user_profile(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_read_user)
 ):
     return UserResponse.from_orm(current_user)
 
@@ -34,3 +37,15 @@ def update_current_user_profile(
     user = user_service.update_user(db, current_user, update_data)
     return UserResponse.from_orm(user)
 
+
+@router.get(
+    "/me/stats",
+    response_model=StudyStatsResponse,
+    summary="Get study progress: totals, streaks and weekly activity per subject",
+)
+def get_current_user_stats(
+    weeks: int = Query(12, ge=1, le=settings.STATS_MAX_WEEKS),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_read_user)
+):
+    return stats_service.get_user_stats(db, current_user, weeks)
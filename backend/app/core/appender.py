@@ -0,0 +1,70 @@
+"""
+Background file appender
+Lines handed to append() are written by a daemon thread, so request handlers
+on the event loop never wait on disk. Whatever is still queued is written at
+interpreter exit
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LineAppender:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _ensure_thread(self):
+        # Started on first use, and again in a forked worker, which does not inherit the thread
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=f"appender:{self.path}", daemon=True)
+                self._thread.start()
+
+    def append(self, text: str):
+        self._ensure_thread()
+        self._queue.put(text)
+
+    def _run(self):
+        pending = self._queue
+        while True:
+            item = pending.get()
+            batch = []
+            # Everything queued meanwhile goes out in the same write
+            while item is not _STOP:
+                batch.append(item)
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write("".join(batch))
+                except OSError as e:
+                    logger.error(f"Failed to append to {self.path}: {str(e)}")
+            if item is _STOP:
+                return
+
+    def close(self, timeout: float = 5.0):
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
@@ -1,5 +1,5 @@
 
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 import os
@@ -9,6 +9,8 @@ class Settings(BaseSettings):
     # API Configuration
     API_V1_PREFIX: str = "/api"
     PROJECT_NAME: str = "StudyBuddy AI"
+    STARTUP_PREWARM: bool = True  # build the LLM client and load bcrypt in the background after startup
+    SHUTDOWN_DRAIN_SECONDS: int = 75  # on SIGTERM, running requests get this long to finish; keep above LLM_PROVIDER_TIMEOUT_SECONDS
     
     # Environment
     ENVIRONMENT: str = "development"
@@ -16,11 +18,37 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_URL: str
+    DB_AUTO_CREATE_SCHEMA: bool = True  # create missing tables on startup; turn off when migrations manage the schema
+    WEB_CONCURRENCY: int = 1  # worker processes per host, as read by uvicorn and gunicorn
+    DB_MAX_CONNECTIONS: int = 30  # connection budget across all workers; keep below Postgres max_connections
+    DB_POOL_SIZE: Optional[int] = None  # per process; derived from DB_MAX_CONNECTIONS when unset
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True  # one extra round-trip per checkout; safe to disable with pool recycling behind a stable network
+    DB_POOL_WARMUP: bool = True  # open pool_size connections at startup
+    DB_PGBOUNCER: bool = False  # behind PgBouncer transaction pooling: no app-side pool
+    DATABASE_REPLICA_URL: Optional[str] = None  # read-only endpoints use this when set
+    DB_REPLICA_STICKY_SECONDS: float = 5.0  # reads stay on the primary this long after a user's own commit
+    DB_PARTITION_MESSAGES: bool = False  # Postgres only: range-partition chat_messages by month
+    DB_PARTITION_PREMAKE_MONTHS: int = 3
+    DB_PARTITION_DROP_EMPTY_AFTER_MONTHS: Optional[int] = None  # drop older partitions once empty, e.g. after archiving
+    DB_PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 86400.0
     
     # Security Configuration
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14  # sliding: every refresh starts a new window
+    REFRESH_SESSION_MAX_DAYS: int = 90  # a login session cannot be refreshed past this age
+    REFRESH_REUSE_GRACE_SECONDS: int = 10  # a rotated token reused within this window (parallel tabs) does not revoke the family
+    LAST_LOGIN_UPDATE_INTERVAL_SECONDS: int = 3600  # last_login is only written when older than this
+    
+    # Response Encoding Configuration (see app/core/encoding.py)
+    COMPRESSION_ENABLED: bool = True  # turn off when a reverse proxy already compresses responses
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller bodies are sent as they are
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # used for clients accepting br when the brotli package is installed
     
     # CORS Configuration
     BACKEND_CORS_ORIGINS: Union[List[str], str] = [
@@ -38,10 +66,100 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: Optional[str] = None  # any OpenAI-compatible endpoint, e.g. a local fake server
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
     OPENAI_MAX_TOKENS: int = int(os.getenv("OPENAI_MAX_TOKENS", "1000"))
     OPENAI_TEMPERATURE: float = float(os.getenv("OPENAI_TEMPERATURE", "0.5"))
     
+    # LLM Backend Configuration
+    LLM_BACKEND: str = "auto"  # auto (routed when LLM_PROVIDERS is set, mock when OPENAI_API_KEY is a placeholder), openai, routed, mock or replay
+    MOCK_LLM_SEED: int = 0
+    MOCK_LLM_LATENCY_PROFILE: str = "fixed"  # fixed, lognormal or trace
+    MOCK_LLM_LATENCY_MS: float = 0.0  # fixed latency, or the median for lognormal
+    MOCK_LLM_LATENCY_SIGMA: float = 0.5
+    MOCK_LLM_LATENCY_TRACE_PATH: Optional[str] = None
+    LLM_RECORD_PATH: Optional[str] = None  # append every LLM call to this JSON lines file
+    LLM_RECORD_REDACTION: str = "pii"  # none, pii (emails, phone numbers, URLs) or full
+    LLM_REPLAY_PATH: Optional[str] = None  # recording served when LLM_BACKEND=replay
+    LLM_REPLAY_SPEED: float = 1.0  # replay this many times faster than recorded (2 halves delays), 0 replays instantly
+    LLM_PROVIDERS: Optional[str] = None  # JSON list of OpenAI-compatible endpoints, see app/services/llm_routing.py
+    LLM_HEDGE_DELAY_MS: float = 2000.0  # send to the next provider if no first token by then; 0 disables
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 3
+    LLM_CIRCUIT_OPEN_SECONDS: float = 30.0
+    LLM_PROVIDER_TIMEOUT_SECONDS: float = 60.0
+    LLM_COALESCE_ENABLED: bool = True  # share one upstream call between identical concurrent first-turn prompts
+    
+    # LLM Scheduling Configuration (weighted fair queue in front of the backend, see app/services/llm_scheduler.py)
+    LLM_SCHEDULER_ENABLED: bool = True
+    LLM_MAX_CONCURRENCY: int = 32  # upstream calls at once across all workers; each process gets its share
+    LLM_USER_MAX_IN_FLIGHT: int = 4  # per user and process, so one user cannot take every slot
+    LLM_ROLE_WEIGHTS: Dict[str, float] = {}  # share of slots per role relative to 1, e.g. {"admin": 2}
+    
+    # Generation Profile Configuration (see app/services/generation_profiles.py)
+    GENERATION_DEFAULT_MODE: str = "standard"  # used when neither the request nor the subject picks one
+    GENERATION_BRIEF_MAX_TOKENS: int = 300
+    GENERATION_DEEP_MAX_TOKENS: int = 2500
+    
+    # Retrieval Configuration (course materials, see app/services/course_index.py)
+    RETRIEVAL_ENABLED: bool = True
+    RETRIEVAL_INDEX_DIR: str = "data/course_index"
+    RETRIEVAL_TOP_K: int = 4
+    RETRIEVAL_MIN_SCORE: float = 1.0
+    RETRIEVAL_CHUNK_WORDS: int = 180
+    RETRIEVAL_CHUNK_OVERLAP_WORDS: int = 30
+    RETRIEVAL_MAX_DOCUMENT_CHARS: int = 2000000
+    
+    # Chat Configuration
+    CHAT_BATCH_MAX_PROMPTS: int = 20
+    CHAT_BATCH_CONCURRENCY: int = 4
+    
+    # Speculative Follow-up Configuration (clients opt in per message with speculate=true)
+    SPECULATION_ENABLED: bool = True
+    SPECULATION_MAX_CONCURRENCY: int = 2
+    SPECULATION_TOKEN_BUDGET_PER_HOUR: int = 200000
+    SPECULATION_TTL_SECONDS: int = 600
+    SPECULATION_MAX_ENTRIES: int = 1000
+    
+    # Study Stats Configuration (rollups in study_stats / study_weeks)
+    STATS_IDLE_GAP_SECONDS: int = 1800  # gaps between questions longer than this do not count as study time
+    STATS_MAX_WEEKS: int = 52
+    
+    # Model Performance Configuration (admin dashboard, sketches in model_perf_sketches)
+    MODEL_STATS_ENABLED: bool = True
+    MODEL_STATS_FLUSH_INTERVAL_SECONDS: float = 30.0  # each worker merges its in-memory sketches into the table this often
+    MODEL_STATS_RELATIVE_ACCURACY: float = 0.01  # percentiles are within 1% of the true value
+    MODEL_STATS_RETENTION_DAYS: int = 90
+    MODEL_STATS_MAX_HOURS: int = 24 * 31  # longest range one admin query may cover
+    
+    # Archive Configuration (cold sessions are compressed out of chat_messages)
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+    ARCHIVE_INACTIVE_AFTER_DAYS: int = 7  # deleted (inactive) sessions
+    ARCHIVE_IDLE_AFTER_DAYS: int = 90  # active sessions with no new messages
+    ARCHIVE_BATCH_SIZE: int = 200
+    ARCHIVE_CODEC: str = "zlib"  # zstd also works but needs the zstandard package, which requirements.txt does not install
+    ARCHIVE_PURGE_AFTER_DAYS: Optional[int] = None  # permanently delete archived inactive sessions; None keeps them
+    
+    # Idempotency Configuration
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 300  # an in-progress key older than this is considered abandoned
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: float = 120.0
+    IDEMPOTENCY_POLL_INTERVAL_SECONDS: float = 0.25
+    
+    # Tracing Configuration
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "none"  # none, console, file or otlp
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_SERVER_TIMING: bool = True
+    
+    # Metrics Configuration
+    METRICS_ENABLED: bool = True
+    
+    # Health Check Configuration
+    READINESS_CHECK_INTERVAL_SECONDS: float = 10.0
+    READINESS_LLM_CHECK_ENABLED: bool = False
+    READINESS_LLM_CHECK_INTERVAL_SECONDS: float = 60.0
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding='utf-8',
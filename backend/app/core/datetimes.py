@@ -0,0 +1,12 @@
+"""
+Datetime helpers shared by services that compare database timestamps
+"""
+
+from datetime import datetime, timezone
+
+
+def naive_utc(value: datetime) -> datetime:
+    # Postgres returns aware datetimes, SQLite naive ones; compare everything as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
@@ -0,0 +1,49 @@
+"""
+Client disconnect detection
+Lets a handler abandon work it is waiting on (usually an LLM call) as soon as
+the client that asked for it has gone away
+"""
+
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+
+from starlette.requests import Request
+
+T = TypeVar("T")
+
+CLIENT_CLOSED_REQUEST = 499  # nginx's status for requests the client abandoned; only ever seen in logs and metrics
+
+
+class ClientDisconnected(Exception):
+    """Raised instead of a result when the client disconnected first"""
+
+
+async def _wait_for_disconnect(request: Request):
+    # With the body already read, receive() only returns once the connection closes
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Optional[Request], awaitable: Awaitable[T]) -> T:
+    if request is None:
+        return await awaitable
+
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if work.done():
+        return work.result()
+    work.cancel()
+    await asyncio.wait({work})
+    if not work.cancelled():
+        work.exception()  # retrieved so a gather cancelled through its children is not logged
+    raise ClientDisconnected()
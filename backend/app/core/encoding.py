@@ -0,0 +1,188 @@
+"""
+Response encoding
+Content-Encoding negotiation (brotli or gzip) for complete responses, and an
+optional MessagePack representation for clients that send
+Accept: application/msgpack
+"""
+
+import asyncio
+import gzip
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+COMPRESSIBLE_MEDIA_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+} | set(MSGPACK_MEDIA_TYPES)
+THREAD_THRESHOLD_BYTES = 64 * 1024  # larger bodies are compressed off the event loop
+
+
+def _qualities(header: str) -> Dict[str, float]:
+    qualities = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = max(quality, qualities.get(name, 0.0))
+    return qualities
+
+
+@lru_cache(maxsize=1)
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+@lru_cache(maxsize=1)
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    qualities = _qualities(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    candidates = []
+    if _brotli() is not None:
+        candidates.append(("br", qualities.get("br", wildcard)))
+    candidates.append(("gzip", qualities.get("gzip", wildcard)))
+    # Highest quality wins; on a tie brotli, listed first, is smaller at similar cost
+    encoding, quality = max(candidates, key=lambda c: c[1])
+    return encoding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return _brotli().compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_MEDIA_TYPES
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing complete responses above a size threshold
+    Streamed responses pass through untouched so NDJSON events are not held back
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether the response is worth compressing
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            compressible = _compressible(headers.get("content-type", ""))
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if (
+                encoding is None
+                or not compressible
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= THREAD_THRESHOLD_BYTES:
+                body = await asyncio.to_thread(compress, body, encoding, self.gzip_level, self.brotli_quality)
+            else:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return _msgpack().packb(content, use_bin_type=True)
+
+
+def prefers_msgpack(accept: str) -> bool:
+    if _msgpack() is None:
+        return False
+    qualities = _qualities(accept)
+    msgpack_quality = max(qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = max(qualities.get(media_type, 0.0) for media_type in ("application/json", "application/*", "*/*"))
+    # Only on explicit request: a client sending just */* keeps getting JSON
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def _to_builtin(content: Any) -> Any:
+    # JSON mode so both representations carry identical values (ISO datetimes, enum values)
+    if isinstance(content, BaseModel):
+        return content.model_dump(mode="json")
+    if isinstance(content, (list, tuple)):
+        return [_to_builtin(item) for item in content]
+    return content
+
+
+def negotiated_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    payload = _to_builtin(content)
+    if prefers_msgpack(request.headers.get("accept", "")):
+        response = MsgPackResponse(payload, status_code=status_code)
+    else:
+        response = JSONResponse(payload, status_code=status_code)
+    response.headers["Vary"] = "Accept"
+    return response
+
@@ -0,0 +1,161 @@
+"""
+Weighted fair queueing
+Admits async callers to a fixed number of slots. Priority classes are served
+strictly in order; within a class each key gets slots in proportion to its
+weight however many requests it has queued (start-time fair queueing), and no
+key holds more than max_per_key slots at once
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Hashable, Optional
+
+
+class _Waiter:
+    __slots__ = ("key", "priority", "start", "finish", "sequence", "future", "queued_at")
+
+    def __init__(self, key: Hashable, priority: int, start: float, finish: float, sequence: int):
+        self.key = key
+        self.priority = priority
+        self.start = start
+        self.finish = finish
+        self.sequence = sequence
+        self.future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+
+
+class _Flow:
+    __slots__ = ("waiters", "last_finish")
+
+    def __init__(self):
+        self.waiters: Deque[_Waiter] = deque()
+        self.last_finish = 0.0
+
+
+class FairScheduler:
+
+    def __init__(self, capacity: int, max_per_key: Optional[int] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.max_per_key = max_per_key
+        self._active = 0
+        self._active_by_key: Dict[Hashable, int] = {}
+        self._flows: Dict[int, Dict[Hashable, _Flow]] = {}  # priority -> key -> queued requests
+        self._virtual_time: Dict[int, float] = {}
+        self._sequence = itertools.count()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def queued(self, priority: Optional[int] = None) -> int:
+        return sum(
+            len(flow.waiters)
+            for flow_priority, flows in self._flows.items()
+            if priority is None or flow_priority == priority
+            for flow in flows.values()
+        )
+
+    def _under_cap(self, key: Hashable) -> bool:
+        return self.max_per_key is None or self._active_by_key.get(key, 0) < self.max_per_key
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in sorted(self._flows):
+            # Keys at their cap are skipped, so a lower class can use a slot nobody above may take
+            heads = [
+                flow.waiters[0] for key, flow in self._flows[priority].items()
+                if self._under_cap(key)
+            ]
+            if heads:
+                return min(heads, key=lambda waiter: (waiter.finish, waiter.sequence))
+        return None
+
+    def _remove(self, waiter: _Waiter):
+        flows = self._flows.get(waiter.priority, {})
+        flow = flows.get(waiter.key)
+        if flow is None:
+            return
+        try:
+            flow.waiters.remove(waiter)
+        except ValueError:
+            return
+        if not flow.waiters:
+            # An idle key keeps no credit: when it returns it starts at the current virtual time
+            del flows[waiter.key]
+            if not flows:
+                del self._flows[waiter.priority]
+
+    def _dispatch(self):
+        while self._active < self.capacity:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._remove(waiter)
+            if waiter.future.done():
+                continue  # cancelled while queued
+            self._virtual_time[waiter.priority] = max(self._virtual_time.get(waiter.priority, 0.0), waiter.start)
+            self._active += 1
+            self._active_by_key[waiter.key] = self._active_by_key.get(waiter.key, 0) + 1
+            waiter.future.set_result(None)
+
+    async def acquire(self, key: Hashable, weight: float = 1.0, priority: int = 0, cost: float = 1.0) -> float:
+        """Waits for a slot and returns how long that took in seconds"""
+        flows = self._flows.setdefault(priority, {})
+        flow = flows.get(key)
+        if flow is None:
+            flow = flows[key] = _Flow()
+        start = max(self._virtual_time.get(priority, 0.0), flow.last_finish)
+        flow.last_finish = start + cost / weight
+        waiter = _Waiter(key, priority, start, flow.last_finish, next(self._sequence))
+        flow.waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just as the caller was cancelled
+                self.release(key)
+            else:
+                self._remove(waiter)
+            raise
+        return time.monotonic() - waiter.queued_at
+
+    def promote(self, key: Hashable, priority: int):
+        # Moves the key's queued requests from lower classes to the back of its queue in this one
+        for lower in sorted(p for p in self._flows if p > priority):
+            flow = self._flows[lower].get(key)
+            if flow is None:
+                continue
+            for waiter in list(flow.waiters):
+                self._remove(waiter)
+                target = self._flows.setdefault(priority, {}).setdefault(key, _Flow())
+                cost = waiter.finish - waiter.start
+                waiter.priority = priority
+                waiter.start = max(self._virtual_time.get(priority, 0.0), target.last_finish)
+                waiter.finish = target.last_finish = waiter.start + cost
+                target.waiters.append(waiter)
+        self._dispatch()
+
+    def release(self, key: Hashable):
+        self._active -= 1
+        remaining = self._active_by_key.get(key, 0) - 1
+        if remaining > 0:
+            self._active_by_key[key] = remaining
+        else:
+            self._active_by_key.pop(key, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self, key: Hashable, weight: float = 1.0, priority: int = 0, cost: float = 1.0
+    ) -> AsyncIterator[float]:
+        waited = await self.acquire(key, weight, priority, cost)
+        try:
+            yield waited
+        finally:
+            self.release(key)
@@ -0,0 +1,243 @@
+"""
+Prometheus metrics
+Process-wide collectors plus the ASGI middleware that times every request.
+When PROMETHEUS_MULTIPROC_DIR is set, values are aggregated across all
+gunicorn/uvicorn worker processes at scrape time
+"""
+
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "Upstream LLM completion latency by model",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+
+LLM_TOKENS = Histogram(
+    "llm_tokens_used",
+    "Tokens consumed per LLM completion by model",
+    ["model"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+
+LLM_PROFILE_LATENCY = Histogram(
+    "llm_profile_duration_seconds",
+    "LLM completion latency by generation mode and subject",
+    ["mode", "subject"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+
+LLM_COMPLETION_TOKENS = Histogram(
+    "llm_completion_tokens",
+    "Generated (output) tokens per completion by generation mode and subject",
+    ["mode", "subject"],
+    buckets=(25, 50, 100, 200, 400, 800, 1600, 3200),
+)
+
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "Failed LLM completions by model",
+    ["model"],
+)
+
+LLM_PROVIDER_REQUESTS = Counter(
+    "llm_provider_requests_total",
+    "Routed LLM attempts by provider and outcome (success, failure, cancelled)",
+    ["provider", "outcome"],
+)
+
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Extra LLM requests sent because the preferred provider was slow",
+    ["provider"],
+)
+
+LLM_COALESCED = Counter(
+    "llm_coalesced_requests_total",
+    "LLM calls avoided by sharing an identical in-flight request",
+    ["model"],
+)
+
+LLM_CANCELLED = Counter(
+    "llm_cancelled_total",
+    "LLM calls cancelled before completing because nobody was waiting for the answer",
+    ["model"],
+)
+
+LLM_CANCELLED_PROMPT_TOKENS = Counter(
+    "llm_cancelled_prompt_tokens_total",
+    "Estimated prompt tokens already sent for LLM calls that were then cancelled",
+    ["model"],
+)
+
+LLM_CANCELLED_COMPLETION_BUDGET = Counter(
+    "llm_cancelled_completion_budget_tokens_total",
+    "max_tokens of cancelled LLM calls, an upper bound on the output tokens the cancel avoided",
+    ["model"],
+)
+
+CHAT_DISCONNECTS = Counter(
+    "chat_client_disconnects_total",
+    "Chat requests abandoned because the client disconnected before the answer was ready",
+    ["endpoint"],
+)
+
+LLM_SPECULATIONS = Counter(
+    "llm_speculations_total",
+    "Speculative follow-up generations by outcome",
+    ["outcome"],
+)
+
+LLM_IN_FLIGHT = Gauge(
+    "llm_in_flight_requests",
+    "LLM completions currently awaiting the upstream provider",
+    multiprocess_mode="livesum",
+)
+
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time LLM calls waited for an upstream slot in the fair scheduler by priority",
+    ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+LLM_QUEUED = Gauge(
+    "llm_queued_requests",
+    "LLM calls waiting for an upstream slot by priority",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+
+RETRIEVAL_LATENCY = Histogram(
+    "retrieval_duration_seconds",
+    "Course material search latency",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5),
+)
+
+AUTH_TOKEN_REFRESHES = Counter(
+    "auth_token_refreshes_total",
+    "Refresh token requests by outcome (rotated, invalid, expired, revoked, reused)",
+    ["outcome"],
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently checked out of the pool",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Database connections opened beyond pool_size",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+
+DB_READ_ROUTING = Counter(
+    "db_read_sessions_total",
+    "Read-only database sessions by target (replica, or primary for read-your-writes)",
+    ["target"],
+)
+
+ARCHIVE_OPERATIONS = Counter(
+    "archive_sessions_total",
+    "Chat sessions processed by the archival job by operation (archived, restored, purged)",
+    ["operation"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"],
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def instrument_engine(engine: Engine, name: str = "primary"):
+    checked_out = DB_POOL_CHECKED_OUT.labels(engine=name)
+    overflow = DB_POOL_OVERFLOW.labels(engine=name)
+
+    def update_pool_gauges(*args):
+        pool = engine.pool
+        checked_out.set(pool.checkedout() if hasattr(pool, "checkedout") else 0)
+        overflow.set(max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0)
+
+    event.listen(engine, "checkout", update_pool_gauges)
+    event.listen(engine, "checkin", update_pool_gauges)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency per route template
+    Unmatched paths share one label so scanners cannot explode cardinality
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - start)
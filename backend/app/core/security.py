@@ -1,26 +1,36 @@
 
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Generator, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import get_db
-from app.db.models import User
+from app.core.tracing import span
+from app.db.session import get_db, open_read_session
+from app.db.models import User, UserRole
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # passlib and the bcrypt backend load on first use (or during startup prewarm), not at import
+    from passlib.context import CryptContext
+
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    context.handler().get_backend()
+    return context
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -38,14 +48,14 @@ def decode_access_token(token: str) -> dict:
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
+def get_token_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> int:
+    # FastAPI caches dependencies per request, so the token is decoded once however many depend on it
     try:
-        payload = decode_access_token(token)
-        user_id = int(payload.get("sub"))
+        with span("auth.decode"):
+            payload = decode_access_token(credentials.credentials)
+            return int(payload.get("sub"))
     except (JWTError, ValueError, TypeError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,7 +63,10 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+
+def _lookup_user(db: Session, user_id: int) -> User:
+    with span("auth.user_lookup"):
+        user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -62,3 +75,54 @@ def get_current_user(
         )
     return user
 
+
+def get_current_user(
+    user_id: int = Depends(get_token_user_id),
+    db: Session = Depends(get_db)
+) -> User:
+    user = _lookup_user(db, user_id)
+    # Lets the session mark this user for read-your-writes once it commits
+    db.info["user_id"] = user.id
+    return user
+
+
+def _last_write_age(header: Optional[str]) -> Optional[float]:
+    try:
+        return float(header) / 1000 if header else None
+    except ValueError:
+        return None
+
+
+def get_read_db(
+    user_id: int = Depends(get_token_user_id),
+    last_write_age_ms: Optional[str] = Header(None, alias="X-Last-Write-Age-Ms")
+) -> Generator[Session, None, None]:
+    """
+    Session for read-only endpoints: the replica when configured, the primary
+    for a short while after this user's own writes. The client reports how
+    long ago it last wrote, measured on its own clock, so this works whichever
+    worker served the write
+    """
+    db = open_read_session(user_id, _last_write_age(last_write_age_ms))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_current_read_user(
+    user_id: int = Depends(get_token_user_id),
+    db: Session = Depends(get_read_db)
+) -> User:
+    return _lookup_user(db, user_id)
+
+
+def get_current_admin(
+    current_user: User = Depends(get_current_read_user)
+) -> User:
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
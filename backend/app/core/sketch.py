@@ -0,0 +1,113 @@
+"""
+Mergeable quantile sketches
+DDSketch (Masson et al., VLDB 2019): values are counted in logarithmic bins, so
+any quantile is returned within a fixed relative error and two sketches of the
+same accuracy merge exactly by adding their bins
+"""
+
+import math
+import struct
+from typing import Dict, Optional
+
+_HEADER = struct.Struct("<BdQQdddI")
+_BIN = struct.Struct("<iI")
+_VERSION = 1
+_MIN_VALUE = 1e-9  # values at or below this are counted as zero
+
+
+class DDSketch:
+    __slots__ = ("relative_accuracy", "max_bins", "_gamma", "_log_gamma", "bins", "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: int = 1):
+        if value <= _MIN_VALUE:
+            self.zero_count += weight
+        else:
+            self._add_to_bin(math.ceil(math.log(value) / self._log_gamma), weight)
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _add_to_bin(self, index: int, weight: int):
+        self.bins[index] = self.bins.get(index, 0) + weight
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _value(self, index: int) -> float:
+        # Midpoint of the bin in relative terms
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def _collapse(self):
+        # Fold the lowest bins together; the upper quantiles that matter keep their accuracy
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins + 1
+        folded = sum(self.bins.pop(index) for index in indexes[:excess])
+        target = indexes[excess]
+        self.bins[target] = self.bins.get(target, 0) + folded
+
+    def merge(self, other: "DDSketch"):
+        if other.relative_accuracy == self.relative_accuracy:
+            for index, weight in other.bins.items():
+                self.bins[index] = self.bins.get(index, 0) + weight
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            # Re-binned at this sketch's accuracy, so the error bounds of both sketches add up
+            for index, weight in other.bins.items():
+                self._add_to_bin(math.ceil(math.log(other._value(index)) / self._log_gamma), weight)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Clamped to what was actually seen
+                return max(self.min, min(self.max, self._value(index)))
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(
+            _VERSION, self.relative_accuracy, self.count, self.zero_count,
+            self.sum, self.min, self.max, len(self.bins)
+        )
+        return header + b"".join(_BIN.pack(index, weight) for index, weight in sorted(self.bins.items()))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        version, accuracy, count, zero_count, total, low, high, size = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported sketch version {version}")
+        sketch = cls(accuracy)
+        sketch.count, sketch.zero_count = count, zero_count
+        sketch.sum, sketch.min, sketch.max = total, low, high
+        sketch.bins = dict(_BIN.iter_unpack(data[_HEADER.size:_HEADER.size + size * _BIN.size]))
+        sketch.max_bins = max(sketch.max_bins, size)
+        return sketch
@@ -0,0 +1,211 @@
+"""
+Request tracing
+Records timed spans for each phase of a request, reports them in the
+Server-Timing response header and hands finished traces to an exporter
+"""
+
+import json
+import logging
+import secrets
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.appender import LineAppender
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """A single timed phase of a request"""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "_token")
+
+    def __init__(self, trace: "RequestTrace", name: str, attributes: Dict[str, any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = None
+        self.start_ns = 0
+        self.end_ns = 0
+        self.attributes = attributes
+        self._token = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.trace.spans.append(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned when no trace is active so instrumented code costs almost nothing"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class RequestTrace:
+    """All spans recorded while serving one HTTP request"""
+
+    def __init__(self, name: str):
+        self.trace_id = secrets.token_hex(16)
+        self.name = name
+        self.spans: List[Span] = []
+
+    def server_timing(self) -> str:
+        totals: Dict[str, float] = {}
+        for recorded in self.spans:
+            totals[recorded.name] = totals.get(recorded.name, 0.0) + recorded.duration_ms
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in totals.items())
+
+    def to_otlp(self) -> List[Dict[str, any]]:
+        return [
+            {
+                "traceId": self.trace_id,
+                "spanId": recorded.span_id,
+                "parentSpanId": recorded.parent_id or "",
+                "name": recorded.name,
+                "startTimeUnixNano": recorded.start_ns,
+                "endTimeUnixNano": recorded.end_ns,
+                "attributes": recorded.attributes,
+            }
+            for recorded in self.spans
+        ]
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def span(name: str, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, attributes)
+
+
+class ConsoleExporter:
+
+    def export(self, trace: RequestTrace):
+        phases = ", ".join(f"{s.name}={s.duration_ms:.1f}ms" for s in trace.spans)
+        logger.info(f"Trace {trace.trace_id} {trace.name}: {phases}")
+
+
+class FileExporter:
+    """Appends spans as OTLP-style JSON lines from a background thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._appender = LineAppender(path)
+
+    def export(self, trace: RequestTrace):
+        self._appender.append("".join(json.dumps(s, default=str) + "\n" for s in trace.to_otlp()))
+
+
+class OpenTelemetryExporter:
+    """Replays recorded spans into the globally configured OpenTelemetry tracer provider"""
+
+    def __init__(self):
+        from opentelemetry import trace as otel_trace
+
+        self._otel_trace = otel_trace
+        self._tracer = otel_trace.get_tracer("studybuddy")
+
+    def export(self, trace: RequestTrace):
+        otel_spans = {}
+        for recorded in sorted(trace.spans, key=lambda s: s.start_ns):
+            parent = otel_spans.get(recorded.parent_id)
+            context = self._otel_trace.set_span_in_context(parent) if parent is not None else None
+            otel_span = self._tracer.start_span(
+                recorded.name,
+                context=context,
+                start_time=recorded.start_ns,
+                attributes={k: str(v) for k, v in recorded.attributes.items()},
+            )
+            otel_span.end(end_time=recorded.end_ns)
+            otel_spans[recorded.span_id] = otel_span
+
+
+def build_exporter(name: str):
+    if name == "console":
+        return ConsoleExporter()
+    if name == "file":
+        return FileExporter(settings.TRACING_FILE_PATH)
+    if name == "otlp":
+        return OpenTelemetryExporter()
+    return None
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware that opens a trace per HTTP request
+    Only installed when TRACING_ENABLED is set
+    """
+
+    def __init__(self, app, exporter=None, server_timing: bool = True):
+        self.app = app
+        self.exporter = exporter
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(f"{scope['method']} {scope['path']}")
+        trace_token = _current_trace.set(trace)
+        root = Span(trace, "total", {"http.method": scope["method"], "http.target": scope["path"]})
+        root.__enter__()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if self.server_timing:
+                    elapsed_ms = (time.time_ns() - root.start_ns) / 1_000_000
+                    headers = MutableHeaders(scope=message)
+                    timing = trace.server_timing()
+                    total = f"total;dur={elapsed_ms:.1f}"
+                    headers.append("Server-Timing", f"{timing}, {total}" if timing else total)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            root.__exit__(None, None, None)
+            _current_trace.reset(trace_token)
+            if self.exporter is not None:
+                try:
+                    self.exporter.export(trace)
+                except Exception as e:
+                    logger.error(f"Failed to export trace {trace.trace_id}: {str(e)}")
@@ -0,0 +1,14 @@
+"""
+Gunicorn worker classes
+Only imported by gunicorn (see gunicorn.conf.py)
+"""
+
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    # Uvicorn's drain deadline sits inside gunicorn's graceful_timeout, so shutdown hooks
+    # (final stats flush, pool disposal) still run before the master resorts to SIGKILL
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "timeout_graceful_shutdown": settings.SHUTDOWN_DRAIN_SECONDS}
@@ -3,7 +3,7 @@ Database Models
 SQLAlchemy ORM models for all database tables
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum, Boolean
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Enum as SQLEnum, Boolean, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -23,6 +23,19 @@ class MessageRole(str, enum.Enum):
     ASSISTANT = "assistant"
 
 
+class IdempotencyStatus(str, enum.Enum):
+    """Idempotency key processing state"""
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+
+class ResponseMode(str, enum.Enum):
+    """How long and detailed an AI answer should be"""
+    BRIEF = "brief"
+    STANDARD = "standard"
+    DEEP = "deep"
+
+
 class Subject(str, enum.Enum):
     """Academic subject categories"""
     MATHEMATICS = "mathematics"
@@ -59,6 +72,7 @@ class User(Base):
     
     # Relationships
     sessions = relationship("ChatSession", back_populates="user", cascade="all, delete-orphan")
+    course_materials = relationship("CourseMaterial", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>"
@@ -98,6 +112,9 @@ class ChatMessage(Base):
     Stores both user questions and AI responses
     """
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_created", "session_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -118,3 +135,167 @@ class ChatMessage(Base):
     def __repr__(self):
         return f"<ChatMessage(id={self.id}, role='{self.role}', session_id={self.session_id})>"
 
+
+class ArchivedSession(Base):
+    """
+    Compressed messages of a cold chat session
+    Messages are moved here from chat_messages by the archival job and read back lazily
+    """
+    __tablename__ = "archived_sessions"
+
+    session_id = Column(Integer, ForeignKey("chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String(10), nullable=False)  # zlib or zstd
+    payload = Column(LargeBinary, nullable=False)  # compressed JSON list of messages
+    message_count = Column(Integer, nullable=False)
+    uncompressed_bytes = Column(Integer, nullable=False)
+    
+    # Timestamps
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ArchivedSession(session_id={self.session_id}, messages={self.message_count}, codec='{self.codec}')>"
+
+
+class StudyStats(Base):
+    """
+    Running study totals and streaks for one user
+    Maintained incrementally in the same commit that stores chat messages
+    """
+    __tablename__ = "study_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_sessions = Column(Integer, default=0, nullable=False)
+    total_questions = Column(Integer, default=0, nullable=False)
+    total_tokens = Column(Integer, default=0, nullable=False)
+    active_seconds = Column(Integer, default=0, nullable=False)
+    
+    # Streaks count consecutive UTC days with at least one question
+    current_streak_days = Column(Integer, default=0, nullable=False)
+    longest_streak_days = Column(Integer, default=0, nullable=False)
+    last_active_date = Column(Date)
+    last_active_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<StudyStats(user_id={self.user_id}, questions={self.total_questions}, streak={self.current_streak_days})>"
+
+
+class StudyWeek(Base):
+    """
+    Study activity of one user in one subject during one week
+    Weeks start on Monday (UTC); one row per user, subject and week
+    """
+    __tablename__ = "study_weeks"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    subject = Column(SQLEnum(Subject), primary_key=True)
+    sessions_started = Column(Integer, default=0, nullable=False)
+    questions = Column(Integer, default=0, nullable=False)
+    tokens_used = Column(Integer, default=0, nullable=False)
+    active_seconds = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<StudyWeek(user_id={self.user_id}, week_start={self.week_start}, subject='{self.subject}')>"
+
+
+class ModelPerfSketch(Base):
+    """
+    LLM performance of one model and subject during one hour
+    Latency and token distributions are serialized DDSketches (see app/core/sketch.py)
+    """
+    __tablename__ = "model_perf_sketches"
+
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    model = Column(String(50), primary_key=True)
+    subject = Column(SQLEnum(Subject), primary_key=True)
+    response_count = Column(Integer, default=0, nullable=False)
+    error_count = Column(Integer, default=0, nullable=False)  # generations that failed, not included in the sketches
+    latency_sketch = Column(LargeBinary, nullable=True)  # response_time in milliseconds
+    tokens_sketch = Column(LargeBinary, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ModelPerfSketch(bucket_start={self.bucket_start}, model='{self.model}', subject='{self.subject}')>"
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency record for retried POST requests
+    Stores the response of the first request made with a client-supplied key
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "endpoint", "key", name="uq_idempotency_keys_user_endpoint_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    endpoint = Column(String(100), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(SQLEnum(IdempotencyStatus), default=IdempotencyStatus.IN_PROGRESS, nullable=False)
+    
+    # Stored response (only once completed)
+    status_code = Column(Integer)
+    response_body = Column(Text)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey(id={self.id}, user_id={self.user_id}, endpoint='{self.endpoint}', status='{self.status}')>"
+
+
+class RefreshToken(Base):
+    """
+    Refresh token issued at login, stored only as a SHA-256 hash
+    Each refresh replaces the token with a new one in the same family; reusing a replaced token revokes the family
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    family_id = Column(String(32), nullable=False, index=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    session_started_at = Column(DateTime(timezone=True), nullable=False)  # login time, caps how far the session can slide
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    rotated_at = Column(DateTime(timezone=True))
+    revoked_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<RefreshToken(id={self.id}, user_id={self.user_id}, family_id='{self.family_id}')>"
+
+
+class CourseMaterial(Base):
+    """
+    Course notes uploaded by a student for one subject
+    The text itself lives in the on-disk course index, chunked for retrieval
+    """
+    __tablename__ = "course_materials"
+    __table_args__ = (
+        Index("ix_course_materials_user_subject", "user_id", "subject"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subject = Column(SQLEnum(Subject), nullable=False)
+    title = Column(String(255), nullable=False)
+    filename = Column(String(255))
+    
+    # Index metadata
+    char_count = Column(Integer, default=0, nullable=False)
+    chunk_count = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Relationships
+    user = relationship("User", back_populates="course_materials")
+
+    def __repr__(self):
+        return f"<CourseMaterial(id={self.id}, user_id={self.user_id}, subject='{self.subject}', title='{self.title}')>"
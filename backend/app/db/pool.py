@@ -0,0 +1,82 @@
+import logging
+import time
+from typing import Any, Dict, Tuple
+
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a free connection
+    Includes the time to open a new connection when the pool grows
+    """
+
+    engine_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(engine=self.engine_name).observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool, which must keep reporting under the same name
+        pool = super().recreate()
+        pool.engine_name = self.engine_name
+        return pool
+
+
+def pool_dimensions() -> Tuple[int, int]:
+    # DB_MAX_CONNECTIONS is the budget for the whole deployment, shared by every worker process
+    per_process = max(2, settings.DB_MAX_CONNECTIONS // max(1, settings.WEB_CONCURRENCY))
+    pool_size = settings.DB_POOL_SIZE if settings.DB_POOL_SIZE is not None else max(1, per_process * 2 // 3)
+    max_overflow = (
+        settings.DB_MAX_OVERFLOW if settings.DB_MAX_OVERFLOW is not None
+        else max(0, per_process - pool_size)
+    )
+    return pool_size, max_overflow
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    if settings.DB_PGBOUNCER:
+        # PgBouncer owns the pooling; holding idle connections here would only pin server slots
+        options: Dict[str, Any] = {"poolclass": NullPool}
+        if make_url(url).get_driver_name() == "psycopg":
+            # Prepared statements do not survive transaction pooling
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+
+    pool_size, max_overflow = pool_dimensions()
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def warm_pool(engine: Engine) -> int:
+    pool = engine.pool
+    if not settings.DB_POOL_WARMUP or not isinstance(pool, QueuePool):
+        return 0
+
+    # Check out pool_size connections at once so each is a distinct new connection, then return them all
+    connections = []
+    try:
+        for _ in range(pool.size()):
+            connections.append(engine.raw_connection())
+    except Exception as e:
+        logger.warning(f"Connection pool warm-up stopped early: {str(e)}")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
@@ -1,18 +1,82 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Dict, Generator, Optional
 
 from app.core.config import settings
+from app.core.metrics import DB_READ_ROUTING, instrument_engine
+from app.db.pool import InstrumentedQueuePool, engine_options
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+
+def _create_engine(url: str, name: str):
+    created = create_engine(url, **engine_options(url))
+    if isinstance(created.pool, InstrumentedQueuePool):
+        created.pool.engine_name = name
+    instrument_engine(created, name=name)
+    return created
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Without a replica, reads simply use the primary
+replica_engine = engine
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = _create_engine(settings.DATABASE_REPLICA_URL, "replica")
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+# Each worker process only sees its own commits here; clients that send X-Last-Write-Age-Ms
+# carry the signal between workers (see reads_from_primary)
+# user id -> monotonic time until which that user's reads go to the primary
+_sticky_until: Dict[int, float] = {}
+_sticky_lock = threading.Lock()
+
+
+def mark_user_write(user_id: int):
+    if replica_engine is engine:
+        return
+    deadline = time.monotonic() + settings.DB_REPLICA_STICKY_SECONDS
+    with _sticky_lock:
+        _sticky_until[user_id] = deadline
+        # Expired entries are dropped lazily so the map stays bounded by recent writers
+        if len(_sticky_until) > 10000:
+            now = time.monotonic()
+            for key in [k for k, v in _sticky_until.items() if v <= now]:
+                del _sticky_until[key]
+
+
+def reads_from_primary(user_id: Optional[int], last_write_age: Optional[float] = None) -> bool:
+    """last_write_age: seconds since the client's own last write, as reported by the client"""
+    if replica_engine is engine:
+        return True
+    if last_write_age is not None and 0 <= last_write_age < settings.DB_REPLICA_STICKY_SECONDS:
+        return True
+    if user_id is None:
+        return False
+    with _sticky_lock:
+        deadline = _sticky_until.get(user_id)
+    return deadline is not None and deadline > time.monotonic()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_commit(session):
+    # get_current_user tags the request session with the user, so any write it commits makes them sticky
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        mark_user_write(session.info["user_id"])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _record_rollback(session):
+    session.info.pop("wrote", None)
+
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -21,3 +85,9 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+
+def open_read_session(user_id: Optional[int] = None, last_write_age: Optional[float] = None) -> Session:
+    primary = reads_from_primary(user_id, last_write_age)
+    if replica_engine is not engine:
+        DB_READ_ROUTING.labels(target="primary" if primary else "replica").inc()
+    return SessionLocal() if primary else ReadSessionLocal()
@@ -1,14 +1,28 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
+import os
+from typing import Optional
 
 from app.core.config import settings
+from app.core.encoding import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.security import get_pwd_context
+from app.core.tracing import TracingMiddleware, build_exporter
 from app.api.v1.api import api_router
-from app.db.session import engine
+from app.db.pool import warm_pool
+from app.db.session import engine, replica_engine
 from app.db.base import Base
 from app.db import models  # Import models so SQLAlchemy knows about them
+from app.services.ai_service import ai_service
+from app.services.archive_service import archive_service
+from app.services.health_service import health_service
+from app.services.model_stats_service import model_stats_service
+from app.services.partition_service import partition_service
+from app.services.speculation_service import speculation_service
 
 # Configure logging
 logging.basicConfig(
@@ -36,6 +50,24 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    if settings.COMPRESSION_ENABLED:
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+
+    if settings.METRICS_ENABLED:
+        application.add_middleware(MetricsMiddleware)
+
+    if settings.TRACING_ENABLED:
+        application.add_middleware(
+            TracingMiddleware,
+            exporter=build_exporter(settings.TRACING_EXPORTER),
+            server_timing=settings.TRACING_SERVER_TIMING,
+        )
+
     application.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
     return application
@@ -44,11 +76,28 @@ def create_application() -> FastAPI:
 app = create_application()
 
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info(f"Starting {settings.PROJECT_NAME}")
-    logger.info(f"Environment: {settings.ENVIRONMENT}")
+_prewarm_task: Optional[asyncio.Task] = None
+
+
+def _prewarm():
+    # Runs in the background so the server accepts requests while connections and clients are set up
+    warmed = warm_pool(engine)
+    if replica_engine is not engine:
+        warmed += warm_pool(replica_engine)
+    if warmed:
+        logger.info(f"Warmed {warmed} database connections")
+    if settings.STARTUP_PREWARM:
+        try:
+            ai_service.warm()
+            get_pwd_context()
+        except Exception as e:
+            logger.warning(f"Startup prewarm failed: {str(e)}")
+
+
+def init_schema():
+    # Under gunicorn the master calls this once before forking and sets SCHEMA_INITIALIZED for the workers
     try:
+        partition_service.prepare_schema(engine)
         Base.metadata.create_all(bind=engine)
         table_names = [table.name for table in Base.metadata.sorted_tables]
         logger.info(f"Database tables initialized: {', '.join(table_names)}")
@@ -56,6 +105,36 @@ async def startup_event():
         logger.error(f"Failed to initialize database: {str(e)}")
         raise
 
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info(f"Starting {settings.PROJECT_NAME}")
+    logger.info(f"Environment: {settings.ENVIRONMENT}")
+    if os.environ.get("SCHEMA_INITIALIZED"):
+        logger.info("Schema already initialized by the gunicorn master")
+    elif settings.DB_AUTO_CREATE_SCHEMA:
+        init_schema()
+    else:
+        logger.info("Skipping schema creation (DB_AUTO_CREATE_SCHEMA is off)")
+    global _prewarm_task
+    _prewarm_task = asyncio.create_task(asyncio.to_thread(_prewarm))
+    await health_service.start()
+    await partition_service.start()
+    archive_service.start()
+    model_stats_service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _prewarm_task is not None:
+        _prewarm_task.cancel()
+    await health_service.stop()
+    archive_service.stop()
+    partition_service.stop()
+    speculation_service.shutdown()
+    await model_stats_service.stop()
+
+
 @app.get("/", tags=["Root"])
 async def root():
     return {
@@ -66,40 +145,45 @@ async def root():
     }
 
 
-@app.get("/debug/config", tags=["Debug"])
-async def debug_config():
-    return {
-        "environment": settings.ENVIRONMENT,
-        "debug": settings.DEBUG,
-        "secret_key_set": bool(settings.SECRET_KEY),
-        "secret_key_length": len(settings.SECRET_KEY) if settings.SECRET_KEY else 0,
-        "secret_key_preview": settings.SECRET_KEY[:15] + "..." if settings.SECRET_KEY and len(settings.SECRET_KEY) > 15 else "NOT_SET",
-        "algorithm": settings.ALGORITHM,
-        "token_expire_minutes": settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-        "openai_key_set": bool(settings.OPENAI_API_KEY and not settings.OPENAI_API_KEY.endswith("here")),
-        "database_url_set": bool(settings.DATABASE_URL)
-    }
+if settings.DEBUG:
+    @app.get("/debug/config", tags=["Debug"])
+    async def debug_config():
+        return {
+            "environment": settings.ENVIRONMENT,
+            "debug": settings.DEBUG,
+            "secret_key_set": bool(settings.SECRET_KEY),
+            "algorithm": settings.ALGORITHM,
+            "token_expire_minutes": settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+            "openai_key_set": bool(settings.OPENAI_API_KEY and not settings.OPENAI_API_KEY.endswith("here")),
+            "database_url_set": bool(settings.DATABASE_URL)
+        }
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["Health"], include_in_schema=False)
+    async def metrics():
+        content, content_type = render_metrics()
+        return Response(content=content, media_type=content_type)
+
+
+@app.get("/livez", tags=["Health"])
+async def liveness_probe():
+    return {"status": "alive"}
+
+
+@app.get("/readyz", tags=["Health"])
+async def readiness_probe():
+    snapshot = health_service.snapshot()
+    status_code = 200 if health_service.is_ready else 503
+    return JSONResponse(content=snapshot, status_code=status_code)
 
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    from sqlalchemy import inspect
-    
-    try:
-        inspector = inspect(engine)
-        table_names = inspector.get_table_names()
-        db_connected = True
-    except Exception as e:
-        table_names = []
-        db_connected = False
-        logger.error(f"Database connection check failed: {str(e)}")
-    
     return {
-        "status": "healthy" if db_connected else "unhealthy",
+        "status": "healthy" if health_service.is_ready else "unhealthy",
         "environment": settings.ENVIRONMENT,
         "database": {
-            "connected": db_connected,
-            "tables": table_names
+            "connected": health_service.database_ready
         }
     }
-
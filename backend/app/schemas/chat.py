@@ -3,10 +3,11 @@ Chat schemas for request/response validation
 Pydantic models for chat-related API operations
 """
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from datetime import datetime
-from typing import List, Optional
-from app.db.models import MessageRole, Subject
+from typing import Annotated, List, Optional
+from app.core.config import settings
+from app.db.models import MessageRole, ResponseMode, Subject
 
 
 class MessageBase(BaseModel):
@@ -21,6 +22,29 @@ class MessageCreate(MessageBase):
     """
     session_id: Optional[int] = None
     subject: Optional[Subject] = None
+    mode: Optional[ResponseMode] = None  # brief, standard or deep; defaults per subject
+    speculate: bool = False  # pre-generate the answer to the top suggested follow-up
+
+
+class MessageBatchCreate(BaseModel):
+    """
+    Schema for submitting several prompts to one session at once
+    Used by practice-quiz mode; prompts are answered concurrently
+    """
+    session_id: Optional[int] = None
+    subject: Optional[Subject] = None
+    prompts: List[Annotated[str, Field(min_length=1, max_length=5000)]] = Field(..., min_length=1)
+    mode: Optional[ResponseMode] = None
+    stream: bool = False
+
+    @field_validator("prompts")
+    @classmethod
+    def limit_prompts(cls, v):
+        if len(v) > settings.CHAT_BATCH_MAX_PROMPTS:
+            raise ValueError(
+                f"At most {settings.CHAT_BATCH_MAX_PROMPTS} prompts can be sent in one batch"
+            )
+        return v
 
 
 class MessageResponse(MessageBase):
@@ -87,4 +111,13 @@ class ChatResponse(BaseModel):
     session_id: int
     user_message: MessageResponse
     assistant_message: MessageResponse
+    suggested_follow_ups: List[str] = []
+
 
+class ChatBatchResponse(BaseModel):
+    """
+    Schema for batch chat response
+    Contains one user/assistant pair per prompt, in submission order
+    """
+    session_id: int
+    results: List[ChatResponse]
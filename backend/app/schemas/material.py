@@ -0,0 +1,33 @@
+"""
+Course material schemas for request/response validation
+Pydantic models for uploading and listing course notes
+"""
+
+from pydantic import BaseModel, Field, ConfigDict
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+from app.db.models import Subject
+
+
+class CourseMaterialCreate(BaseModel):
+    """
+    Schema for uploading course notes as text
+    PDF and text files can be uploaded through the multipart endpoint instead
+    """
+    title: str = Field(..., min_length=1, max_length=255)
+    subject: Subject
+    content: str = Field(..., min_length=1, max_length=settings.RETRIEVAL_MAX_DOCUMENT_CHARS)
+
+
+class CourseMaterialResponse(BaseModel):
+    """Schema for course material in API responses"""
+    id: int
+    subject: Subject
+    title: str
+    filename: Optional[str] = None
+    char_count: int
+    chunk_count: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
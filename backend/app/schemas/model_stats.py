@@ -0,0 +1,43 @@
+"""
+Model performance schemas for the admin API
+Pydantic models for latency, token and error-rate summaries per model, subject and time bucket
+"""
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from app.db.models import Subject
+
+
+class PercentilesResponse(BaseModel):
+    """Schema for a distribution summarized from a quantile sketch"""
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+    mean: Optional[float] = None
+    max: Optional[float] = None
+
+
+class ModelStatsBucketResponse(BaseModel):
+    """
+    Schema for one group of model performance data
+    Fields left out of group_by (and bucket_start when bucket is total) are null
+    """
+    bucket_start: Optional[datetime] = None
+    model: Optional[str] = None
+    subject: Optional[Subject] = None
+    requests: int
+    errors: int
+    error_rate: float
+    latency_ms: PercentilesResponse
+    tokens: PercentilesResponse
+
+
+class ModelStatsResponse(BaseModel):
+    """Schema for the admin model performance report"""
+    since: datetime
+    bucket: str
+    group_by: List[str]
+    relative_accuracy: float
+    buckets: List[ModelStatsBucketResponse]
@@ -0,0 +1,45 @@
+"""
+Study statistics schemas for API responses
+Pydantic models for the per-user progress summary served from rollup tables
+"""
+
+from pydantic import BaseModel, ConfigDict
+from datetime import date
+from typing import List, Optional
+from app.db.models import Subject
+
+
+class StudyWeekResponse(BaseModel):
+    """Schema for one subject's activity during one week"""
+    week_start: date
+    subject: Subject
+    sessions_started: int
+    questions: int
+    tokens_used: int
+    active_seconds: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SubjectStatsResponse(BaseModel):
+    """Schema for one subject's activity summed over the requested weeks"""
+    subject: Subject
+    sessions_started: int
+    questions: int
+    active_seconds: int
+
+
+class StudyStatsResponse(BaseModel):
+    """
+    Schema for a student's study progress
+    Totals cover all time; subjects and weeks cover the requested number of weeks
+    """
+    total_sessions: int
+    total_questions: int
+    total_tokens: int
+    active_seconds: int
+    current_streak_days: int
+    longest_streak_days: int
+    last_active_date: Optional[date] = None
+    subjects: List[SubjectStatsResponse]
+    weeks: List[StudyWeekResponse]
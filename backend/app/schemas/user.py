@@ -65,5 +65,14 @@ class TokenResponse(BaseModel):
     """
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
     user: UserResponse
 
+
+class RefreshTokenRequest(BaseModel):
+    """
+    Schema for refreshing or revoking a login session
+    The refresh token is single-use; each refresh returns a new one
+    """
+    refresh_token: str = Field(..., min_length=1, max_length=255)
+
@@ -1,34 +1,42 @@
+import asyncio
 import logging
-from typing import List, Dict
-import time
-import random
+import threading
+from typing import List, Dict, Optional
 
 from app.core.config import settings
+from app.core.metrics import (
+    LLM_CANCELLED,
+    LLM_CANCELLED_COMPLETION_BUDGET,
+    LLM_CANCELLED_PROMPT_TOKENS,
+    LLM_COALESCED,
+    LLM_COMPLETION_TOKENS,
+    LLM_ERRORS,
+    LLM_IN_FLIGHT,
+    LLM_LATENCY,
+    LLM_PROFILE_LATENCY,
+    LLM_TOKENS,
+)
+from app.core.singleflight import SingleFlight
+from app.services.generation_profiles import GenerationProfile, resolve_profile
+from app.services.llm_backends import (
+    LLMBackend,
+    LLMUnavailableError,
+    MockBackend,
+    create_backend,
+    estimate_prompt_tokens
+)
+from app.services.llm_scheduler import LLMCaller, llm_scheduler
 
 logger = logging.getLogger(__name__)
 
-# Check if we should use mock AI (when OpenAI key is not set or is placeholder)
-USE_MOCK_AI = (
-    not settings.OPENAI_API_KEY or 
-    settings.OPENAI_API_KEY.endswith("here") or
-    settings.OPENAI_API_KEY == "your-api-key" or
-    settings.OPENAI_API_KEY.startswith("mock-") or
-    "mock" in settings.OPENAI_API_KEY.lower()
-)
-
 
 class AIService:
     
-    def __init__(self):
-        self.use_mock = USE_MOCK_AI
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        self._backend = backend
+        self._backend_lock = threading.Lock()
+        self._in_flight = SingleFlight()
         
-        if not self.use_mock:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        else:
-            self.client = None
-            logger.warning("Using MOCK AI responses (OpenAI not configured)")
-            
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
@@ -137,84 +145,165 @@ ENGAGEMENT TECHNIQUES:
 
 Remember: Every interaction is an opportunity to build confidence, deepen understanding, and develop lifelong learning skills. You're not just helping them pass an exam—you're teaching them how to learn."""
     
-    def _generate_mock_response(self, user_message: str, subject: str = None) -> Dict[str, any]:
-        responses = [
-            "Great question! Let me explain this concept step by step:\n\n1. First, we need to understand the basic principles\n2. Then, we can apply them to solve the problem\n3. Finally, let's look at some practical examples\n\nDoes this help clarify things?",
-            
-            "That's an interesting topic! Here's a simplified explanation:\n\nThe key concept is that everything connects to a fundamental principle. Think of it like building blocks - each piece fits together to form the complete picture.\n\nWould you like me to elaborate on any specific part?",
-            
-            "Excellent question for exam preparation! Here's what you need to know:\n\n**Main Points:**\n- Point 1: The foundational concept\n- Point 2: How it applies in practice\n- Point 3: Common mistakes to avoid\n\n**Example:** Imagine you have a real-world scenario...\n\nLet me know if you need more details!",
-            
-            "I'd be happy to help you understand this! Let me break it down:\n\n### Overview\nThis concept is fundamental to understanding the larger topic.\n\n### Key Details\n- It involves several interconnected ideas\n- Each part builds on the previous one\n- Practice is essential for mastery\n\n### Tips for Studying\n1. Review the basics first\n2. Work through examples\n3. Test yourself regularly\n\nWhat specific aspect would you like to explore further?",
-        ]
-        
-        time.sleep(random.uniform(1.0, 2.5))
-        
-        content = random.choice(responses)
-        
-        if subject:
-            subject_name = subject.replace('_', ' ').title()
-            content = f"**{subject_name} Study Topic**\n\n" + content
-        
-        return {
-            "content": content,
-            "tokens_used": random.randint(150, 300),
-            "model_used": "mock-gpt-3.5-turbo",
-            "response_time": random.randint(1500, 2500)
-        }
+    @property
+    def backend(self) -> LLMBackend:
+        # Created on first use so importing this module stays cheap; warm() does it ahead of traffic
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = create_backend()
+        return self._backend
+
+    @property
+    def use_mock(self) -> bool:
+        return isinstance(self.backend, MockBackend)
+
+    def warm(self):
+        self.backend.warm()
 
     async def generate_response(
         self,
         user_message: str,
         conversation_history: List[Dict[str, str]] = None,
-        subject: str = None
+        subject: str = None,
+        mode: Optional[str] = None,
+        reference_material: Optional[List[Dict[str, str]]] = None,
+        caller: Optional[LLMCaller] = None
     ) -> Dict[str, any]:
-        if self.use_mock:
-            logger.info(f"Generating MOCK AI response for message: '{user_message[:50]}...'")
-            return self._generate_mock_response(user_message, subject)
+        profile = resolve_profile(subject, mode)
+        if not settings.LLM_COALESCE_ENABLED or conversation_history:
+            return await self._generate_tracked(
+                user_message, conversation_history, profile, reference_material, caller
+            )
+        
+        # Without history the answer depends only on these, so identical concurrent prompts can share a call
+        key = (
+            " ".join(user_message.lower().split()),
+            subject,
+            self.model,
+            profile.key,
+            tuple(excerpt["content"] for excerpt in reference_material or ())
+        )
+        ai_response, shared = await self._in_flight.do(
+            key,
+            # The shared call is queued under whoever asked first
+            lambda: self._generate_tracked(user_message, None, profile, reference_material, caller)
+        )
+        if shared:
+            LLM_COALESCED.labels(model=self.model).inc()
+            logger.info(f"Coalesced AI request for message: '{user_message[:50]}...'")
+        return dict(ai_response)
+    
+    async def _generate_tracked(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        profile: GenerationProfile,
+        reference_material: Optional[List[Dict[str, str]]] = None,
+        caller: Optional[LLMCaller] = None
+    ) -> Dict[str, any]:
+        async with llm_scheduler.slot(caller):
+            with LLM_IN_FLIGHT.track_inprogress():
+                try:
+                    ai_response = await self._generate_response(
+                        user_message, conversation_history, profile, reference_material
+                    )
+                except Exception:
+                    LLM_ERRORS.labels(model=self.model).inc()
+                    raise
+        
+        LLM_LATENCY.labels(model=ai_response["model_used"]).observe(ai_response["response_time"] / 1000)
+        LLM_TOKENS.labels(model=ai_response["model_used"]).observe(ai_response["tokens_used"])
         
+        mode, subject = profile.mode.value, profile.subject or "none"
+        LLM_PROFILE_LATENCY.labels(mode=mode, subject=subject).observe(ai_response["response_time"] / 1000)
+        if ai_response.get("completion_tokens") is not None:
+            LLM_COMPLETION_TOKENS.labels(mode=mode, subject=subject).observe(ai_response["completion_tokens"])
+        return ai_response
+    
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]] = None,
+        profile: Optional[GenerationProfile] = None,
+        reference_material: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": self.system_prompt}]
+        
+        if profile and profile.instruction:
+            messages[0]["content"] += f"\n\n{profile.instruction}"
+        
+        if profile and profile.subject:
+            subject_context = f"\n\nCurrent subject context: {profile.subject.replace('_', ' ').title()}"
+            messages[0]["content"] += subject_context
+        
+        if reference_material:
+            excerpts = "\n\n".join(
+                f"[{index}] From \"{excerpt['title']}\":\n{excerpt['content']}"
+                for index, excerpt in enumerate(reference_material, start=1)
+            )
+            messages.append({
+                "role": "system",
+                "content": (
+                    "COURSE MATERIAL: Excerpts from the student's own course notes that may be relevant. "
+                    "Base your answer on them where they apply, refer to them by number, and say so "
+                    "if they do not cover the question.\n\n" + excerpts
+                )
+            })
+        
+        if conversation_history:
+            messages.extend(conversation_history)
+        
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    async def _generate_response(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        profile: GenerationProfile,
+        reference_material: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, any]:
         try:
-            start_time = time.time()
-            
-            messages = [{"role": "system", "content": self.system_prompt}]
-            
-            if subject:
-                subject_context = f"\n\nCurrent subject context: {subject.replace('_', ' ').title()}"
-                messages[0]["content"] += subject_context
-            
-            if conversation_history:
-                messages.extend(conversation_history)
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            logger.info(f"Generating AI response for message: '{user_message[:50]}...'")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+            messages = self._build_messages(
+                user_message, conversation_history, profile, reference_material
             )
             
-            response_time = int((time.time() - start_time) * 1000)
-            
-            assistant_message = response.choices[0].message.content
-            tokens_used = response.usage.total_tokens
+            logger.info(f"Generating AI response via {self.backend.name} for message: '{user_message[:50]}...'")
             
-            logger.info(f"AI response generated successfully. Tokens: {tokens_used}, Time: {response_time}ms")
+            try:
+                ai_response = await self.backend.complete(
+                    messages,
+                    model=self.model,
+                    max_tokens=profile.max_tokens,
+                    temperature=profile.temperature,
+                    stop=profile.stop
+                )
+            except asyncio.CancelledError:
+                # Closing the upstream request stops generation; the prompt was already paid for
+                LLM_CANCELLED.labels(model=self.model).inc()
+                LLM_CANCELLED_PROMPT_TOKENS.labels(model=self.model).inc(estimate_prompt_tokens(messages))
+                # Non-streaming calls do not say how far generation got, so only the budget is known
+                LLM_CANCELLED_COMPLETION_BUDGET.labels(model=self.model).inc(profile.max_tokens)
+                logger.info(f"AI response cancelled for message: '{user_message[:50]}...'")
+                raise
             
-            return {
-                "content": assistant_message,
-                "tokens_used": tokens_used,
-                "model_used": self.model,
-                "response_time": response_time
-            }
+            logger.info(
+                f"AI response generated successfully. Mode: {profile.mode.value}, "
+                f"Subject: {profile.subject or 'none'}, Tokens: {ai_response['tokens_used']}, "
+                f"Output tokens: {ai_response.get('completion_tokens')}, "
+                f"Time: {ai_response['response_time']}ms"
+            )
+            return ai_response
             
+        except LLMUnavailableError as e:
+            logger.error(f"Error generating AI response: {str(e)}")
+            raise
         except Exception as e:
             logger.error(f"Error generating AI response: {str(e)}")
             raise Exception(f"Failed to generate AI response: {str(e)}")
     
-    async def generate_session_title(self, first_message: str) -> str:
+    async def generate_session_title(self, first_message: str, caller: Optional[LLMCaller] = None) -> str:
         if self.use_mock:
             words = first_message.split()[:5]
             title = " ".join(words)
@@ -223,28 +312,36 @@ Remember: Every interaction is an opportunity to build confidence, deepen unders
             return title or "Study Session"
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Generate a short, descriptive title (max 6 words) for a study session based on the student's question. Only return the title, nothing else."
-                    },
-                    {
-                        "role": "user",
-                        "content": first_message
-                    }
-                ],
-                max_tokens=20,
-                temperature=0.7
-            )
+            async with llm_scheduler.slot(caller):
+                response = await self.backend.complete(
+                    [
+                        {
+                            "role": "system",
+                            "content": "Generate a short, descriptive title (max 6 words) for a study session based on the student's question. Only return the title, nothing else."
+                        },
+                        {
+                            "role": "user",
+                            "content": first_message
+                        }
+                    ],
+                    model="gpt-3.5-turbo",
+                    max_tokens=20,
+                    temperature=0.7
+                )
             
-            title = response.choices[0].message.content.strip()
+            title = response["content"].strip()
             return title[:100]
             
         except Exception as e:
             logger.error(f"Error generating session title: {str(e)}")
             return "Study Session"
+    
+    async def check_backend(self) -> bool:
+        try:
+            return await self.backend.check()
+        except Exception as e:
+            logger.warning(f"LLM backend check failed: {str(e)}")
+            return False
 
 
 # Create singleton instance
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import ARCHIVE_OPERATIONS
+from app.db.models import ArchivedSession, ChatMessage, ChatSession, MessageRole
+from app.db.session import SessionLocal
+from app.services.partition_service import partition_service
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveService:
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _compress(data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return zlib.compress(data, 9)
+
+    @staticmethod
+    def _decompress(payload: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            import zstandard
+
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return zlib.decompress(payload)
+
+    @staticmethod
+    def _serialize(message: ChatMessage) -> Dict[str, any]:
+        return {
+            "id": message.id,
+            "role": message.role.value,
+            "content": message.content,
+            "tokens_used": message.tokens_used,
+            "model_used": message.model_used,
+            "response_time": message.response_time,
+            "created_at": message.created_at.isoformat() if message.created_at else None
+        }
+
+    @staticmethod
+    def _deserialize(session_id: int, record: Dict[str, any]) -> ChatMessage:
+        return ChatMessage(
+            id=record["id"],
+            session_id=session_id,
+            role=MessageRole(record["role"]),
+            content=record["content"],
+            tokens_used=record["tokens_used"],
+            model_used=record["model_used"],
+            response_time=record["response_time"],
+            created_at=datetime.fromisoformat(record["created_at"]) if record["created_at"] else None
+        )
+
+    @staticmethod
+    def _records(archive: ArchivedSession) -> List[Dict[str, any]]:
+        return json.loads(ArchiveService._decompress(archive.payload, archive.codec))
+
+    @staticmethod
+    def load_messages(db: Session, session_id: int) -> List[ChatMessage]:
+        archive = db.get(ArchivedSession, session_id)
+        if archive is None:
+            return []
+        # Detached objects: callers read them like hot rows but they are never flushed
+        return [ArchiveService._deserialize(session_id, r) for r in ArchiveService._records(archive)]
+
+    @staticmethod
+    def _lock_session(db: Session, session_id: int) -> Optional[ChatSession]:
+        # Archiving (in every worker) and restoring (on the chat path) both take this row lock
+        # before reading messages or the archive, so neither sees the other half-done
+        return db.query(ChatSession).filter(
+            ChatSession.id == session_id
+        ).with_for_update().populate_existing().first()
+
+    @staticmethod
+    def archive_session(db: Session, session_id: int) -> bool:
+        session = ArchiveService._lock_session(db, session_id)
+        messages = partition_service.messages_query(db, session).order_by(
+            ChatMessage.created_at.asc(), ChatMessage.id.asc()
+        ).all() if session else []
+        if not messages:
+            db.rollback()
+            return False
+
+        archive = db.get(ArchivedSession, session_id, populate_existing=True)
+        records = ArchiveService._records(archive) if archive else []
+        records.extend(ArchiveService._serialize(m) for m in messages)
+        data = json.dumps(records, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        codec = settings.ARCHIVE_CODEC
+        payload = ArchiveService._compress(data, codec)
+
+        if archive is None:
+            archive = ArchivedSession(session_id=session_id)
+            db.add(archive)
+        archive.codec = codec
+        archive.payload = payload
+        archive.message_count = len(records)
+        archive.uncompressed_bytes = len(data)
+        archive.archived_at = datetime.utcnow()
+
+        # Only the rows read above are removed, so a message written meanwhile stays hot
+        db.query(ChatMessage).filter(
+            ChatMessage.id.in_([m.id for m in messages])
+        ).delete(synchronize_session=False)
+        db.commit()
+        ARCHIVE_OPERATIONS.labels(operation="archived").inc()
+        return True
+
+    @staticmethod
+    def restore_session(db: Session, session_id: int) -> int:
+        ArchiveService._lock_session(db, session_id)
+        archive = db.get(ArchivedSession, session_id, populate_existing=True)
+        if archive is None:
+            # Another request restored it first; end the transaction so the lock is not held across the LLM call
+            db.commit()
+            return 0
+
+        records = ArchiveService._records(archive)
+        # Original ids are kept so ordering and any references stay stable
+        for record in records:
+            db.add(ArchiveService._deserialize(session_id, record))
+        db.delete(archive)
+        db.commit()
+        ARCHIVE_OPERATIONS.labels(operation="restored").inc()
+        logger.info(f"Restored {len(records)} archived messages for session {session_id}")
+        return len(records)
+
+    @staticmethod
+    def _archive_candidates(db: Session, now: datetime) -> List[int]:
+        last_activity = func.coalesce(ChatSession.updated_at, ChatSession.created_at)
+        inactive_cutoff = now - timedelta(days=settings.ARCHIVE_INACTIVE_AFTER_DAYS)
+        idle_cutoff = now - timedelta(days=settings.ARCHIVE_IDLE_AFTER_DAYS)
+
+        rows = db.query(ChatSession.id).filter(
+            or_(
+                and_(ChatSession.is_active == False, last_activity < inactive_cutoff),
+                last_activity < idle_cutoff
+            ),
+            exists().where(ChatMessage.session_id == ChatSession.id)
+        ).limit(settings.ARCHIVE_BATCH_SIZE).all()
+        return [session_id for (session_id,) in rows]
+
+    @staticmethod
+    def _purge(db: Session, now: datetime) -> int:
+        if settings.ARCHIVE_PURGE_AFTER_DAYS is None:
+            return 0
+
+        # Only sessions the student deleted are ever purged; archived active sessions are kept
+        cutoff = now - timedelta(days=settings.ARCHIVE_PURGE_AFTER_DAYS)
+        session_ids = [
+            session_id for (session_id,) in db.query(ArchivedSession.session_id).join(
+                ChatSession, ChatSession.id == ArchivedSession.session_id
+            ).filter(
+                ChatSession.is_active == False,
+                ArchivedSession.archived_at < cutoff
+            ).limit(settings.ARCHIVE_BATCH_SIZE).all()
+        ]
+        if not session_ids:
+            return 0
+
+        db.query(ArchivedSession).filter(
+            ArchivedSession.session_id.in_(session_ids)
+        ).delete(synchronize_session=False)
+        db.query(ChatMessage).filter(
+            ChatMessage.session_id.in_(session_ids)
+        ).delete(synchronize_session=False)
+        db.query(ChatSession).filter(
+            ChatSession.id.in_(session_ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+        ARCHIVE_OPERATIONS.labels(operation="purged").inc(len(session_ids))
+        return len(session_ids)
+
+    @staticmethod
+    def run_once(db: Session) -> Dict[str, int]:
+        now = datetime.utcnow()
+        archived = 0
+        for session_id in ArchiveService._archive_candidates(db, now):
+            try:
+                archived += ArchiveService.archive_session(db, session_id)
+            except IntegrityError:
+                # Another worker archived the same session concurrently
+                db.rollback()
+        purged = ArchiveService._purge(db, now)
+
+        if archived or purged:
+            logger.info(f"Archival run: archived {archived} sessions, purged {purged}")
+        return {"archived": archived, "purged": purged}
+
+    @staticmethod
+    def _run_once_in_thread() -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            return ArchiveService.run_once(db)
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self._run_once_in_thread)
+            except Exception as e:
+                logger.error(f"Archival run failed: {str(e)}")
+
+    def start(self):
+        if settings.ARCHIVE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+archive_service = ArchiveService()
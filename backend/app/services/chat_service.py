@@ -1,15 +1,36 @@
-from typing import List, Optional
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 
+from app.core.config import settings
+from app.core.disconnect import CLIENT_CLOSED_REQUEST, ClientDisconnected, cancel_on_disconnect
+from app.core.metrics import CHAT_DISCONNECTS
+from app.core.tracing import span
 from app.db.models import ChatSession, ChatMessage, MessageRole, User, Subject
+from app.db.session import SessionLocal
 from app.schemas.chat import (
     ChatSessionCreate,
     ChatSessionUpdate,
     MessageCreate,
-    ChatResponse
+    MessageBatchCreate,
+    MessageResponse,
+    ChatResponse,
+    ChatBatchResponse
 )
 from app.services.ai_service import ai_service
+from app.services.archive_service import archive_service
+from app.services.llm_backends import LLMUnavailableError
+from app.services.llm_scheduler import LLMCaller, Priority, llm_scheduler
+from app.services.material_service import material_service
+from app.services.model_stats_service import model_stats_service
+from app.services.partition_service import partition_service
+from app.services.speculation_service import speculation_service
+from app.services.stats_service import stats_service
+
+logger = logging.getLogger(__name__)
 
 
 class ChatService:
@@ -29,6 +50,7 @@ class ChatService:
         )
         
         db.add(session)
+        stats_service.record_session(db, session)
         db.commit()
         db.refresh(session)
         return session
@@ -97,81 +119,374 @@ class ChatService:
         session.is_active = False
         db.commit()
     
+    @staticmethod
+    def _resolve_session(
+        db: Session,
+        user: User,
+        session_id: Optional[int],
+        subject: Optional[Subject]
+    ) -> ChatSession:
+        if session_id:
+            return ChatService.get_session(db, session_id, user)
+        
+        session_create = ChatSessionCreate(
+            title="New Study Session",
+            subject=subject or Subject.OTHER
+        )
+        return ChatService.create_session(db, user, session_create)
+    
+    @staticmethod
+    def _get_conversation_history(
+        db: Session,
+        session: ChatSession,
+        limit: int = 10
+    ) -> List[Dict[str, str]]:
+        previous_messages = partition_service.messages_query(db, session).order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit).all()
+        
+        return [
+            {"role": msg.role.value, "content": msg.content}
+            for msg in reversed(previous_messages)
+        ]
+    
+    @staticmethod
+    def _load_history(db: Session, session: ChatSession) -> List[Dict[str, str]]:
+        conversation_history = ChatService._get_conversation_history(db, session)
+        # Fewer hot messages than the session holds means it was archived; a new turn brings it back
+        if len(conversation_history) < min(10, session.message_count):
+            if archive_service.restore_session(db, session.id):
+                conversation_history = ChatService._get_conversation_history(db, session)
+        return conversation_history
+    
+    @staticmethod
+    def _build_assistant_message(session_id: int, ai_response: Dict[str, any]) -> ChatMessage:
+        return ChatMessage(
+            session_id=session_id,
+            role=MessageRole.ASSISTANT,
+            content=ai_response["content"],
+            tokens_used=ai_response["tokens_used"],
+            model_used=ai_response["model_used"],
+            response_time=ai_response["response_time"]
+        )
+    
+    @staticmethod
+    async def _maybe_generate_title(
+        session: ChatSession,
+        first_message: str,
+        caller: Optional[LLMCaller] = None
+    ):
+        if session.message_count == 0 and session.title == "New Study Session":
+            try:
+                session.title = await ai_service.generate_session_title(first_message, caller)
+            except Exception:
+                pass
+    
     @staticmethod
     async def send_message(
         db: Session,
         user: User,
-        message_data: MessageCreate
+        message_data: MessageCreate,
+        request: Optional[Request] = None
     ) -> ChatResponse:
-        if message_data.session_id:
-            session = ChatService.get_session(db, message_data.session_id, user)
-        else:
-            session_create = ChatSessionCreate(
-                title="New Study Session",
-                subject=message_data.subject or Subject.OTHER
+        caller = llm_scheduler.caller(user)
+        with span("chat.session"):
+            session = ChatService._resolve_session(
+                db, user, message_data.session_id, message_data.subject
             )
-            session = ChatService.create_session(db, user, session_create)
-        
-        user_message = ChatMessage(
-            session_id=session.id,
-            role=MessageRole.USER,
-            content=message_data.content
-        )
-        db.add(user_message)
-        db.flush()
+        with span("chat.history"):
+            conversation_history = ChatService._load_history(db, session)
+        with span("chat.retrieval") as retrieval_span:
+            reference_material = await material_service.retrieve(
+                db, user.id, session.subject, message_data.content
+            )
+            retrieval_span.set_attribute("retrieval.chunks", len(reference_material))
         
-        previous_messages = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session.id
-        ).order_by(ChatMessage.created_at.desc()).limit(10).all()
+        subject = session.subject.value if session.subject else None
         
-        conversation_history = []
-        for msg in reversed(previous_messages):
-            conversation_history.append({
-                "role": msg.role.value,
-                "content": msg.content
-            })
+        async def generate() -> Dict[str, any]:
+            # A follow-up the client was offered may already have been answered in the background
+            ai_response = await speculation_service.claim(
+                session.id, message_data.content, message_data.mode
+            )
+            llm_span.set_attribute("llm.speculative", ai_response is not None)
+            if ai_response is None:
+                ai_response = await ai_service.generate_response(
+                    user_message=message_data.content,
+                    conversation_history=conversation_history,
+                    subject=subject,
+                    mode=message_data.mode,
+                    reference_material=reference_material,
+                    caller=caller
+                )
+            return ai_response
         
         try:
-            ai_response = await ai_service.generate_response(
-                user_message=message_data.content,
-                conversation_history=conversation_history,
-                subject=session.subject.value if session.subject else None
+            with span("chat.llm") as llm_span:
+                # Nobody is left to read the answer once the client hangs up, so stop paying for it
+                ai_response = await cancel_on_disconnect(request, generate())
+                llm_span.set_attribute("llm.model", ai_response["model_used"])
+                llm_span.set_attribute("llm.tokens", ai_response["tokens_used"])
+        except ClientDisconnected:
+            logger.info(f"Client disconnected while waiting for an answer in session {session.id}")
+            db.rollback()
+            CHAT_DISCONNECTS.labels(endpoint="message").inc()
+            raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+        except LLMUnavailableError:
+            db.rollback()
+            model_stats_service.record_error(ai_service.model, session.subject)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The AI service is temporarily unavailable. Please try again shortly.",
+                headers={"Retry-After": "5"}
             )
         except Exception:
             db.rollback()
+            model_stats_service.record_error(ai_service.model, session.subject)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to generate AI response. Please try again."
             )
         
-        assistant_message = ChatMessage(
+        # Rows are only written once the completion is back, so no write
+        # transaction (or its locks) is held open across the LLM call
+        user_message = ChatMessage(
             session_id=session.id,
-            role=MessageRole.ASSISTANT,
-            content=ai_response["content"],
-            tokens_used=ai_response["tokens_used"],
-            model_used=ai_response["model_used"],
-            response_time=ai_response["response_time"]
+            role=MessageRole.USER,
+            content=message_data.content
         )
+        assistant_message = ChatService._build_assistant_message(session.id, ai_response)
+        db.add(user_message)
         db.add(assistant_message)
         
+        with span("chat.title"):
+            await ChatService._maybe_generate_title(session, message_data.content, caller)
         session.message_count += 2
+        stats_service.record_questions(db, session, 1, ai_response.get("tokens_used") or 0)
         
-        if session.message_count == 2 and session.title == "New Study Session":
-            try:
-                new_title = await ai_service.generate_session_title(message_data.content)
-                session.title = new_title
-            except Exception:
-                pass
+        with span("chat.commit"):
+            db.commit()
+            db.refresh(user_message)
+            db.refresh(assistant_message)
+        model_stats_service.record(
+            ai_response["model_used"], session.subject, ai_response["response_time"], ai_response["tokens_used"]
+        )
         
-        db.commit()
-        db.refresh(user_message)
-        db.refresh(assistant_message)
-        from app.schemas.chat import MessageResponse
+        follow_ups = speculation_service.suggest_follow_ups(subject)
+        if message_data.speculate and settings.SPECULATION_ENABLED:
+            speculation_service.schedule(
+                session.id,
+                follow_ups[0],
+                (conversation_history + [
+                    {"role": MessageRole.USER.value, "content": user_message.content},
+                    {"role": MessageRole.ASSISTANT.value, "content": assistant_message.content}
+                ])[-10:],
+                subject,
+                message_data.mode,
+                reference_material,
+                llm_scheduler.caller(user, Priority.BACKGROUND)
+            )
         return ChatResponse(
             session_id=session.id,
             user_message=MessageResponse.from_orm(user_message),
-            assistant_message=MessageResponse.from_orm(assistant_message)
+            assistant_message=MessageResponse.from_orm(assistant_message),
+            suggested_follow_ups=follow_ups
+        )
+    
+    @staticmethod
+    def _start_batch_generation(
+        prompts: List[str],
+        conversation_history: List[Dict[str, str]],
+        subject: Optional[str],
+        mode: Optional[str] = None,
+        caller: Optional[LLMCaller] = None
+    ) -> List[asyncio.Task]:
+        semaphore = asyncio.Semaphore(settings.CHAT_BATCH_CONCURRENCY)
+        
+        async def generate(index: int, prompt: str):
+            async with semaphore:
+                ai_response = await ai_service.generate_response(
+                    user_message=prompt,
+                    conversation_history=conversation_history,
+                    subject=subject,
+                    mode=mode,
+                    caller=caller
+                )
+            return index, ai_response
+        
+        return [
+            asyncio.create_task(generate(index, prompt))
+            for index, prompt in enumerate(prompts)
+        ]
+    
+    @staticmethod
+    async def _persist_batch(
+        db: Session,
+        session: ChatSession,
+        prompts: List[str],
+        ai_responses: List[Dict[str, any]],
+        caller: Optional[LLMCaller] = None
+    ) -> ChatBatchResponse:
+        pairs = []
+        for prompt, ai_response in zip(prompts, ai_responses):
+            user_message = ChatMessage(
+                session_id=session.id,
+                role=MessageRole.USER,
+                content=prompt
+            )
+            assistant_message = ChatService._build_assistant_message(session.id, ai_response)
+            db.add(user_message)
+            db.add(assistant_message)
+            pairs.append((user_message, assistant_message))
+        
+        await ChatService._maybe_generate_title(session, prompts[0], caller)
+        session.message_count += 2 * len(pairs)
+        stats_service.record_questions(
+            db, session, len(pairs), sum(r.get("tokens_used") or 0 for r in ai_responses)
+        )
+        
+        with span("chat.commit"):
+            db.flush()
+            message_ids = [message.id for pair in pairs for message in pair]
+            db.commit()
+            
+            # Reload every new row with a single query instead of one refresh per message
+            partition_service.messages_query(db, session).filter(ChatMessage.id.in_(message_ids)).all()
+        for ai_response in ai_responses:
+            model_stats_service.record(
+                ai_response["model_used"], session.subject, ai_response["response_time"], ai_response["tokens_used"]
+            )
+        
+        return ChatBatchResponse(
+            session_id=session.id,
+            results=[
+                ChatResponse(
+                    session_id=session.id,
+                    user_message=MessageResponse.from_orm(user_message),
+                    assistant_message=MessageResponse.from_orm(assistant_message)
+                )
+                for user_message, assistant_message in pairs
+            ]
+        )
+    
+    @staticmethod
+    async def send_message_batch(
+        db: Session,
+        user: User,
+        batch_data: MessageBatchCreate,
+        request: Optional[Request] = None
+    ) -> ChatBatchResponse:
+        session = ChatService._resolve_session(
+            db, user, batch_data.session_id, batch_data.subject
         )
+        conversation_history = ChatService._load_history(db, session)
+        speculation_service.discard(session.id)
+        caller = llm_scheduler.caller(user)
+        
+        tasks = ChatService._start_batch_generation(
+            batch_data.prompts,
+            conversation_history,
+            session.subject.value if session.subject else None,
+            batch_data.mode,
+            caller
+        )
+        try:
+            with span("chat.llm", batch_size=len(tasks)):
+                results = await cancel_on_disconnect(request, asyncio.gather(*tasks))
+        except ClientDisconnected:
+            for task in tasks:
+                task.cancel()
+            logger.info(f"Client disconnected during a batch of {len(tasks)} prompts in session {session.id}")
+            db.rollback()
+            CHAT_DISCONNECTS.labels(endpoint="message_batch").inc()
+            raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+        except LLMUnavailableError:
+            for task in tasks:
+                task.cancel()
+            db.rollback()
+            model_stats_service.record_error(ai_service.model, session.subject)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The AI service is temporarily unavailable. Please try again shortly.",
+                headers={"Retry-After": "5"}
+            )
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            db.rollback()
+            model_stats_service.record_error(ai_service.model, session.subject)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate AI response. Please try again."
+            )
+        
+        ai_responses = [ai_response for _, ai_response in sorted(results, key=lambda r: r[0])]
+        return await ChatService._persist_batch(db, session, batch_data.prompts, ai_responses, caller)
+    
+    @staticmethod
+    async def stream_message_batch(
+        db: Session,
+        user: User,
+        batch_data: MessageBatchCreate
+    ) -> AsyncIterator[str]:
+        session = ChatService._resolve_session(
+            db, user, batch_data.session_id, batch_data.subject
+        )
+        session_id = session.id
+        user_id = user.id
+        conversation_history = ChatService._load_history(db, session)
+        subject = session.subject.value if session.subject else None
+        session_subject = session.subject
+        speculation_service.discard(session_id)
+        caller = llm_scheduler.caller(user)
+        
+        async def events() -> AsyncIterator[str]:
+            tasks = ChatService._start_batch_generation(
+                batch_data.prompts, conversation_history, subject, batch_data.mode, caller
+            )
+            ai_responses = [None] * len(tasks)
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    index, ai_response = await next_done
+                    ai_responses[index] = ai_response
+                    yield json.dumps({"event": "result", "index": index, **ai_response}) + "\n"
+            except asyncio.CancelledError:
+                # Starlette cancels the stream when the client disconnects; nothing is persisted
+                CHAT_DISCONNECTS.labels(endpoint="message_batch_stream").inc()
+                logger.info(f"Client disconnected from a batch stream in session {session_id}")
+                raise
+            except Exception as e:
+                logger.error(f"Batch generation failed for session {session_id}: {str(e)}")
+                model_stats_service.record_error(ai_service.model, session_subject)
+                yield json.dumps({
+                    "event": "error",
+                    "detail": "Failed to generate AI response. Please try again."
+                }) + "\n"
+                return
+            finally:
+                for task in tasks:
+                    task.cancel()
+            
+            async def persist() -> ChatBatchResponse:
+                # The request-scoped session is closed once streaming starts, so persist with our own
+                stream_db = SessionLocal()
+                stream_db.info["user_id"] = user_id
+                try:
+                    stream_session = stream_db.get(ChatSession, session_id)
+                    return await ChatService._persist_batch(
+                        stream_db, stream_session, batch_data.prompts, ai_responses, caller
+                    )
+                finally:
+                    stream_db.close()
+            
+            try:
+                # Every answer is back and paid for, so it is saved even if the client leaves now
+                batch_response = await asyncio.shield(asyncio.ensure_future(persist()))
+            except asyncio.CancelledError:
+                CHAT_DISCONNECTS.labels(endpoint="message_batch_stream").inc()
+                logger.info(f"Client disconnected from a batch stream in session {session_id} while saving")
+                raise
+            yield json.dumps({"event": "complete", **batch_response.model_dump(mode="json")}) + "\n"
+        
+        return events()
     
     @staticmethod
     def get_session_messages(
@@ -183,9 +498,16 @@ class ChatService:
     ) -> List[ChatMessage]:
         session = ChatService.get_session(db, session_id, user)
         
-        messages = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.created_at.asc()).offset(skip).limit(limit).all()
+        messages = partition_service.messages_query(db, session).order_by(
+            ChatMessage.created_at.asc(), ChatMessage.id.asc()
+        ).offset(skip).limit(limit).all()
+        
+        # A short page means older messages may have been archived; only then is the archive read
+        if len(messages) < min(limit, session.message_count - skip):
+            archived = archive_service.load_messages(db, session_id)
+            if archived:
+                hot = partition_service.messages_query(db, session).order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).all()
+                messages = (archived + hot)[skip:skip + limit]
         
         return messages
 
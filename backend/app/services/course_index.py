@@ -0,0 +1,259 @@
+"""
+Course material index
+Uploaded notes are split into overlapping chunks and scored with BM25.
+Every document is written as its own immutable segment file, so indexing is
+incremental (an upload writes one segment, a delete removes one) and nothing
+is rebuilt. Segments are memory-mapped on first use: only the term dictionary
+is parsed, while postings and chunk text stay on disk until a query needs them
+
+Segment layout (little-endian):
+    magic b"SBIX0001" | uint32 header length | header JSON | postings | chunk text
+The header holds per-chunk (text offset, text length, token count) and, per
+term, its postings offset and document frequency. A posting is
+(uint32 chunk index, uint16 term frequency)
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"SBIX0001"
+POSTING = struct.Struct("<IH")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he her his i in is it its of on or "
+    "she that the their them they this to was we were what when where which who will with you".split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def chunk_text(text: str, chunk_words: int, overlap_words: int) -> List[str]:
+    # Paragraphs are packed into chunks of about chunk_words; oversized paragraphs are split on words
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    words: List[str] = []
+    boundaries = []
+    for paragraph in paragraphs:
+        paragraph_words = paragraph.split()
+        words.extend(paragraph_words)
+        boundaries.append(len(words))
+
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = min(start + chunk_words, len(words))
+        # Prefer to end on a paragraph boundary in the last third of the window
+        for boundary in boundaries:
+            if start + chunk_words * 2 // 3 <= boundary < end:
+                end = boundary
+        chunks.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+        start = max(end - overlap_words, start + 1)
+    return chunks
+
+
+def write_segment(path: str, chunks: List[str]):
+    encoded_chunks = [chunk.encode("utf-8") for chunk in chunks]
+    term_postings: Dict[str, List[Tuple[int, int]]] = {}
+    chunk_meta = []
+    text_offset = 0
+    for index, (chunk, encoded) in enumerate(zip(chunks, encoded_chunks)):
+        counts = Counter(tokenize(chunk))
+        for term, tf in counts.items():
+            term_postings.setdefault(term, []).append((index, min(tf, 0xFFFF)))
+        chunk_meta.append([text_offset, len(encoded), sum(counts.values())])
+        text_offset += len(encoded)
+
+    postings = bytearray()
+    terms = {}
+    for term in sorted(term_postings):
+        entries = term_postings[term]
+        terms[term] = [len(postings), len(entries)]
+        for chunk_index, tf in entries:
+            postings += POSTING.pack(chunk_index, tf)
+
+    header = json.dumps({
+        "chunks": chunk_meta,
+        "terms": terms,
+        "postings_length": len(postings),
+    }, separators=(",", ":")).encode("utf-8")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(postings)
+        for encoded in encoded_chunks:
+            f.write(encoded)
+    # Readers never see a half-written segment
+    os.replace(temporary, path)
+
+
+class Segment:
+    """A memory-mapped segment file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a course index segment")
+        (header_length,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._map[header_start:header_start + header_length])
+        self.chunks = header["chunks"]
+        self.terms = header["terms"]
+        self._postings_start = header_start + header_length
+        self._text_start = self._postings_start + header["postings_length"]
+        self.total_tokens = sum(meta[2] for meta in self.chunks)
+
+    def document_frequency(self, term: str) -> int:
+        entry = self.terms.get(term)
+        return entry[1] if entry else 0
+
+    def postings(self, term: str):
+        entry = self.terms.get(term)
+        if not entry:
+            return
+        offset, count = entry
+        start = self._postings_start + offset
+        for index in range(count):
+            yield POSTING.unpack_from(self._map, start + index * POSTING.size)
+
+    def chunk_text(self, index: int) -> str:
+        offset, length, _ = self.chunks[index]
+        start = self._text_start + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def close(self):
+        self._map.close()
+
+
+class CourseIndex:
+    """
+    Segments live under <root>/<user_id>/<subject>/<document_id>.seg
+    Opened segments are cached (LRU) per process and reopened if the file changes
+    """
+
+    def __init__(self, root: str, max_open_segments: int = 256):
+        self.root = root
+        self.max_open_segments = max_open_segments
+        self._open: "OrderedDict[str, Tuple[float, Segment]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def segment_path(self, user_id: int, subject: str, document_id: int) -> str:
+        return os.path.join(self.root, str(user_id), subject, f"{document_id}.seg")
+
+    def add_document(
+        self,
+        user_id: int,
+        subject: str,
+        document_id: int,
+        text: str,
+        chunk_words: int,
+        overlap_words: int
+    ) -> int:
+        chunks = chunk_text(text, chunk_words, overlap_words)
+        write_segment(self.segment_path(user_id, subject, document_id), chunks)
+        return len(chunks)
+
+    def remove_document(self, user_id: int, subject: str, document_id: int):
+        path = self.segment_path(user_id, subject, document_id)
+        with self._lock:
+            cached = self._open.pop(path, None)
+        if cached:
+            cached[1].close()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _segment(self, path: str) -> Optional[Segment]:
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._open.get(path)
+            if cached and cached[0] == mtime:
+                self._open.move_to_end(path)
+                return cached[1]
+        segment = Segment(path)
+        with self._lock:
+            self._open[path] = (mtime, segment)
+            self._open.move_to_end(path)
+            while len(self._open) > self.max_open_segments:
+                # Evicted maps are left to the garbage collector; a concurrent search may still hold one
+                self._open.popitem(last=False)
+        return segment
+
+    def _segments(self, user_id: int, subject: str) -> List[Tuple[int, Segment]]:
+        directory = os.path.join(self.root, str(user_id), subject)
+        try:
+            entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".seg")]
+        except FileNotFoundError:
+            return []
+        segments = []
+        for entry in entries:
+            segment = self._segment(entry.path)
+            if segment is not None:
+                segments.append((int(entry.name[:-4]), segment))
+        return segments
+
+    def search(self, user_id: int, subject: str, query: str, top_k: int, min_score: float = 0.0) -> List[Dict[str, any]]:
+        terms = set(tokenize(query))
+        segments = self._segments(user_id, subject)
+        if not terms or not segments:
+            return []
+
+        # BM25 statistics are collection-wide, so they are summed over all of the user's segments
+        chunk_count = sum(len(segment.chunks) for _, segment in segments)
+        average_length = sum(segment.total_tokens for _, segment in segments) / max(chunk_count, 1)
+        idf = {}
+        for term in terms:
+            df = sum(segment.document_frequency(term) for _, segment in segments)
+            if df:
+                idf[term] = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+        if not idf:
+            return []
+
+        scores: Dict[Tuple[int, int], float] = {}
+        for document_id, segment in segments:
+            for term, term_idf in idf.items():
+                for chunk_index, tf in segment.postings(term):
+                    length = segment.chunks[chunk_index][2]
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    key = (document_id, chunk_index)
+                    scores[key] = scores.get(key, 0.0) + term_idf * tf * (BM25_K1 + 1) / norm
+
+        by_document = dict(segments)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [
+            {
+                "document_id": document_id,
+                "chunk_index": chunk_index,
+                "score": round(score, 4),
+                "content": by_document[document_id].chunk_text(chunk_index),
+            }
+            for (document_id, chunk_index), score in best
+            if score >= min_score
+        ]
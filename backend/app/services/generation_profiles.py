@@ -0,0 +1,88 @@
+"""
+Generation profiles
+Completion parameters chosen per request from the response mode (brief,
+standard or deep) and the session subject, so short answers are not
+generated with the token budget and instructions meant for long ones
+"""
+
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.db.models import ResponseMode, Subject
+
+MODE_INSTRUCTIONS = {
+    ResponseMode.BRIEF: (
+        "RESPONSE LENGTH: The student asked for a brief answer. Reply in at most one short "
+        "paragraph or a few bullet points. Skip the full response structure, practice problems "
+        "and follow-up questions unless explicitly requested."
+    ),
+    ResponseMode.STANDARD: None,
+    ResponseMode.DEEP: (
+        "RESPONSE LENGTH: The student asked for an in-depth answer. Use the full response "
+        "structure, include worked examples, and cover edge cases and common misconceptions."
+    ),
+}
+
+# Brief answers end at the first section heading, i.e. before the long structured part begins
+BRIEF_STOP_SEQUENCES = ["\n\n## ", "\n\n### "]
+
+# Precise subjects get lower temperatures; subjects without a mode here use GENERATION_DEFAULT_MODE
+SUBJECT_PROFILES: Dict[Subject, Dict[str, any]] = {
+    Subject.MATHEMATICS: {"temperature": 0.2},
+    Subject.PHYSICS: {"temperature": 0.3},
+    Subject.CHEMISTRY: {"temperature": 0.3},
+    Subject.COMPUTER_SCIENCE: {"temperature": 0.2},
+    Subject.ECONOMICS: {"temperature": 0.4},
+    Subject.HISTORY: {"temperature": 0.6},
+    Subject.LITERATURE: {"temperature": 0.7},
+    Subject.LANGUAGE: {"temperature": 0.5, "mode": ResponseMode.BRIEF},
+}
+
+
+class GenerationProfile:
+    """Completion parameters for one request"""
+
+    __slots__ = ("mode", "subject", "max_tokens", "temperature", "stop", "instruction")
+
+    def __init__(
+        self,
+        mode: ResponseMode,
+        subject: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        stop: Optional[List[str]],
+        instruction: Optional[str]
+    ):
+        self.mode = mode
+        self.subject = subject
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.stop = stop
+        self.instruction = instruction
+
+    @property
+    def key(self) -> tuple:
+        return (self.mode.value, self.max_tokens, self.temperature, tuple(self.stop or ()), self.instruction)
+
+
+def resolve_profile(subject: Optional[str], mode: Optional[str] = None) -> GenerationProfile:
+    try:
+        subject_overrides = SUBJECT_PROFILES.get(Subject(subject), {}) if subject else {}
+    except ValueError:
+        subject_overrides = {}
+
+    mode = ResponseMode(mode or subject_overrides.get("mode") or settings.GENERATION_DEFAULT_MODE)
+    max_tokens = {
+        ResponseMode.BRIEF: settings.GENERATION_BRIEF_MAX_TOKENS,
+        ResponseMode.STANDARD: settings.OPENAI_MAX_TOKENS,
+        ResponseMode.DEEP: settings.GENERATION_DEEP_MAX_TOKENS,
+    }[mode]
+
+    return GenerationProfile(
+        mode=mode,
+        subject=subject,
+        max_tokens=max_tokens,
+        temperature=subject_overrides.get("temperature", settings.OPENAI_TEMPERATURE),
+        stop=BRIEF_STOP_SEQUENCES if mode == ResponseMode.BRIEF else None,
+        instruction=MODE_INSTRUCTIONS[mode]
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+from app.services.ai_service import ai_service
+
+logger = logging.getLogger(__name__)
+
+
+class HealthService:
+    
+    def __init__(self):
+        self.database_ready = False
+        self.llm_ready: Optional[bool] = None
+        self.last_checked_at: Optional[datetime] = None
+        self._last_checked_monotonic: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def _ping_database():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    
+    async def check_database(self) -> bool:
+        try:
+            await asyncio.to_thread(self._ping_database)
+            return True
+        except Exception as e:
+            logger.error(f"Database readiness check failed: {str(e)}")
+            return False
+    
+    async def refresh(self, check_llm: bool = False):
+        self.database_ready = await self.check_database()
+        if check_llm:
+            self.llm_ready = await ai_service.check_backend()
+        self.last_checked_at = datetime.now(timezone.utc)
+        self._last_checked_monotonic = time.monotonic()
+    
+    @property
+    def is_stale(self) -> bool:
+        if self._last_checked_monotonic is None:
+            return True
+        max_age = 3 * settings.READINESS_CHECK_INTERVAL_SECONDS
+        return time.monotonic() - self._last_checked_monotonic > max_age
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.database_ready and self.llm_ready is not False and not self.is_stale
+    
+    def snapshot(self) -> Dict[str, any]:
+        return {
+            "status": "ready" if self.is_ready else "not_ready",
+            "database": {"connected": self.database_ready},
+            "llm": {"available": self.llm_ready},
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+        }
+    
+    async def _run(self):
+        next_llm_check = time.monotonic() + settings.READINESS_LLM_CHECK_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(settings.READINESS_CHECK_INTERVAL_SECONDS)
+            check_llm = (
+                settings.READINESS_LLM_CHECK_ENABLED and time.monotonic() >= next_llm_check
+            )
+            if check_llm:
+                next_llm_check = time.monotonic() + settings.READINESS_LLM_CHECK_INTERVAL_SECONDS
+            try:
+                await self.refresh(check_llm=check_llm)
+            except Exception as e:
+                logger.error(f"Readiness refresh failed: {str(e)}")
+    
+    async def start(self):
+        await self.refresh(check_llm=settings.READINESS_LLM_CHECK_ENABLED)
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+health_service = HealthService()
@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.db.models import IdempotencyKey, IdempotencyStatus, User
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyService:
+
+    def __init__(self):
+        # Requests running in this process, so local duplicates wait without polling the database
+        self._running: Dict[Tuple[int, str, str], asyncio.Event] = {}
+
+    @staticmethod
+    def _request_hash(payload: Dict[str, any]) -> str:
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    @staticmethod
+    def _replay(record: IdempotencyKey) -> JSONResponse:
+        return JSONResponse(
+            content=json.loads(record.response_body),
+            status_code=record.status_code,
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    @staticmethod
+    def _claim(
+        db: Session,
+        user_id: int,
+        endpoint: str,
+        key: str,
+        request_hash: str
+    ) -> Optional[IdempotencyKey]:
+        now = datetime.utcnow()
+
+        # Drop this user's expired keys and any abandoned claim on this key before claiming
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.expires_at < now
+        ).delete(synchronize_session=False)
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.endpoint == endpoint,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+            IdempotencyKey.locked_until < now
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        record = IdempotencyKey(
+            user_id=user_id,
+            endpoint=endpoint,
+            key=key,
+            request_hash=request_hash,
+            status=IdempotencyStatus.IN_PROGRESS,
+            locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS),
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+        )
+        db.add(record)
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+
+        existing = IdempotencyService._get(db, user_id, endpoint, key)
+        if existing is not None and existing.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        return existing
+
+    @staticmethod
+    def _get(db: Session, user_id: int, endpoint: str, key: str) -> Optional[IdempotencyKey]:
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.endpoint == endpoint,
+            IdempotencyKey.key == key
+        ).populate_existing().first()
+
+    async def _wait_for_original(
+        self,
+        db: Session,
+        running_key: Tuple[int, str, str]
+    ) -> Optional[IdempotencyKey]:
+        user_id, endpoint, key = running_key
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS
+
+        while time.monotonic() < deadline:
+            local = self._running.get(running_key)
+            if local is not None:
+                try:
+                    await asyncio.wait_for(local.wait(), timeout=deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+            else:
+                await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+            db.rollback()  # end the read transaction so the next query sees other commits
+            record = self._get(db, user_id, endpoint, key)
+            if record is None or record.status == IdempotencyStatus.COMPLETED:
+                return record
+
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": "1"}
+        )
+
+    async def run(
+        self,
+        db: Session,
+        user: User,
+        endpoint: str,
+        key: Optional[str],
+        payload: Dict[str, any],
+        handler: Callable[[], Awaitable[BaseModel]],
+        status_code: int = status.HTTP_200_OK
+    ):
+        if not key:
+            return await handler()
+
+        user_id = user.id
+        request_hash = self._request_hash(payload)
+        running_key = (user_id, endpoint, key)
+
+        # A second pass happens only when the original failed and released the key
+        for _ in range(2):
+            existing = self._claim(db, user_id, endpoint, key, request_hash)
+
+            if existing is None:
+                record_cache_lookup("idempotency", hit=False)
+                done = asyncio.Event()
+                self._running[running_key] = done
+                try:
+                    response = await handler()
+                except BaseException:
+                    self._release(db, user_id, endpoint, key)
+                    raise
+                finally:
+                    self._running.pop(running_key, None)
+                    done.set()
+
+                self._complete(db, user_id, endpoint, key, status_code, response)
+                return response
+
+            if existing.status != IdempotencyStatus.COMPLETED:
+                existing = await self._wait_for_original(db, running_key)
+            if existing is not None:
+                record_cache_lookup("idempotency", hit=True)
+                return self._replay(existing)
+
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": "1"}
+        )
+
+    @staticmethod
+    def _complete(
+        db: Session,
+        user_id: int,
+        endpoint: str,
+        key: str,
+        status_code: int,
+        response: BaseModel
+    ):
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.endpoint == endpoint,
+            IdempotencyKey.key == key
+        ).update({
+            "status": IdempotencyStatus.COMPLETED,
+            "status_code": status_code,
+            "response_body": response.model_dump_json()
+        }, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def _release(db: Session, user_id: int, endpoint: str, key: str):
+        try:
+            db.rollback()
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.endpoint == endpoint,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to release idempotency key for user {user_id}: {str(e)}")
+
+
+idempotency_service = IdempotencyService()
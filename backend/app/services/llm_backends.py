@@ -0,0 +1,337 @@
+"""
+LLM backends
+Pluggable completion providers used by AIService. Every backend takes an
+OpenAI-style message list and returns the completion with token usage,
+either in one piece (complete) or incrementally (stream)
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text with the OpenAI tokenizers
+    return max(1, round(len(text) / 4)) if text else 0
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    # Each chat message carries a few tokens of framing on top of its content
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages) + 3
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no provider could produce a completion"""
+
+
+class LLMBackend:
+    """
+    Base class for completion providers
+    complete() returns a result dict; stream() yields delta events and ends with a done event
+    """
+
+    name = "base"
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        stop: Optional[List[str]] = None
+    ) -> Dict[str, any]:
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        max_tokens: int,
+        temperature: float,
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, any]]:
+        result = await self.complete(messages, model, max_tokens, temperature, stop)
+        yield {"type": "delta", "content": result["content"]}
+        yield {"type": "done", **result}
+
+    async def check(self) -> bool:
+        return True
+
+    def warm(self):
+        """Build clients and load heavy imports ahead of the first request"""
+
+
+class OpenAIBackend(LLMBackend):
+    """Any OpenAI-compatible chat completions endpoint"""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ):
+        self._client_options = {"api_key": api_key, "base_url": base_url, "timeout": timeout}
+        if max_retries is not None:
+            self._client_options["max_retries"] = max_retries
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Importing openai takes a large share of startup time, so it happens on first use or in warm()
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import AsyncOpenAI
+
+                    self._client = AsyncOpenAI(**self._client_options)
+        return self._client
+
+    def warm(self):
+        self.client
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stop=stop
+        )
+        usage = response.usage
+        return {
+            "content": response.choices[0].message.content,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "tokens_used": usage.total_tokens,
+            "model_used": model,
+            "response_time": int((time.perf_counter() - start_time) * 1000)
+        }
+
+    async def stream(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stop=stop,
+            stream=True
+        )
+        parts = []
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield {"type": "delta", "content": delta}
+
+        # Streamed responses carry no usage block in this API version, so estimate it
+        content = "".join(parts)
+        prompt_tokens = estimate_prompt_tokens(messages)
+        completion_tokens = estimate_tokens(content)
+        yield {
+            "type": "done",
+            "content": content,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_used": prompt_tokens + completion_tokens,
+            "model_used": model,
+            "response_time": int((time.perf_counter() - start_time) * 1000)
+        }
+
+    async def check(self) -> bool:
+        await self.client.models.retrieve(settings.OPENAI_MODEL, timeout=5.0)
+        return True
+
+
+class FixedLatency:
+
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+
+    def sample(self, rng: random.Random) -> float:
+        return self.latency_ms
+
+
+class LognormalLatency:
+    """Lognormal distribution parameterised by its median, which matches observed LLM latencies well"""
+
+    def __init__(self, median_ms: float, sigma: float):
+        self.mu = math.log(max(median_ms, 1e-3))
+        self.sigma = sigma
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(self.mu, self.sigma)
+
+
+class TraceLatency:
+    """
+    Replays latencies from a trace file in order, cycling at the end
+    Accepts one number per line or JSON lines with a response_time field (milliseconds)
+    """
+
+    def __init__(self, path: str):
+        self.samples = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("{"):
+                    self.samples.append(float(json.loads(line)["response_time"]))
+                else:
+                    self.samples.append(float(line))
+        if not self.samples:
+            raise ValueError(f"Latency trace {path} is empty")
+        self._position = 0
+
+    def sample(self, rng: random.Random) -> float:
+        value = self.samples[self._position % len(self.samples)]
+        self._position += 1
+        return value
+
+
+def build_latency_profile():
+    profile = settings.MOCK_LLM_LATENCY_PROFILE
+    if profile == "lognormal":
+        return LognormalLatency(settings.MOCK_LLM_LATENCY_MS, settings.MOCK_LLM_LATENCY_SIGMA)
+    if profile == "trace":
+        return TraceLatency(settings.MOCK_LLM_LATENCY_TRACE_PATH)
+    return FixedLatency(settings.MOCK_LLM_LATENCY_MS)
+
+
+MOCK_RESPONSES = [
+    "Great question! Let me explain this concept step by step:\n\n1. First, we need to understand the basic principles\n2. Then, we can apply them to solve the problem\n3. Finally, let's look at some practical examples\n\nDoes this help clarify things?",
+
+    "That's an interesting topic! Here's a simplified explanation:\n\nThe key concept is that everything connects to a fundamental principle. Think of it like building blocks - each piece fits together to form the complete picture.\n\nWould you like me to elaborate on any specific part?",
+
+    "Excellent question for exam preparation! Here's what you need to know:\n\n**Main Points:**\n- Point 1: The foundational concept\n- Point 2: How it applies in practice\n- Point 3: Common mistakes to avoid\n\n**Example:** Imagine you have a real-world scenario...\n\nLet me know if you need more details!",
+
+    "I'd be happy to help you understand this! Let me break it down:\n\n### Overview\nThis concept is fundamental to understanding the larger topic.\n\n### Key Details\n- It involves several interconnected ideas\n- Each part builds on the previous one\n- Practice is essential for mastery\n\n### Tips for Studying\n1. Review the basics first\n2. Work through examples\n3. Test yourself regularly\n\nWhat specific aspect would you like to explore further?",
+]
+
+
+class MockBackend(LLMBackend):
+    """
+    Deterministic offline backend
+    The same seed and prompt always produce the same answer; delays never block the event loop
+    """
+
+    name = "mock"
+
+    def __init__(self, seed: int = 0, latency_profile=None):
+        self.seed = seed
+        self.latency_profile = latency_profile or FixedLatency(0.0)
+        self._latency_rng = random.Random(seed)
+
+    def _answer(self, messages: List[Dict[str, str]], max_tokens: int, stop: Optional[List[str]] = None) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        rng = random.Random(f"{self.seed}:{prompt}")
+        content = rng.choice(MOCK_RESPONSES)
+
+        subject_marker = "Current subject context: "
+        system_prompt = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        if subject_marker in system_prompt:
+            subject_name = system_prompt.rsplit(subject_marker, 1)[1].strip()
+            content = f"**{subject_name} Study Topic**\n\n" + content
+
+        for sequence in stop or []:
+            if sequence in content:
+                content = content[:content.index(sequence)]
+
+        max_chars = max_tokens * 4
+        return content if len(content) <= max_chars else content[:max_chars]
+
+    def _result(self, messages, model, content, elapsed_ms) -> Dict[str, any]:
+        prompt_tokens = estimate_prompt_tokens(messages)
+        completion_tokens = estimate_tokens(content)
+        return {
+            "content": content,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_used": prompt_tokens + completion_tokens,
+            "model_used": f"mock-{model}",
+            "response_time": elapsed_ms
+        }
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        latency_ms = self.latency_profile.sample(self._latency_rng)
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+        content = self._answer(messages, max_tokens, stop)
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        return self._result(messages, model, content, elapsed_ms)
+
+    async def stream(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        latency_ms = self.latency_profile.sample(self._latency_rng)
+        content = self._answer(messages, max_tokens, stop)
+        words = content.split(" ")
+        delay = latency_ms / 1000 / len(words)
+        for index, word in enumerate(words):
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield {"type": "delta", "content": word if index == 0 else " " + word}
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        yield {"type": "done", **self._result(messages, model, content, elapsed_ms)}
+
+
+def _openai_key_is_placeholder() -> bool:
+    key = settings.OPENAI_API_KEY
+    return (
+        not key or
+        key.endswith("here") or
+        key == "your-api-key" or
+        "mock" in key.lower()
+    )
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    name = name or settings.LLM_BACKEND
+    if name == "auto":
+        if settings.LLM_PROVIDERS:
+            name = "routed"
+        else:
+            name = "mock" if _openai_key_is_placeholder() else "openai"
+
+    if name == "mock":
+        logger.warning("Using MOCK AI responses (OpenAI not configured)")
+        backend = MockBackend(seed=settings.MOCK_LLM_SEED, latency_profile=build_latency_profile())
+    elif name == "openai":
+        backend = OpenAIBackend(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
+    elif name == "routed":
+        from app.services.llm_routing import RoutingBackend, build_providers
+
+        providers = build_providers(settings.LLM_PROVIDERS or "[]")
+        logger.info(f"Routing LLM requests across providers: {', '.join(p.name for p in providers)}")
+        backend = RoutingBackend(providers, hedge_delay_ms=settings.LLM_HEDGE_DELAY_MS)
+    elif name == "replay":
+        from app.services.llm_recording import ReplayBackend
+
+        logger.warning(f"Replaying recorded LLM traffic from {settings.LLM_REPLAY_PATH}")
+        backend = ReplayBackend(settings.LLM_REPLAY_PATH, speed=settings.LLM_REPLAY_SPEED)
+    else:
+        raise ValueError(f"Unknown LLM backend: {name}")
+
+    if settings.LLM_RECORD_PATH:
+        from app.services.llm_recording import RecordingBackend
+
+        logger.warning(f"Recording LLM traffic to {settings.LLM_RECORD_PATH}")
+        backend = RecordingBackend(backend, settings.LLM_RECORD_PATH, settings.LLM_RECORD_REDACTION)
+    return backend
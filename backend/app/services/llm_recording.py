@@ -0,0 +1,185 @@
+"""
+LLM traffic recording and replay
+RecordingBackend wraps any backend and appends each request/response pair,
+with timings and token usage, to a JSON lines file. ReplayBackend serves a
+recording back with the original timings, so context building, caching and
+streaming can be regression-tested offline
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.core.appender import LineAppender
+from app.services.llm_backends import LLMBackend
+
+logger = logging.getLogger(__name__)
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+URL_PATTERN = re.compile(r"https?://\S+")
+
+
+def fingerprint(messages: List[Dict[str, str]], model: str, max_tokens: int, temperature: float, stop=None) -> str:
+    payload = json.dumps(
+        {"messages": messages, "model": model, "max_tokens": max_tokens, "temperature": temperature, "stop": stop},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def redact(text: str, mode: str) -> str:
+    if not text or mode == "none":
+        return text
+    if mode == "full":
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        return f"[redacted {len(text)} chars {digest}]"
+    text = EMAIL_PATTERN.sub("[email]", text)
+    text = URL_PATTERN.sub("[url]", text)
+    return PHONE_PATTERN.sub("[phone]", text)
+
+
+class RecordingBackend(LLMBackend):
+    """Passes calls through to another backend and records them"""
+
+    def __init__(self, inner: LLMBackend, path: str, redaction: str = "pii"):
+        self.inner = inner
+        self.name = inner.name
+        self.path = path
+        self.redaction = redaction
+        self._appender = LineAppender(path)
+
+    def _write(self, record: Dict[str, any]):
+        # Serialized here, written to disk by a background thread off the completion path
+        self._appender.append(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _record(self, messages, model, max_tokens, temperature, stop, result, timing, chunks=None):
+        try:
+            self._write({
+                "fingerprint": fingerprint(messages, model, max_tokens, temperature, stop),
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "backend": self.inner.name,
+                "model": model,
+                "params": {"max_tokens": max_tokens, "temperature": temperature, "stop": stop},
+                "messages": [
+                    {"role": m["role"], "content": redact(m.get("content") or "", self.redaction)}
+                    for m in messages
+                ],
+                "response": {
+                    "content": redact(result["content"], self.redaction),
+                    "prompt_tokens": result.get("prompt_tokens"),
+                    "completion_tokens": result.get("completion_tokens"),
+                    "tokens_used": result["tokens_used"],
+                    "model_used": result["model_used"],
+                },
+                "timing": timing,
+                "chunks": chunks,
+            })
+        except Exception as e:
+            logger.error(f"Failed to record LLM call: {str(e)}")
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        result = await self.inner.complete(messages, model, max_tokens, temperature, stop)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        self._record(messages, model, max_tokens, temperature, stop, result, {"response_ms": round(elapsed_ms, 1)})
+        return result
+
+    async def stream(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        chunks = []
+        async for event in self.inner.stream(messages, model, max_tokens, temperature, stop):
+            offset_ms = round((time.perf_counter() - start_time) * 1000, 1)
+            if event["type"] == "delta":
+                chunks.append({"offset_ms": offset_ms, "content": redact(event["content"], self.redaction)})
+            else:
+                timing = {
+                    "response_ms": offset_ms,
+                    "first_token_ms": chunks[0]["offset_ms"] if chunks else None,
+                }
+                self._record(messages, model, max_tokens, temperature, stop, event, timing, chunks)
+            yield event
+
+    async def check(self) -> bool:
+        return await self.inner.check()
+
+    def warm(self):
+        self.inner.warm()
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Serves recorded responses with their original timings
+    Requests are matched by fingerprint; unmatched requests take recordings in file order
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.speed = speed
+        self._records = []
+        self._by_fingerprint = defaultdict(deque)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records.append(record)
+                    self._by_fingerprint[record["fingerprint"]].append(record)
+        if not self._records:
+            raise ValueError(f"LLM recording {path} is empty")
+        self._position = 0
+
+    def _next_record(self, messages, model, max_tokens, temperature, stop) -> Dict[str, any]:
+        matches = self._by_fingerprint.get(fingerprint(messages, model, max_tokens, temperature, stop))
+        if matches:
+            record = matches[0]
+            matches.rotate(-1)
+            return record
+        record = self._records[self._position % len(self._records)]
+        self._position += 1
+        return record
+
+    async def _sleep_until(self, start_time: float, offset_ms: Optional[float]):
+        if not offset_ms or self.speed <= 0:
+            return
+        # speed 2 replays twice as fast as recorded
+        remaining = start_time + offset_ms / self.speed / 1000 - time.perf_counter()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def _result(self, record: Dict[str, any], start_time: float) -> Dict[str, any]:
+        response = record["response"]
+        return {
+            "content": response["content"],
+            "prompt_tokens": response.get("prompt_tokens"),
+            "completion_tokens": response.get("completion_tokens"),
+            "tokens_used": response["tokens_used"],
+            "model_used": response["model_used"],
+            "response_time": int((time.perf_counter() - start_time) * 1000),
+        }
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        record = self._next_record(messages, model, max_tokens, temperature, stop)
+        await self._sleep_until(start_time, record["timing"].get("response_ms"))
+        return self._result(record, start_time)
+
+    async def stream(self, messages, model, max_tokens, temperature, stop=None):
+        start_time = time.perf_counter()
+        record = self._next_record(messages, model, max_tokens, temperature, stop)
+        chunks = record.get("chunks")
+        if not chunks:
+            # Recorded without streaming: release the whole answer at the original latency
+            chunks = [{"offset_ms": record["timing"].get("response_ms"), "content": record["response"]["content"]}]
+        for chunk in chunks:
+            await self._sleep_until(start_time, chunk["offset_ms"])
+            yield {"type": "delta", "content": chunk["content"]}
+        await self._sleep_until(start_time, record["timing"].get("response_ms"))
+        yield {"type": "done", **self._result(record, start_time)}
@@ -0,0 +1,218 @@
+"""
+Multi-provider LLM routing
+RoutingBackend spreads completions over an ordered list of OpenAI-compatible
+endpoints (hosted APIs, or a local llama.cpp / vLLM server as the last
+resort). Providers are ranked by observed latency and weight; a provider that
+keeps failing is skipped for a cool-down period. A request that has not
+streamed its first token within the hedge delay is also sent to the next
+provider, and the first to respond wins
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import LLM_HEDGES, LLM_PROVIDER_REQUESTS
+from app.services.llm_backends import LLMBackend, LLMUnavailableError, OpenAIBackend
+
+logger = logging.getLogger(__name__)
+
+
+class Provider:
+    """One upstream endpoint plus its rolling health"""
+
+    EWMA_ALPHA = 0.3
+
+    def __init__(self, name: str, backend: LLMBackend, model: Optional[str] = None, weight: float = 1.0):
+        self.name = name
+        self.backend = backend
+        self.model = model
+        self.weight = max(weight, 1e-3)
+        self.latency_ms: Optional[float] = None
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    @property
+    def score(self) -> float:
+        # Lower is better; unmeasured providers are assumed to answer within the hedge delay
+        latency = self.latency_ms if self.latency_ms is not None else settings.LLM_HEDGE_DELAY_MS
+        return latency * (1 + self.consecutive_failures) / self.weight
+
+    def observe_latency(self, elapsed_ms: float):
+        if self.latency_ms is None:
+            self.latency_ms = elapsed_ms
+        else:
+            self.latency_ms += self.EWMA_ALPHA * (elapsed_ms - self.latency_ms)
+
+    def observe_lower_bound(self, elapsed_ms: float):
+        # A losing attempt only shows the answer would have taken at least this long
+        if self.latency_ms is None or elapsed_ms > self.latency_ms:
+            self.latency_ms = elapsed_ms
+
+    def record_success(self, elapsed_ms: float):
+        self.observe_latency(elapsed_ms)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= settings.LLM_CIRCUIT_FAILURE_THRESHOLD:
+            self.open_until = time.monotonic() + settings.LLM_CIRCUIT_OPEN_SECONDS
+            logger.warning(
+                f"LLM provider {self.name} failed {self.consecutive_failures} times in a row; "
+                f"skipping it for {settings.LLM_CIRCUIT_OPEN_SECONDS}s"
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "available": self.available,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class RoutingBackend(LLMBackend):
+    """Health-weighted routing with hedging and failover across providers"""
+
+    name = "routed"
+
+    def __init__(self, providers: List[Provider], hedge_delay_ms: float = 0.0):
+        if not providers:
+            raise ValueError("RoutingBackend needs at least one provider")
+        self.providers = providers
+        self.hedge_delay_ms = hedge_delay_ms
+
+    def _ranked(self) -> List[Provider]:
+        # Open circuits go last rather than being dropped, so a full outage still gets probed
+        order = {id(provider): index for index, provider in enumerate(self.providers)}
+        return sorted(
+            self.providers,
+            key=lambda p: (not p.available, p.score, order[id(p)])
+        )
+
+    async def _race(self, attempt: Callable[[Provider], Awaitable[Any]]) -> Any:
+        candidates = self._ranked()
+        running: Dict[asyncio.Task, tuple] = {}
+        errors = []
+        won = False
+
+        def launch(hedged: bool):
+            provider = candidates.pop(0)
+            if hedged:
+                LLM_HEDGES.labels(provider=provider.name).inc()
+                logger.info(f"Hedging LLM request to provider {provider.name}")
+            task = asyncio.create_task(attempt(provider))
+            running[task] = (provider, time.perf_counter())
+
+        launch(hedged=False)
+        try:
+            while running:
+                timeout = self.hedge_delay_ms / 1000 if self.hedge_delay_ms > 0 and candidates else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(hedged=True)
+                    continue
+
+                for task in done:
+                    provider, started = running.pop(task)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    if task.exception() is None:
+                        provider.record_success(elapsed_ms)
+                        LLM_PROVIDER_REQUESTS.labels(provider=provider.name, outcome="success").inc()
+                        won = True
+                        return task.result()
+                    provider.record_failure()
+                    LLM_PROVIDER_REQUESTS.labels(provider=provider.name, outcome="failure").inc()
+                    errors.append(f"{provider.name}: {task.exception()}")
+                    logger.warning(f"LLM provider {provider.name} failed: {task.exception()}")
+
+                if not running and candidates:
+                    launch(hedged=False)
+        finally:
+            for task, (provider, started) in running.items():
+                task.cancel()
+                # When the caller went away (e.g. client disconnect) the durations say nothing about the provider
+                if won:
+                    provider.observe_lower_bound((time.perf_counter() - started) * 1000)
+                    LLM_PROVIDER_REQUESTS.labels(provider=provider.name, outcome="cancelled").inc()
+
+        raise LLMUnavailableError(f"All LLM providers failed: {'; '.join(errors)}")
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        # Raced on the first token like stream(): most answers take longer than the hedge
+        # delay, so racing whole completions would send nearly every request twice
+        result = None
+        async for event in self.stream(messages, model, max_tokens, temperature, stop):
+            if event["type"] == "done":
+                result = {key: value for key, value in event.items() if key != "type"}
+        if result is None:
+            raise LLMUnavailableError("LLM stream ended without a result")
+        return result
+
+    async def stream(self, messages, model, max_tokens, temperature, stop=None):
+        # Providers race to the first event; after that the winner's stream is followed to the end
+        async def attempt(provider: Provider):
+            events = provider.backend.stream(
+                messages, provider.model or model, max_tokens, temperature, stop
+            ).__aiter__()
+            try:
+                first = await events.__anext__()
+            except BaseException:
+                await events.aclose()
+                raise
+            return events, first
+
+        events, first = await self._race(attempt)
+        try:
+            yield first
+            async for event in events:
+                yield event
+        finally:
+            await events.aclose()
+
+    async def check(self) -> bool:
+        results = await asyncio.gather(
+            *(provider.backend.check() for provider in self.providers),
+            return_exceptions=True
+        )
+        return any(result is True for result in results)
+
+    def warm(self):
+        for provider in self.providers:
+            provider.backend.warm()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [provider.snapshot() for provider in self.providers]
+
+
+def build_providers(config_json: str) -> List[Provider]:
+    """
+    Parse LLM_PROVIDERS, a JSON list of endpoints in order of preference:
+    [{"name": "openai", "base_url": null, "api_key": "sk-...", "model": "gpt-4.1-nano"},
+     {"name": "local", "base_url": "http://localhost:8080/v1", "model": "llama-3.1-8b", "weight": 0.5}]
+    api_key defaults to OPENAI_API_KEY and model to OPENAI_MODEL
+    """
+    providers = []
+    for index, entry in enumerate(json.loads(config_json)):
+        backend = OpenAIBackend(
+            api_key=entry.get("api_key") or settings.OPENAI_API_KEY,
+            base_url=entry.get("base_url"),
+            timeout=entry.get("timeout", settings.LLM_PROVIDER_TIMEOUT_SECONDS),
+            # Failover replaces the client's own retries, which would otherwise delay it
+            max_retries=0
+        )
+        providers.append(Provider(
+            name=entry.get("name") or f"provider-{index}",
+            backend=backend,
+            model=entry.get("model"),
+            weight=float(entry.get("weight", 1.0))
+        ))
+    return providers
@@ -0,0 +1,80 @@
+import enum
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable, Optional
+
+from app.core.config import settings
+from app.core.fair_queue import FairScheduler
+from app.core.metrics import LLM_QUEUE_WAIT, LLM_QUEUED
+from app.db.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    """Scheduling classes, served strictly in this order"""
+    INTERACTIVE = 0  # a student is waiting on the answer
+    BACKGROUND = 1  # speculative follow-ups and other work nobody is waiting on yet
+
+
+class LLMCaller:
+    __slots__ = ("key", "weight", "priority")
+
+    def __init__(self, key: Hashable, weight: float = 1.0, priority: Priority = Priority.INTERACTIVE):
+        self.key = key
+        self.weight = weight
+        self.priority = priority
+
+
+# Calls made on nobody's behalf share one key
+SYSTEM_CALLER = LLMCaller("system")
+
+
+def scheduler_capacity() -> int:
+    # LLM_MAX_CONCURRENCY is the budget for the whole deployment, shared by every worker process
+    return max(1, settings.LLM_MAX_CONCURRENCY // max(1, settings.WEB_CONCURRENCY))
+
+
+class LLMScheduler:
+
+    def __init__(self):
+        self._scheduler = FairScheduler(scheduler_capacity(), max_per_key=settings.LLM_USER_MAX_IN_FLIGHT)
+
+    @staticmethod
+    def caller(user: User, priority: Priority = Priority.INTERACTIVE) -> LLMCaller:
+        # Read up front: background work outlives the request session the user was loaded in
+        role = user.role.value if user.role else None
+        return LLMCaller(user.id, settings.LLM_ROLE_WEIGHTS.get(role, 1.0), priority)
+
+    @property
+    def active(self) -> int:
+        return self._scheduler.active
+
+    def queued(self, priority: Optional[Priority] = None) -> int:
+        return self._scheduler.queued(priority)
+
+    def promote(self, caller: LLMCaller, priority: Priority = Priority.INTERACTIVE):
+        if settings.LLM_SCHEDULER_ENABLED:
+            self._scheduler.promote(caller.key, priority)
+
+    @asynccontextmanager
+    async def slot(self, caller: Optional[LLMCaller] = None) -> AsyncIterator[None]:
+        if not settings.LLM_SCHEDULER_ENABLED:
+            yield
+            return
+
+        caller = caller or SYSTEM_CALLER
+        priority = caller.priority.name.lower()
+        with LLM_QUEUED.labels(priority=priority).track_inprogress():
+            waited = await self._scheduler.acquire(caller.key, caller.weight, caller.priority)
+        LLM_QUEUE_WAIT.labels(priority=priority).observe(waited)
+        if waited >= 1:
+            logger.info(f"LLM call for {caller.key} waited {waited:.2f}s for an upstream slot")
+        try:
+            yield
+        finally:
+            self._scheduler.release(caller.key)
+
+
+# Create singleton instance
+llm_scheduler = LLMScheduler()
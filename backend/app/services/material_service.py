@@ -0,0 +1,187 @@
+import asyncio
+import io
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import RETRIEVAL_LATENCY
+from app.db.models import CourseMaterial, Subject, User
+from app.schemas.material import CourseMaterialCreate
+from app.services.course_index import CourseIndex
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown", ".rst"}
+
+course_index = CourseIndex(settings.RETRIEVAL_INDEX_DIR)
+
+
+class MaterialService:
+
+    @staticmethod
+    async def create_material(
+        db: Session,
+        user: User,
+        material_data: CourseMaterialCreate,
+        filename: Optional[str] = None
+    ) -> CourseMaterial:
+        material = CourseMaterial(
+            user_id=user.id,
+            subject=material_data.subject,
+            title=material_data.title,
+            filename=filename,
+            char_count=len(material_data.content),
+            chunk_count=0
+        )
+        db.add(material)
+        db.commit()
+
+        # Indexing runs off the event loop and outside any write transaction
+        try:
+            material.chunk_count = await asyncio.to_thread(
+                course_index.add_document,
+                user.id,
+                material_data.subject.value,
+                material.id,
+                material_data.content,
+                settings.RETRIEVAL_CHUNK_WORDS,
+                settings.RETRIEVAL_CHUNK_OVERLAP_WORDS
+            )
+        except Exception as e:
+            logger.error(f"Failed to index course material {material.id}: {str(e)}")
+            db.delete(material)
+            db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to index course material"
+            )
+
+        db.commit()
+        db.refresh(material)
+        return material
+
+    @staticmethod
+    def _pdf_text(data: bytes) -> str:
+        from pypdf import PdfReader
+
+        reader = PdfReader(io.BytesIO(data))
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+    @staticmethod
+    async def extract_upload_text(upload: UploadFile) -> str:
+        extension = os.path.splitext(upload.filename or "")[1].lower()
+        data = await upload.read(settings.RETRIEVAL_MAX_DOCUMENT_CHARS * 4 + 1)
+
+        if extension == ".pdf":
+            try:
+                import pypdf  # noqa: F401
+            except ImportError:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="PDF uploads need the pypdf package; upload the extracted text instead"
+                )
+            try:
+                # Parsing is CPU-bound and can take seconds for long documents
+                text = await asyncio.to_thread(MaterialService._pdf_text, data)
+            except Exception as e:
+                logger.warning(f"Could not read uploaded PDF {upload.filename}: {str(e)}")
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="The PDF could not be read"
+                )
+        elif extension in TEXT_EXTENSIONS:
+            text = data.decode("utf-8", errors="replace")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Only .txt, .md, .rst and .pdf files are supported"
+            )
+
+        if not text.strip():
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="No text could be extracted from the file"
+            )
+        if len(text) > settings.RETRIEVAL_MAX_DOCUMENT_CHARS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Course material is too large"
+            )
+        return text
+
+    @staticmethod
+    def get_user_materials(
+        db: Session,
+        user: User,
+        subject: Optional[Subject] = None
+    ) -> List[CourseMaterial]:
+        query = db.query(CourseMaterial).filter(CourseMaterial.user_id == user.id)
+        if subject:
+            query = query.filter(CourseMaterial.subject == subject)
+        return query.order_by(CourseMaterial.created_at.desc()).all()
+
+    @staticmethod
+    def delete_material(db: Session, material_id: int, user: User):
+        material = db.query(CourseMaterial).filter(
+            CourseMaterial.id == material_id,
+            CourseMaterial.user_id == user.id
+        ).first()
+
+        if not material:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course material not found"
+            )
+
+        course_index.remove_document(user.id, material.subject.value, material.id)
+        db.delete(material)
+        db.commit()
+
+    @staticmethod
+    async def retrieve(
+        db: Session,
+        user_id: int,
+        subject: Optional[Subject],
+        query: str
+    ) -> List[Dict[str, any]]:
+        if not settings.RETRIEVAL_ENABLED or not subject:
+            return []
+
+        start_time = time.perf_counter()
+        try:
+            hits = await asyncio.to_thread(
+                course_index.search,
+                user_id,
+                subject.value,
+                query,
+                settings.RETRIEVAL_TOP_K,
+                settings.RETRIEVAL_MIN_SCORE
+            )
+        except Exception as e:
+            logger.error(f"Course material search failed for user {user_id}: {str(e)}")
+            return []
+        finally:
+            RETRIEVAL_LATENCY.observe(time.perf_counter() - start_time)
+
+        if not hits:
+            return []
+
+        titles = dict(
+            db.query(CourseMaterial.id, CourseMaterial.title).filter(
+                CourseMaterial.id.in_({hit["document_id"] for hit in hits})
+            ).all()
+        )
+        # Segments without a row belong to a material that is being deleted or failed to index
+        return [
+            {"title": titles[hit["document_id"]], "content": hit["content"], "score": hit["score"]}
+            for hit in hits
+            if hit["document_id"] in titles
+        ]
+
+
+material_service = MaterialService()
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.datetimes import naive_utc
+from app.core.sketch import DDSketch
+from app.db.models import ModelPerfSketch, Subject
+from app.db.session import SessionLocal
+from app.schemas.model_stats import ModelStatsBucketResponse, ModelStatsResponse, PercentilesResponse
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ("hour", "day", "total")
+GROUP_BY_FIELDS = ("model", "subject")
+
+
+class _Pending:
+    __slots__ = ("responses", "errors", "latency", "tokens")
+
+    def __init__(self):
+        self.responses = 0
+        self.errors = 0
+        self.latency = DDSketch(settings.MODEL_STATS_RELATIVE_ACCURACY)
+        self.tokens = DDSketch(settings.MODEL_STATS_RELATIVE_ACCURACY)
+
+    def merge(self, other: "_Pending"):
+        self.responses += other.responses
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+        self.tokens.merge(other.tokens)
+
+
+class ModelStatsService:
+
+    def __init__(self):
+        # Samples are folded into per-hour sketches in memory and merged into the table
+        # periodically, so hot rows are locked once per flush instead of once per message
+        self._pending: Dict[Tuple[datetime, str, Subject], _Pending] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _hour(at: datetime) -> datetime:
+        return naive_utc(at).replace(minute=0, second=0, microsecond=0)
+
+    def _pending_for(self, model: str, subject: Optional[Subject]) -> _Pending:
+        key = (self._hour(datetime.utcnow()), model, subject or Subject.OTHER)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _Pending()
+        return pending
+
+    def record(self, model: str, subject: Optional[Subject], response_time: Optional[int], tokens_used: Optional[int]):
+        if not settings.MODEL_STATS_ENABLED:
+            return
+        with self._lock:
+            pending = self._pending_for(model, subject)
+            pending.responses += 1
+            if response_time is not None:
+                pending.latency.add(response_time)
+            if tokens_used is not None:
+                pending.tokens.add(tokens_used)
+
+    def record_error(self, model: str, subject: Optional[Subject], count: int = 1):
+        if not settings.MODEL_STATS_ENABLED:
+            return
+        with self._lock:
+            self._pending_for(model, subject).errors += count
+
+    def _take_pending(self) -> Dict[Tuple[datetime, str, Subject], _Pending]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore_pending(self, pending: Dict[Tuple[datetime, str, Subject], _Pending]):
+        with self._lock:
+            for key, samples in pending.items():
+                if key in self._pending:
+                    samples.merge(self._pending[key])
+                self._pending[key] = samples
+
+    @staticmethod
+    def _lock_row(db: Session, bucket_start: datetime, model: str, subject: Subject) -> ModelPerfSketch:
+        query = db.query(ModelPerfSketch).filter(
+            ModelPerfSketch.bucket_start == bucket_start,
+            ModelPerfSketch.model == model,
+            ModelPerfSketch.subject == subject
+        ).with_for_update()
+        row = query.first()
+        if row is not None:
+            return row
+        row = ModelPerfSketch(
+            bucket_start=bucket_start, model=model, subject=subject, response_count=0, error_count=0
+        )
+        try:
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            # Another worker flushed the same hour first
+            return query.one()
+        return row
+
+    @staticmethod
+    def _merge_into(row: ModelPerfSketch, pending: _Pending):
+        row.response_count += pending.responses
+        row.error_count += pending.errors
+        for column, sketch in (("latency_sketch", pending.latency), ("tokens_sketch", pending.tokens)):
+            if sketch.count == 0:
+                continue
+            stored = getattr(row, column)
+            if stored is not None:
+                merged = DDSketch.from_bytes(stored)
+                merged.merge(sketch)
+                sketch = merged
+            setattr(row, column, sketch.to_bytes())
+
+    def flush(self, db: Session) -> int:
+        pending = self._take_pending()
+        try:
+            # Fixed lock order so concurrent workers flushing the same hours cannot deadlock
+            for key in sorted(pending, key=lambda k: (k[0], k[1], k[2].value)):
+                ModelStatsService._merge_into(ModelStatsService._lock_row(db, *key), pending[key])
+            db.query(ModelPerfSketch).filter(
+                ModelPerfSketch.bucket_start < datetime.utcnow() - timedelta(days=settings.MODEL_STATS_RETENTION_DAYS)
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore_pending(pending)
+            raise
+        return len(pending)
+
+    def _flush_in_thread(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.flush(db)
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.MODEL_STATS_FLUSH_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self._flush_in_thread)
+            except Exception as e:
+                logger.error(f"Model stats flush failed: {str(e)}")
+
+    def start(self):
+        if settings.MODEL_STATS_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await asyncio.to_thread(self._flush_in_thread)
+        except Exception as e:
+            logger.error(f"Final model stats flush failed: {str(e)}")
+
+    @staticmethod
+    def _percentiles(sketch: DDSketch) -> PercentilesResponse:
+        if sketch.count == 0:
+            return PercentilesResponse()
+        return PercentilesResponse(
+            p50=sketch.quantile(0.50),
+            p90=sketch.quantile(0.90),
+            p95=sketch.quantile(0.95),
+            p99=sketch.quantile(0.99),
+            mean=sketch.mean,
+            max=sketch.max
+        )
+
+    @staticmethod
+    def get_model_stats(
+        db: Session,
+        hours: int = 24,
+        bucket: str = "hour",
+        group_by: Optional[List[str]] = None,
+        model: Optional[str] = None,
+        subject: Optional[Subject] = None
+    ) -> ModelStatsResponse:
+        group_by = [field for field in GROUP_BY_FIELDS if field in (group_by or ["model"])]
+        hours = max(1, min(hours, settings.MODEL_STATS_MAX_HOURS))
+        since = ModelStatsService._hour(datetime.utcnow()) - timedelta(hours=hours - 1)
+
+        query = db.query(ModelPerfSketch).filter(ModelPerfSketch.bucket_start >= since)
+        if model is not None:
+            query = query.filter(ModelPerfSketch.model == model)
+        if subject is not None:
+            query = query.filter(ModelPerfSketch.subject == subject)
+
+        groups: Dict[tuple, _Pending] = {}
+        for row in query.all():
+            bucket_start = naive_utc(row.bucket_start)
+            if bucket == "day":
+                bucket_start = bucket_start.replace(hour=0)
+            elif bucket == "total":
+                bucket_start = None
+            key = (
+                bucket_start,
+                row.model if "model" in group_by else None,
+                row.subject if "subject" in group_by else None
+            )
+            stored = _Pending()
+            stored.responses, stored.errors = row.response_count, row.error_count
+            if row.latency_sketch is not None:
+                stored.latency = DDSketch.from_bytes(row.latency_sketch)
+            if row.tokens_sketch is not None:
+                stored.tokens = DDSketch.from_bytes(row.tokens_sketch)
+            if key in groups:
+                groups[key].merge(stored)
+            else:
+                groups[key] = stored
+
+        buckets = []
+        for (bucket_start, group_model, group_subject), merged in sorted(
+            groups.items(), key=lambda item: (item[0][0] or since, item[0][1] or "", item[0][2].value if item[0][2] else "")
+        ):
+            requests = merged.responses + merged.errors
+            buckets.append(ModelStatsBucketResponse(
+                bucket_start=bucket_start,
+                model=group_model,
+                subject=group_subject,
+                requests=requests,
+                errors=merged.errors,
+                error_rate=merged.errors / requests if requests else 0.0,
+                latency_ms=ModelStatsService._percentiles(merged.latency),
+                tokens=ModelStatsService._percentiles(merged.tokens)
+            ))
+
+        return ModelStatsResponse(
+            since=since,
+            bucket=bucket,
+            group_by=group_by,
+            relative_accuracy=settings.MODEL_STATS_RELATIVE_ACCURACY,
+            buckets=buckets
+        )
+
+
+model_stats_service = ModelStatsService()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import ChatMessage, ChatSession
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_TABLE = ChatMessage.__tablename__
+# Arbitrary constant so only one worker runs maintenance at a time
+MAINTENANCE_LOCK_ID = 720401
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month_index = day.year * 12 + day.month - 1 + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class PartitionService:
+    """
+    Optional monthly range partitioning of chat_messages by created_at (Postgres only)
+    The table is created partitioned on first start, partitions are created ahead of
+    time and empty old partitions (e.g. emptied by the archival job) are dropped
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def enabled(bind: Engine = engine) -> bool:
+        return settings.DB_PARTITION_MESSAGES and bind.dialect.name == "postgresql"
+
+    @staticmethod
+    def messages_query(db: Session, session: ChatSession) -> Query:
+        query = db.query(ChatMessage).filter(ChatMessage.session_id == session.id)
+        if PartitionService.enabled(db.get_bind()):
+            # Messages never predate their session, so this bound lets Postgres skip older partitions
+            query = query.filter(ChatMessage.created_at >= session.created_at)
+        return query
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f"{MESSAGES_TABLE}_y{month.year}m{month.month:02d}"
+
+    @staticmethod
+    def create_partitioned_table(connection: Connection):
+        # Postgres requires the partition key in the primary key, hence (id, created_at)
+        ChatMessage.__table__.c.role.type.create(connection, checkfirst=True)
+        connection.execute(text(f"""
+            CREATE TABLE {MESSAGES_TABLE} (
+                id SERIAL NOT NULL,
+                session_id INTEGER NOT NULL REFERENCES chat_sessions (id) ON DELETE CASCADE,
+                role messagerole NOT NULL,
+                content TEXT NOT NULL,
+                tokens_used INTEGER,
+                model_used VARCHAR(50),
+                response_time INTEGER,
+                created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """))
+        connection.execute(text(
+            f"CREATE INDEX ix_{MESSAGES_TABLE}_session_created "
+            f"ON {MESSAGES_TABLE} (session_id, created_at, id)"
+        ))
+        connection.execute(text(
+            f"CREATE TABLE {MESSAGES_TABLE}_default PARTITION OF {MESSAGES_TABLE} DEFAULT"
+        ))
+        logger.info(f"Created partitioned table {MESSAGES_TABLE}")
+
+    @staticmethod
+    def prepare_schema(bind: Engine = engine):
+        # Runs before create_all, which then leaves the existing chat_messages table alone
+        if not PartitionService.enabled(bind):
+            return
+        with bind.begin() as connection:
+            connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID})
+            if not inspect(connection).has_table(MESSAGES_TABLE):
+                Base.metadata.create_all(
+                    connection,
+                    tables=[t for t in Base.metadata.sorted_tables if t.name != MESSAGES_TABLE]
+                )
+                PartitionService.create_partitioned_table(connection)
+                return
+            is_partitioned = connection.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table)"
+            ), {"table": MESSAGES_TABLE}).scalar()
+        if not is_partitioned:
+            logger.warning(
+                f"DB_PARTITION_MESSAGES is set but {MESSAGES_TABLE} already exists unpartitioned; "
+                f"rename it, restart to create the partitioned table, then copy the rows across"
+            )
+
+    @staticmethod
+    def _existing_partitions(connection: Connection) -> List[str]:
+        rows = connection.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ), {"table": MESSAGES_TABLE})
+        return [name for (name,) in rows]
+
+    @staticmethod
+    def maintain(bind: Engine = engine, today: Optional[date] = None) -> Dict[str, List[str]]:
+        if not PartitionService.enabled(bind):
+            return {"created": [], "dropped": []}
+
+        today = today or datetime.now(timezone.utc).date()
+        current_month = _month_start(today)
+        created, dropped = [], []
+        with bind.begin() as connection:
+            connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MAINTENANCE_LOCK_ID})
+            existing = set(PartitionService._existing_partitions(connection))
+            if not existing:
+                return {"created": created, "dropped": dropped}
+
+            for offset in range(0, settings.DB_PARTITION_PREMAKE_MONTHS + 1):
+                month = _month_start(today, offset)
+                name = PartitionService.partition_name(month)
+                if name in existing:
+                    continue
+                connection.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {MESSAGES_TABLE} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_month_start(month, 1).isoformat()}')"
+                ))
+                created.append(name)
+
+            if settings.DB_PARTITION_DROP_EMPTY_AFTER_MONTHS is not None:
+                cutoff = _month_start(current_month, -settings.DB_PARTITION_DROP_EMPTY_AFTER_MONTHS)
+                for name in sorted(existing):
+                    if name == f"{MESSAGES_TABLE}_default" or name >= PartitionService.partition_name(cutoff):
+                        continue
+                    has_rows = connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar()
+                    if not has_rows:
+                        connection.execute(text(f"DROP TABLE {name}"))
+                        dropped.append(name)
+
+        if created or dropped:
+            logger.info(f"Partition maintenance: created {created}, dropped {dropped}")
+        return {"created": created, "dropped": dropped}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.DB_PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(self.maintain)
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {str(e)}")
+
+    async def start(self):
+        if not self.enabled():
+            return
+        await asyncio.to_thread(self.maintain)
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+partition_service = PartitionService()
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import LLM_SPECULATIONS, record_cache_lookup
+from app.db.models import Subject
+from app.services.ai_service import ai_service
+from app.services.llm_scheduler import LLMCaller, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+PROBLEM_SUBJECTS = {
+    Subject.MATHEMATICS.value,
+    Subject.PHYSICS.value,
+    Subject.CHEMISTRY.value,
+    Subject.COMPUTER_SCIENCE.value,
+    Subject.ECONOMICS.value,
+}
+
+
+class _Speculation:
+    __slots__ = ("follow_up", "mode", "task", "caller", "created_at")
+
+    def __init__(self, follow_up: str, mode: Optional[str], task: asyncio.Task, caller: Optional[LLMCaller]):
+        self.follow_up = follow_up
+        self.mode = mode
+        self.task = task
+        self.caller = caller
+        self.created_at = time.monotonic()
+
+
+class SpeculationService:
+    
+    def __init__(self):
+        self._entries: "OrderedDict[int, _Speculation]" = OrderedDict()
+        self._semaphore = asyncio.Semaphore(settings.SPECULATION_MAX_CONCURRENCY)
+        self._window_started = time.monotonic()
+        self._window_tokens = 0
+    
+    @staticmethod
+    def suggest_follow_ups(subject: Optional[str]) -> List[str]:
+        if subject in PROBLEM_SUBJECTS:
+            return [
+                "Give me a practice problem on this",
+                "Explain it more simply",
+                "Walk me through a worked example step by step",
+            ]
+        return [
+            "Give me a practice question on this",
+            "Explain it more simply",
+            "Summarize the key points for revision",
+        ]
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split()).rstrip("?.!")
+    
+    def _budget_available(self) -> bool:
+        if time.monotonic() - self._window_started >= 3600:
+            self._window_started = time.monotonic()
+            self._window_tokens = 0
+        return self._window_tokens < settings.SPECULATION_TOKEN_BUDGET_PER_HOUR
+    
+    def _prune(self):
+        now = time.monotonic()
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if now - entry.created_at < settings.SPECULATION_TTL_SECONDS:
+                break
+            self._drop(session_id, "expired")
+    
+    def _drop(self, session_id: int, outcome: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            entry.task.cancel()
+            LLM_SPECULATIONS.labels(outcome=outcome).inc()
+    
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Speculative generation failed: {str(task.exception())}")
+    
+    async def _generate(
+        self,
+        follow_up: str,
+        conversation_history: List[Dict[str, str]],
+        subject: Optional[str],
+        mode: Optional[str],
+        reference_material: Optional[List[Dict[str, str]]],
+        caller: Optional[LLMCaller]
+    ) -> Dict[str, any]:
+        async with self._semaphore:
+            ai_response = await ai_service.generate_response(
+                user_message=follow_up,
+                conversation_history=conversation_history,
+                subject=subject,
+                mode=mode,
+                reference_material=reference_material,
+                caller=caller
+            )
+        self._window_tokens += ai_response["tokens_used"]
+        return ai_response
+    
+    def schedule(
+        self,
+        session_id: int,
+        follow_up: str,
+        conversation_history: List[Dict[str, str]],
+        subject: Optional[str],
+        mode: Optional[str] = None,
+        reference_material: Optional[List[Dict[str, str]]] = None,
+        caller: Optional[LLMCaller] = None
+    ):
+        # Follow-ups stay on the current topic, so the excerpts retrieved for this turn are reused
+        self._drop(session_id, "discarded")
+        self._prune()
+        if not self._budget_available():
+            LLM_SPECULATIONS.labels(outcome="over_budget").inc()
+            return
+        
+        task = asyncio.create_task(self._generate(
+            follow_up, conversation_history, subject, mode, reference_material, caller
+        ))
+        task.add_done_callback(self._log_failure)
+        self._entries[session_id] = _Speculation(follow_up, mode, task, caller)
+        LLM_SPECULATIONS.labels(outcome="started").inc()
+        
+        while len(self._entries) > settings.SPECULATION_MAX_ENTRIES:
+            oldest_session_id = next(iter(self._entries))
+            self._drop(oldest_session_id, "evicted")
+    
+    async def claim(
+        self,
+        session_id: int,
+        content: str,
+        mode: Optional[str] = None
+    ) -> Optional[Dict[str, any]]:
+        self._prune()
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        
+        if mode != entry.mode or self._normalize(content) != self._normalize(entry.follow_up):
+            record_cache_lookup("speculation", hit=False)
+            self._drop(session_id, "discarded")
+            return None
+        
+        del self._entries[session_id]
+        record_cache_lookup("speculation", hit=True)
+        if entry.caller is not None and not entry.task.done():
+            # The student is waiting on it now, so it must not stay queued behind interactive turns
+            llm_scheduler.promote(entry.caller)
+        try:
+            ai_response = await entry.task
+        except asyncio.CancelledError:
+            if not entry.task.cancelled():
+                raise
+            return None
+        except Exception:
+            return None
+        LLM_SPECULATIONS.labels(outcome="used").inc()
+        return ai_response
+    
+    def discard(self, session_id: int):
+        self._drop(session_id, "discarded")
+    
+    def shutdown(self):
+        for session_id in list(self._entries):
+            self._drop(session_id, "discarded")
+
+
+speculation_service = SpeculationService()
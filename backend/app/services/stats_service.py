@@ -0,0 +1,217 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.datetimes import naive_utc
+from app.db.models import (
+    ArchivedSession,
+    ChatMessage,
+    ChatSession,
+    MessageRole,
+    StudyStats,
+    StudyWeek,
+    Subject,
+    User
+)
+from app.schemas.stats import StudyStatsResponse, StudyWeekResponse, SubjectStatsResponse
+from app.services.archive_service import archive_service
+
+logger = logging.getLogger(__name__)
+
+
+class StatsService:
+
+    @staticmethod
+    def _week_start(day: date) -> date:
+        return day - timedelta(days=day.weekday())
+
+    @staticmethod
+    def _new_stats(user_id: int) -> StudyStats:
+        return StudyStats(
+            user_id=user_id,
+            total_sessions=0,
+            total_questions=0,
+            total_tokens=0,
+            active_seconds=0,
+            current_streak_days=0,
+            longest_streak_days=0
+        )
+
+    @staticmethod
+    def _new_week(user_id: int, week_start: date, subject: Subject) -> StudyWeek:
+        return StudyWeek(
+            user_id=user_id,
+            week_start=week_start,
+            subject=subject,
+            sessions_started=0,
+            questions=0,
+            tokens_used=0,
+            active_seconds=0
+        )
+
+    @staticmethod
+    def _apply(stats: StudyStats, week: StudyWeek, at: datetime, questions: int, tokens: int):
+        # Shared by the incremental path and the rebuild, so both count time and streaks identically
+        at = naive_utc(at)
+        stats.total_tokens += tokens
+        week.tokens_used += tokens
+        if not questions:
+            return
+
+        active_seconds = 0
+        if stats.last_active_at is not None:
+            gap = (at - naive_utc(stats.last_active_at)).total_seconds()
+            if 0 < gap <= settings.STATS_IDLE_GAP_SECONDS:
+                active_seconds = int(gap)
+
+        day = at.date()
+        if stats.last_active_date is None or day > stats.last_active_date:
+            if stats.last_active_date == day - timedelta(days=1):
+                stats.current_streak_days += 1
+            else:
+                stats.current_streak_days = 1
+            stats.longest_streak_days = max(stats.longest_streak_days, stats.current_streak_days)
+            stats.last_active_date = day
+
+        stats.last_active_at = at
+        stats.total_questions += questions
+        stats.active_seconds += active_seconds
+        week.questions += questions
+        week.active_seconds += active_seconds
+
+    @staticmethod
+    def _rebuild(db: Session, user_id: int) -> Tuple[StudyStats, List[StudyWeek]]:
+        stats = StatsService._new_stats(user_id)
+        weeks: Dict[Tuple[date, Subject], StudyWeek] = {}
+
+        def week_for(at: datetime, subject: Subject) -> StudyWeek:
+            key = (StatsService._week_start(naive_utc(at).date()), subject)
+            if key not in weeks:
+                weeks[key] = StatsService._new_week(user_id, key[0], subject)
+            return weeks[key]
+
+        subjects: Dict[int, Subject] = {}
+        for session_id, subject, created_at in db.query(
+            ChatSession.id, ChatSession.subject, ChatSession.created_at
+        ).filter(ChatSession.user_id == user_id).all():
+            subjects[session_id] = subject or Subject.OTHER
+            week_for(created_at, subjects[session_id]).sessions_started += 1
+        stats.total_sessions = len(subjects)
+
+        messages = db.query(
+            ChatMessage.session_id, ChatMessage.role, ChatMessage.tokens_used, ChatMessage.created_at
+        ).join(ChatSession, ChatSession.id == ChatMessage.session_id).filter(
+            ChatSession.user_id == user_id
+        ).all()
+        archived_ids = [session_id for (session_id,) in db.query(ArchivedSession.session_id).join(
+            ChatSession, ChatSession.id == ArchivedSession.session_id
+        ).filter(ChatSession.user_id == user_id).all()]
+        for session_id in archived_ids:
+            messages.extend(
+                (m.session_id, m.role, m.tokens_used, m.created_at)
+                for m in archive_service.load_messages(db, session_id)
+            )
+
+        for session_id, role, tokens_used, created_at in sorted(messages, key=lambda m: naive_utc(m[3])):
+            week = week_for(created_at, subjects[session_id])
+            if role == MessageRole.USER:
+                StatsService._apply(stats, week, created_at, questions=1, tokens=0)
+            else:
+                StatsService._apply(stats, week, created_at, questions=0, tokens=tokens_used or 0)
+
+        return stats, list(weeks.values())
+
+    @staticmethod
+    def _lock_stats(db: Session, user_id: int) -> Tuple[StudyStats, bool]:
+        # Pending chat rows belong to the caller's transaction, not to the savepoint below
+        db.flush()
+        stats = db.query(StudyStats).filter(StudyStats.user_id == user_id).with_for_update().first()
+        if stats is not None:
+            return stats, False
+
+        # First activity since rollups were introduced: backfill from history once
+        stats, weeks = StatsService._rebuild(db, user_id)
+        try:
+            with db.begin_nested():
+                db.add(stats)
+                db.add_all(weeks)
+        except IntegrityError:
+            # A concurrent request for the same user created the rows first
+            return db.query(StudyStats).filter(StudyStats.user_id == user_id).with_for_update().one(), False
+        logger.info(f"Built study stats for user {user_id} from history")
+        # The rebuild already counted the rows the caller just flushed
+        return stats, True
+
+    @staticmethod
+    def _week(db: Session, user_id: int, at: datetime, subject: Subject) -> StudyWeek:
+        week_start = StatsService._week_start(naive_utc(at).date())
+        week = db.get(StudyWeek, (user_id, week_start, subject))
+        if week is None:
+            week = StatsService._new_week(user_id, week_start, subject)
+            db.add(week)
+        return week
+
+    @staticmethod
+    def record_session(db: Session, session: ChatSession):
+        now = datetime.utcnow()
+        stats, rebuilt = StatsService._lock_stats(db, session.user_id)
+        if rebuilt:
+            return
+        stats.total_sessions += 1
+        StatsService._week(db, session.user_id, now, session.subject or Subject.OTHER).sessions_started += 1
+
+    @staticmethod
+    def record_questions(db: Session, session: ChatSession, questions: int, tokens: int):
+        now = datetime.utcnow()
+        stats, rebuilt = StatsService._lock_stats(db, session.user_id)
+        if rebuilt:
+            return
+        week = StatsService._week(db, session.user_id, now, session.subject or Subject.OTHER)
+        StatsService._apply(stats, week, now, questions=questions, tokens=tokens)
+
+    @staticmethod
+    def get_user_stats(db: Session, user: User, weeks: int = 12) -> StudyStatsResponse:
+        weeks = max(1, min(weeks, settings.STATS_MAX_WEEKS))
+        today = datetime.utcnow().date()
+
+        stats = db.get(StudyStats, user.id)
+        if stats is not None:
+            first_week = StatsService._week_start(today) - timedelta(weeks=weeks - 1)
+            week_rows = db.query(StudyWeek).filter(
+                StudyWeek.user_id == user.id,
+                StudyWeek.week_start >= first_week
+            ).order_by(StudyWeek.week_start.asc()).all()
+        else:
+            # No activity since rollups were added: the reads stay constant-time, and the
+            # user's next session or question backfills the rollup from history
+            stats, week_rows = StatsService._new_stats(user.id), []
+
+        subjects: Dict[Subject, SubjectStatsResponse] = {}
+        for week in week_rows:
+            totals = subjects.setdefault(week.subject, SubjectStatsResponse(
+                subject=week.subject, sessions_started=0, questions=0, active_seconds=0
+            ))
+            totals.sessions_started += week.sessions_started
+            totals.questions += week.questions
+            totals.active_seconds += week.active_seconds
+
+        # A streak is only current if the student studied today or yesterday
+        streak_alive = stats.last_active_date is not None and stats.last_active_date >= today - timedelta(days=1)
+        return StudyStatsResponse(
+            total_sessions=stats.total_sessions,
+            total_questions=stats.total_questions,
+            total_tokens=stats.total_tokens,
+            active_seconds=stats.active_seconds,
+            current_streak_days=stats.current_streak_days if streak_alive else 0,
+            longest_streak_days=stats.longest_streak_days,
+            last_active_date=stats.last_active_date,
+            subjects=sorted(subjects.values(), key=lambda s: s.questions, reverse=True),
+            weeks=[StudyWeekResponse.from_orm(w) for w in week_rows]
+        )
+
+
+stats_service = StatsService()
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.datetimes import naive_utc
+from app.core.metrics import AUTH_TOKEN_REFRESHES
+from app.db.models import RefreshToken, User
+
+logger = logging.getLogger(__name__)
+
+
+class TokenService:
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _rejected(outcome: str) -> HTTPException:
+        AUTH_TOKEN_REFRESHES.labels(outcome=outcome).inc()
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    @staticmethod
+    def issue_refresh_token(
+        db: Session,
+        user: User,
+        family_id: Optional[str] = None,
+        session_started_at: Optional[datetime] = None
+    ) -> str:
+        now = datetime.utcnow()
+        if family_id is None:
+            # A new login: drop this user's expired tokens so the table only holds live sessions
+            db.query(RefreshToken).filter(
+                RefreshToken.user_id == user.id,
+                RefreshToken.expires_at < now
+            ).delete(synchronize_session=False)
+
+        token = secrets.token_urlsafe(32)
+        started_at = naive_utc(session_started_at) if session_started_at else now
+        expires_at = min(
+            now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            started_at + timedelta(days=settings.REFRESH_SESSION_MAX_DAYS)
+        )
+        db.add(RefreshToken(
+            user_id=user.id,
+            token_hash=TokenService._hash(token),
+            family_id=family_id or secrets.token_hex(16),
+            session_started_at=started_at,
+            expires_at=expires_at
+        ))
+        db.commit()
+        return token
+
+    @staticmethod
+    def _revoke_family(db: Session, family_id: str, now: datetime):
+        db.query(RefreshToken).filter(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None)
+        ).update({"revoked_at": now}, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def rotate_refresh_token(db: Session, token: str) -> Tuple[User, str]:
+        now = datetime.utcnow()
+        record = db.query(RefreshToken).filter(
+            RefreshToken.token_hash == TokenService._hash(token)
+        ).first()
+        if record is None:
+            raise TokenService._rejected("invalid")
+        if record.revoked_at is not None:
+            raise TokenService._rejected("revoked")
+        if record.rotated_at is not None:
+            # Two tabs refreshing at once is expected; an old token coming back later means it leaked
+            if now - naive_utc(record.rotated_at) > timedelta(seconds=settings.REFRESH_REUSE_GRACE_SECONDS):
+                logger.warning(f"Refresh token reuse for user {record.user_id}; revoking token family")
+                TokenService._revoke_family(db, record.family_id, now)
+            raise TokenService._rejected("reused")
+        if naive_utc(record.expires_at) <= now:
+            raise TokenService._rejected("expired")
+
+        # Conditional update so only one of several concurrent refreshes wins
+        claimed = db.query(RefreshToken).filter(
+            RefreshToken.id == record.id,
+            RefreshToken.rotated_at.is_(None)
+        ).update({"rotated_at": now}, synchronize_session=False)
+        if claimed != 1:
+            db.rollback()
+            raise TokenService._rejected("reused")
+
+        user = db.get(User, record.user_id)
+        if user is None or not user.is_active:
+            db.rollback()
+            raise TokenService._rejected("invalid")
+
+        new_token = TokenService.issue_refresh_token(
+            db, user, family_id=record.family_id, session_started_at=record.session_started_at
+        )
+        AUTH_TOKEN_REFRESHES.labels(outcome="rotated").inc()
+        return user, new_token
+
+    @staticmethod
+    def revoke_refresh_token(db: Session, token: str):
+        record = db.query(RefreshToken).filter(
+            RefreshToken.token_hash == TokenService._hash(token)
+        ).first()
+        if record is not None:
+            TokenService._revoke_family(db, record.family_id, datetime.utcnow())
+
+
+token_service = TokenService()
@@ -1,11 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from app.core.config import settings
+from app.core.datetimes import naive_utc
 from app.db.models import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
+from app.db.session import mark_user_write
 
 
 class UserService:
@@ -36,6 +39,7 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        mark_user_write(user.id)
         return user
     
     @staticmethod
@@ -50,8 +54,13 @@ class UserService:
         if not verify_password(password, user.hashed_password):
             return None
         
-        user.last_login = datetime.utcnow()
-        db.commit()
+        # Coalesced: only written when stale, and committed together with the new refresh token
+        now = datetime.utcnow()
+        if user.last_login is None or now - naive_utc(user.last_login) > timedelta(
+            seconds=settings.LAST_LOGIN_UPDATE_INTERVAL_SECONDS
+        ):
+            user.last_login = now
+        db.info["user_id"] = user.id
         return user
     
     @staticmethod
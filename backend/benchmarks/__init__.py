@@ -0,0 +1 @@
+"""Benchmark and load-testing suite for the StudyBuddy AI backend"""
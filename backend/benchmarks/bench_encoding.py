@@ -0,0 +1,160 @@
+"""
+Response encoding benchmark
+Builds a message listing of long markdown answers as MessageResponse objects
+and measures, per representation and Content-Encoding, the payload size, the
+server-side encode time (serialization + compression), the client-side decode
+time and the transfer time on a slow link:
+
+    json-fastapi: jsonable_encoder + JSONResponse (FastAPI's path for a returned model)
+    json:         model_dump(mode="json") + JSONResponse (negotiated_response)
+    msgpack:      model_dump(mode="json") + MsgPackResponse (needs the msgpack package)
+
+    python -m benchmarks.bench_encoding --messages 100 --words 600
+    python -m benchmarks.bench_encoding --bandwidth-kbps 400 --gzip-level 9
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from benchmarks.harness import app_environment, percentile
+
+WORDS = (
+    "the cell membrane controls which molecules enter and leave by diffusion osmosis and active transport "
+    "energy from ATP moves ions against their concentration gradient while water follows the solute "
+    "a derivative measures the rate of change so the slope of the tangent line equals f prime of x"
+).split()
+
+
+def synthetic_answer(rng: random.Random, words: int) -> str:
+    # Markdown shaped like real answers: headings, bullet lists, bold terms and a formula block
+    lines = [f"**{' '.join(rng.choices(WORDS, k=4)).title()}**", ""]
+    written = 0
+    while written < words:
+        if rng.random() < 0.15:
+            lines.append(f"### {' '.join(rng.choices(WORDS, k=3)).title()}")
+        elif rng.random() < 0.3:
+            lines.extend(f"- **{rng.choice(WORDS)}**: {' '.join(rng.choices(WORDS, k=12))}" for _ in range(3))
+            written += 39
+        elif rng.random() < 0.1:
+            lines.append(f"$$ f'(x) = \\lim_{{h \\to 0}} \\frac{{f(x + h) - f(x)}}{{h}} + {rng.randint(1, 99)} $$")
+        size = rng.randint(30, 80)
+        lines.append(" ".join(rng.choices(WORDS, k=size)) + ".")
+        lines.append("")
+        written += size
+    return "\n".join(lines)
+
+
+def build_messages(count: int, words: int, seed: int):
+    from app.db.models import MessageRole
+    from app.schemas.chat import MessageResponse
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 9, 0, 0)
+    messages = []
+    for index in range(count):
+        assistant = index % 2 == 1
+        messages.append(MessageResponse(
+            id=index + 1,
+            session_id=1,
+            role=MessageRole.ASSISTANT if assistant else MessageRole.USER,
+            content=synthetic_answer(rng, words) if assistant else " ".join(rng.choices(WORDS, k=15)) + "?",
+            tokens_used=rng.randint(400, 1500) if assistant else None,
+            model_used="gpt-4.1-nano" if assistant else None,
+            response_time=rng.randint(800, 6000) if assistant else None,
+            created_at=start + timedelta(seconds=30 * index),
+        ))
+    return messages
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Response encoding benchmark")
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--words", type=int, default=600, help="Words per assistant answer")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=4)
+    parser.add_argument("--bandwidth-kbps", type=float, default=1000.0, help="Link speed for the transfer estimate")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "p50_ms": round(1000 * percentile(values, 0.50), 3),
+        "p95_ms": round(1000 * percentile(values, 0.95), 3),
+        "p99_ms": round(1000 * percentile(values, 0.99), 3),
+    }
+
+
+def timed(fn, iterations):
+    durations, result = [], None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return result, durations
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The schemas import app settings; placeholders are enough since nothing connects anywhere
+    for key, value in app_environment("sqlite://", None).items():
+        os.environ.setdefault(key, value)
+    from app.core.encoding import MsgPackResponse, _brotli, _msgpack, _to_builtin, compress
+
+    messages = build_messages(args.messages, args.words, args.seed)
+
+    formats = {
+        "json-fastapi": (lambda: JSONResponse(jsonable_encoder(messages)).body, json.loads),
+        "json": (lambda: JSONResponse(_to_builtin(messages)).body, json.loads),
+    }
+    if _msgpack() is not None:
+        formats["msgpack"] = (lambda: MsgPackResponse(_to_builtin(messages)).body, _msgpack().unpackb)
+    else:
+        print("msgpack is not installed; skipping the msgpack representation", file=sys.stderr)
+
+    encodings = {"identity": (lambda body: body, lambda body: body)}
+    encodings["gzip"] = (
+        lambda body: compress(body, "gzip", gzip_level=args.gzip_level), gzip.decompress
+    )
+    if _brotli() is not None:
+        encodings["br"] = (
+            lambda body: compress(body, "br", brotli_quality=args.brotli_quality), _brotli().decompress
+        )
+    else:
+        print("brotli is not installed; skipping br", file=sys.stderr)
+
+    report = {"messages": args.messages, "words_per_answer": args.words, "bandwidth_kbps": args.bandwidth_kbps, "results": {}}
+    for format_name, (encode, decode) in formats.items():
+        body, encode_times = timed(encode, args.iterations)
+        _, decode_times = timed(lambda: decode(body), args.iterations)
+        for encoding_name, (compress_body, decompress_body) in encodings.items():
+            payload, compress_times = timed(lambda: compress_body(body), args.iterations)
+            _, decompress_times = timed(lambda: decompress_body(payload), args.iterations)
+            server_ms = percentile(sorted(encode_times), 0.50) + percentile(sorted(compress_times), 0.50)
+            client_ms = percentile(sorted(decompress_times), 0.50) + percentile(sorted(decode_times), 0.50)
+            transfer_ms = len(payload) * 8 / args.bandwidth_kbps
+            report["results"][f"{format_name}+{encoding_name}"] = {
+                "bytes": len(payload),
+                "serialize": summarize(encode_times),
+                "compress": summarize(compress_times),
+                "client_decode_p50_ms": round(1000 * client_ms, 3),
+                "transfer_ms": round(transfer_ms, 1),
+                "total_p50_ms": round(1000 * (server_ms + client_ms) + transfer_ms, 1),
+            }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
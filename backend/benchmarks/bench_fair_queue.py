@@ -0,0 +1,112 @@
+"""
+Fair scheduling benchmark
+Simulates one worker's upstream LLM slots in process (no server, no network):
+a heavy user fires a burst of requests at once while light users keep sending
+one question at a time, plus background (speculative) calls. Each call holds a
+slot for --latency-ms. The same workload runs through
+
+    fifo:       an asyncio.Semaphore, first come first served
+    fair:       FairScheduler without a per-user cap
+    fair+cap:   FairScheduler with max_per_key=--user-cap (the app's setup)
+
+and the report gives queue wait percentiles per kind of caller, plus when the
+heavy user's burst finished.
+
+    python -m benchmarks.bench_fair_queue --capacity 8 --burst 60
+    python -m benchmarks.bench_fair_queue --light-users 20 --latency-ms 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from app.core.fair_queue import FairScheduler
+from benchmarks.harness import percentile
+
+INTERACTIVE, BACKGROUND = 0, 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fair scheduling benchmark")
+    parser.add_argument("--capacity", type=int, default=8, help="Upstream slots")
+    parser.add_argument("--user-cap", type=int, default=4)
+    parser.add_argument("--burst", type=int, default=60, help="Requests the heavy user sends at once")
+    parser.add_argument("--light-users", type=int, default=10)
+    parser.add_argument("--light-requests", type=int, default=5, help="Sequential questions per light user")
+    parser.add_argument("--background", type=int, default=10, help="Background calls queued at the start")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--think-ms", type=float, default=100.0, help="Pause between a light user's questions")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(1000 * percentile(values, 0.50), 1),
+        "p95_ms": round(1000 * percentile(values, 0.95), 1),
+        "max_ms": round(1000 * values[-1], 1) if values else 0.0,
+    }
+
+
+async def run_workload(strategy: str, args) -> Dict[str, object]:
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.capacity)
+    scheduler = FairScheduler(args.capacity, args.user_cap if strategy == "fair+cap" else None)
+    waits: Dict[str, List[float]] = {"heavy": [], "light": [], "background": []}
+    started = time.perf_counter()
+    heavy_done = []
+
+    async def call(kind: str, key: str, priority: int):
+        queued = time.perf_counter()
+        if strategy == "fifo":
+            async with semaphore:
+                waits[kind].append(time.perf_counter() - queued)
+                await asyncio.sleep(args.latency_ms / 1000 * rng.uniform(0.8, 1.2))
+        else:
+            async with scheduler.slot(key, priority=priority) as waited:
+                waits[kind].append(waited)
+                await asyncio.sleep(args.latency_ms / 1000 * rng.uniform(0.8, 1.2))
+        if kind == "heavy":
+            heavy_done.append(time.perf_counter() - started)
+
+    async def light_user(index: int):
+        # Arrives just after the burst, like a student asking while someone else runs a batch
+        await asyncio.sleep(0.01 + index * 0.002)
+        for _ in range(args.light_requests):
+            await call("light", f"light-{index}", INTERACTIVE)
+            await asyncio.sleep(args.think_ms / 1000)
+
+    calls = [call("heavy", "heavy", INTERACTIVE) for _ in range(args.burst)]
+    calls += [call("background", f"light-{index % args.light_users}", BACKGROUND) for index in range(args.background)]
+    calls += [light_user(index) for index in range(args.light_users)]
+    await asyncio.gather(*calls)
+
+    return {
+        "wait": {kind: summarize(values) for kind, values in waits.items()},
+        "heavy_burst_done_s": round(max(heavy_done), 2),
+        "total_s": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = {
+        "capacity": args.capacity,
+        "user_cap": args.user_cap,
+        "burst": args.burst,
+        "light_users": args.light_users,
+        "latency_ms": args.latency_ms,
+        "results": {},
+    }
+    for strategy in ("fifo", "fair", "fair+cap"):
+        report["results"][strategy] = asyncio.run(run_workload(strategy, args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Partitioned vs unpartitioned chat_messages on Postgres
+Loads the same synthetic history (default 10M messages over 24 months) into a
+plain table and a monthly range-partitioned one, then measures single-row
+insert latency, history-fetch latency for recent sessions and the cost of
+VACUUM ANALYZE on the data that is still being written to
+
+    python -m benchmarks.bench_partitioning --postgres-docker
+    python -m benchmarks.bench_partitioning --database-url postgresql://... --rows 1000000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from contextlib import ExitStack
+from datetime import date
+
+import psycopg2
+
+from benchmarks.harness import percentile, postgres_container
+
+SCHEMAS = {"plain": "bench_plain", "partitioned": "bench_partitioned"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="chat_messages partitioning benchmark")
+    parser.add_argument("--database-url", help="Postgres database to create the benchmark schemas in")
+    parser.add_argument("--postgres-docker", action="store_true", help="Start a throwaway Postgres container")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--sessions", type=int, default=500_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--samples", type=int, default=2000, help="Measured inserts and fetches per table")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schemas afterwards")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def month_start(day: date, offset: int) -> date:
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_schema(cursor, kind: str, first_month: date, months: int):
+    schema = SCHEMAS[kind]
+    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {schema}")
+    cursor.execute(f"""
+        CREATE TABLE {schema}.chat_sessions (
+            id INTEGER PRIMARY KEY,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+    """)
+    # Same columns and indexes the application uses for each variant
+    if kind == "plain":
+        cursor.execute(f"""
+            CREATE TABLE {schema}.chat_messages (
+                id SERIAL PRIMARY KEY,
+                session_id INTEGER NOT NULL REFERENCES {schema}.chat_sessions (id) ON DELETE CASCADE,
+                role VARCHAR(10) NOT NULL,
+                content TEXT NOT NULL,
+                tokens_used INTEGER,
+                model_used VARCHAR(50),
+                response_time INTEGER,
+                created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+            )
+        """)
+        cursor.execute(f"CREATE INDEX ON {schema}.chat_messages (session_id)")
+        cursor.execute(f"CREATE INDEX ON {schema}.chat_messages (created_at)")
+    else:
+        cursor.execute(f"""
+            CREATE TABLE {schema}.chat_messages (
+                id SERIAL NOT NULL,
+                session_id INTEGER NOT NULL REFERENCES {schema}.chat_sessions (id) ON DELETE CASCADE,
+                role VARCHAR(10) NOT NULL,
+                content TEXT NOT NULL,
+                tokens_used INTEGER,
+                model_used VARCHAR(50),
+                response_time INTEGER,
+                created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """)
+        for offset in range(months + 2):
+            start, end = month_start(first_month, offset), month_start(first_month, offset + 1)
+            cursor.execute(
+                f"CREATE TABLE {schema}.chat_messages_y{start.year}m{start.month:02d} "
+                f"PARTITION OF {schema}.chat_messages FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        cursor.execute(f"CREATE TABLE {schema}.chat_messages_default PARTITION OF {schema}.chat_messages DEFAULT")
+    cursor.execute(f"CREATE INDEX ON {schema}.chat_messages (session_id, created_at, id)")
+
+
+def load_data(cursor, kind: str, args, first_month: date):
+    schema = SCHEMAS[kind]
+    span_seconds = (date.today() - first_month).days * 86400
+    # Session start times spread evenly over the whole period; each message follows its session
+    cursor.execute(f"""
+        INSERT INTO {schema}.chat_sessions (id, created_at)
+        SELECT s, TIMESTAMP WITH TIME ZONE '{first_month}' + (s::float8 / {args.sessions} * {span_seconds}) * INTERVAL '1 second'
+        FROM generate_series(1, {args.sessions}) AS s
+    """)
+    per_session = max(1, args.rows // args.sessions)
+    cursor.execute(f"""
+        INSERT INTO {schema}.chat_messages (session_id, role, content, tokens_used, model_used, response_time, created_at)
+        SELECT s.id,
+               CASE WHEN m % 2 = 0 THEN 'USER' ELSE 'ASSISTANT' END,
+               md5((s.id * {per_session} + m)::text) || repeat(' study notes', 20),
+               CASE WHEN m % 2 = 1 THEN 400 END,
+               CASE WHEN m % 2 = 1 THEN 'gpt-4.1-nano' END,
+               CASE WHEN m % 2 = 1 THEN 900 END,
+               LEAST(s.created_at + m * INTERVAL '2 minutes', now())
+        FROM {schema}.chat_sessions s, generate_series(0, {per_session - 1}) AS m
+        ORDER BY 7
+    """)
+    cursor.execute(f"ANALYZE {schema}.chat_sessions")
+    cursor.execute(f"ANALYZE {schema}.chat_messages")
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 0.50), 3),
+        "p95_ms": round(1000 * percentile(values, 0.95), 3),
+        "p99_ms": round(1000 * percentile(values, 0.99), 3),
+    }
+
+
+def measure(cursor, kind: str, args, recent_sessions):
+    schema = SCHEMAS[kind]
+    rng = random.Random(args.seed)
+
+    fetch_times = []
+    for _ in range(args.samples):
+        session_id, session_created = rng.choice(recent_sessions)
+        start = time.perf_counter()
+        if kind == "partitioned":
+            # The application bounds created_at by the session start so older partitions are pruned
+            cursor.execute(
+                f"SELECT id, role, content FROM {schema}.chat_messages "
+                f"WHERE session_id = %s AND created_at >= %s ORDER BY created_at DESC, id DESC LIMIT 10",
+                (session_id, session_created),
+            )
+        else:
+            cursor.execute(
+                f"SELECT id, role, content FROM {schema}.chat_messages "
+                f"WHERE session_id = %s ORDER BY created_at DESC, id DESC LIMIT 10",
+                (session_id,),
+            )
+        cursor.fetchall()
+        fetch_times.append(time.perf_counter() - start)
+
+    insert_times = []
+    for _ in range(args.samples):
+        session_id, _ = rng.choice(recent_sessions)
+        start = time.perf_counter()
+        cursor.execute(
+            f"INSERT INTO {schema}.chat_messages (session_id, role, content) VALUES (%s, 'USER', %s)",
+            (session_id, "benchmark insert " * 10),
+        )
+        insert_times.append(time.perf_counter() - start)
+
+    # Autovacuum on the plain table has to visit every page; the partitioned one only the hot month
+    target = f"{schema}.chat_messages"
+    if kind == "partitioned":
+        today = date.today()
+        target = f"{schema}.chat_messages_y{today.year}m{today.month:02d}"
+    start = time.perf_counter()
+    cursor.execute(f"VACUUM ANALYZE {target}")
+    vacuum_seconds = time.perf_counter() - start
+
+    cursor.execute(f"SELECT pg_total_relation_size('{schema}.chat_messages')")
+    size = cursor.fetchone()[0]
+    if kind == "partitioned":
+        cursor.execute(
+            "SELECT coalesce(sum(pg_total_relation_size(inhrelid)), 0)::bigint FROM pg_inherits "
+            "WHERE inhparent = %s::regclass", (f"{schema}.chat_messages",)
+        )
+        size = cursor.fetchone()[0]
+
+    return {
+        "history_fetch": summarize(fetch_times),
+        "insert": summarize(insert_times),
+        "vacuum_hot_data_seconds": round(vacuum_seconds, 3),
+        "total_size_mb": round(size / 1024 / 1024, 1),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    first_month = month_start(date.today(), -(args.months - 1))
+    with ExitStack() as stack:
+        if args.database_url:
+            database_url = args.database_url
+        elif args.postgres_docker:
+            database_url = stack.enter_context(postgres_container())
+        else:
+            raise SystemExit("Pass --database-url or --postgres-docker")
+
+        connection = psycopg2.connect(database_url)
+        connection.autocommit = True
+        cursor = connection.cursor()
+        results = {}
+        try:
+            for kind in SCHEMAS:
+                print(f"Loading {args.rows} rows into {kind} table ...", file=sys.stderr)
+                start = time.perf_counter()
+                create_schema(cursor, kind, first_month, args.months)
+                load_data(cursor, kind, args, first_month)
+                load_seconds = time.perf_counter() - start
+
+                cursor.execute(
+                    f"SELECT id, created_at FROM {SCHEMAS[kind]}.chat_sessions "
+                    f"ORDER BY id DESC LIMIT {max(1, args.sessions // args.months)}"
+                )
+                recent_sessions = cursor.fetchall()
+                print(f"Measuring {kind} ...", file=sys.stderr)
+                results[kind] = {"load_seconds": round(load_seconds, 1), **measure(cursor, kind, args, recent_sessions)}
+        finally:
+            if not args.keep:
+                for schema in SCHEMAS.values():
+                    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+            connection.close()
+
+    print(json.dumps({"rows": args.rows, "sessions": args.sessions, "months": args.months, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
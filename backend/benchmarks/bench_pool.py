@@ -0,0 +1,130 @@
+"""
+Database connection pool benchmark
+Runs N threads that repeatedly check out a connection, run a short query and
+return it, for several pool configurations (pool size, pre-ping on/off and
+NullPool as used behind PgBouncer), and reports checkout wait and total
+per-operation latency
+
+    python -m benchmarks.bench_pool --postgres-docker --threads 50
+    python -m benchmarks.bench_pool --database-url postgresql://... --configs 10:20:ping 10:20:noping null
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from contextlib import ExitStack
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool, QueuePool
+
+from benchmarks.harness import percentile, postgres_container
+
+DEFAULT_CONFIGS = ["5:0:ping", "10:20:ping", "10:20:noping", "30:0:noping", "null"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Connection pool checkout benchmark")
+    parser.add_argument("--database-url", help="Database to connect to")
+    parser.add_argument("--postgres-docker", action="store_true", help="Start a throwaway Postgres container")
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--operations", type=int, default=200, help="Checkouts per thread")
+    parser.add_argument("--query-ms", type=float, default=2.0, help="Server-side work per checkout (pg_sleep)")
+    parser.add_argument(
+        "--configs", nargs="+", default=DEFAULT_CONFIGS,
+        help="pool_size:max_overflow:ping|noping, or null for NullPool"
+    )
+    return parser.parse_args(argv)
+
+
+def build_engine(url: str, config: str):
+    if config == "null":
+        return create_engine(url, poolclass=NullPool)
+    size, overflow, ping = config.split(":")
+    return create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=int(size),
+        max_overflow=int(overflow),
+        pool_pre_ping=ping == "ping",
+        pool_timeout=60,
+    )
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 0.50), 3),
+        "p95_ms": round(1000 * percentile(values, 0.95), 3),
+        "p99_ms": round(1000 * percentile(values, 0.99), 3),
+    }
+
+
+def run_config(url: str, config: str, args):
+    engine = build_engine(url, config)
+    is_postgres = engine.dialect.name == "postgresql"
+    query = text("SELECT pg_sleep(:seconds)") if is_postgres else text("SELECT 1")
+    params = {"seconds": args.query_ms / 1000} if is_postgres else {}
+
+    checkout_times, operation_times = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker():
+        local_checkout, local_operation = [], []
+        barrier.wait()
+        for _ in range(args.operations):
+            start = time.perf_counter()
+            with engine.connect() as connection:
+                checked_out = time.perf_counter()
+                connection.execute(query, params)
+            local_checkout.append(checked_out - start)
+            local_operation.append(time.perf_counter() - start)
+        with lock:
+            checkout_times.extend(local_checkout)
+            operation_times.extend(local_operation)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    return {
+        "checkout": summarize(checkout_times),
+        "operation": summarize(operation_times),
+        "throughput_per_second": round(len(operation_times) / elapsed, 1),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with ExitStack() as stack:
+        if args.database_url:
+            database_url = args.database_url
+        elif args.postgres_docker:
+            database_url = stack.enter_context(postgres_container())
+        else:
+            raise SystemExit("Pass --database-url or --postgres-docker")
+
+        results = {}
+        for config in args.configs:
+            print(f"Running {config} ...", file=sys.stderr)
+            results[config] = run_config(database_url, config, args)
+
+    print(json.dumps({
+        "threads": args.threads,
+        "operations_per_thread": args.operations,
+        "query_ms": args.query_ms,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
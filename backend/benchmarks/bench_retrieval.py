@@ -0,0 +1,101 @@
+"""
+Course material retrieval benchmark
+Builds a synthetic per-user corpus with the real chunker and segment writer,
+then measures incremental indexing, cold open (memory-mapped segments, term
+dictionaries only) and warm top-k query latency
+
+    python -m benchmarks.bench_retrieval --documents 200 --words 5000 --queries 500
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+
+from app.services.course_index import CourseIndex
+from benchmarks.harness import percentile
+
+VOCABULARY_SIZE = 20000
+
+
+def synthetic_words(rng: random.Random, count: int):
+    # Zipf-like term distribution, so common and rare terms behave roughly like real notes
+    return [f"term{min(int(rng.paretovariate(1.1)), VOCABULARY_SIZE)}" for _ in range(count)]
+
+
+def synthetic_document(rng: random.Random, words: int) -> str:
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        size = min(remaining, rng.randint(40, 160))
+        paragraphs.append(" ".join(synthetic_words(rng, size)))
+        remaining -= size
+    return "\n\n".join(paragraphs)
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 0.50), 3),
+        "p95_ms": round(1000 * percentile(values, 0.95), 3),
+        "p99_ms": round(1000 * percentile(values, 0.99), 3),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Course material retrieval benchmark")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--words", type=int, default=4000, help="Words per document")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--chunk-words", type=int, default=180)
+    parser.add_argument("--overlap-words", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    root = tempfile.mkdtemp(prefix="studybuddy-retrieval-")
+    try:
+        index = CourseIndex(root)
+        add_times = []
+        chunks = 0
+        for document_id in range(args.documents):
+            text = synthetic_document(rng, args.words)
+            start = time.perf_counter()
+            chunks += index.add_document(1, "biology", document_id, text, args.chunk_words, args.overlap_words)
+            add_times.append(time.perf_counter() - start)
+
+        # A fresh index object stands in for a newly started worker
+        cold_index = CourseIndex(root, max_open_segments=args.documents)
+        start = time.perf_counter()
+        cold_index.search(1, "biology", "term1 term2", args.top_k)
+        cold_open = time.perf_counter() - start
+
+        query_times = []
+        for _ in range(args.queries):
+            query = " ".join(synthetic_words(rng, rng.randint(3, 12)))
+            start = time.perf_counter()
+            cold_index.search(1, "biology", query, args.top_k)
+            query_times.append(time.perf_counter() - start)
+
+        report = {
+            "documents": args.documents,
+            "chunks": chunks,
+            "add_document": summarize(add_times),
+            "cold_open_first_query_ms": round(cold_open * 1000, 3),
+            "query": summarize(query_times),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Cold start benchmark
+Measures how long `import app.main` takes in a fresh interpreter, then boots
+the API repeatedly and records time until /livez first answers and the latency
+of the first register (first bcrypt use) and first chat message (first use of
+the OpenAI client, against the fake server) for each startup mode:
+
+    create-schema:  DB_AUTO_CREATE_SCHEMA=true,  STARTUP_PREWARM=false
+    no-ddl:         DB_AUTO_CREATE_SCHEMA=false, STARTUP_PREWARM=false
+    no-ddl-prewarm: DB_AUTO_CREATE_SCHEMA=false, STARTUP_PREWARM=true
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --postgres-docker --runs 5
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import ExitStack
+
+import httpx
+
+from benchmarks.harness import (
+    BACKEND_DIR,
+    _terminate,
+    app_environment,
+    fake_openai_server,
+    free_port,
+    percentile,
+    postgres_container,
+    sqlite_database,
+)
+
+MODES = {
+    "create-schema": {"DB_AUTO_CREATE_SCHEMA": "true", "STARTUP_PREWARM": "false"},
+    "no-ddl": {"DB_AUTO_CREATE_SCHEMA": "false", "STARTUP_PREWARM": "false"},
+    "no-ddl-prewarm": {"DB_AUTO_CREATE_SCHEMA": "false", "STARTUP_PREWARM": "true"},
+}
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+SCHEMA_SNIPPET = (
+    "from app.db.base import Base; from app.db import models; from app.db.session import engine; "
+    "Base.metadata.create_all(bind=engine)"
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--database-url", help="Database to boot against (default: temporary SQLite file)")
+    parser.add_argument("--postgres-docker", action="store_true", help="Start a throwaway Postgres container")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    return parser.parse_args(argv)
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "runs": len(values),
+        "p50_ms": round(1000 * percentile(values, 0.50), 1),
+        "max_ms": round(1000 * values[-1], 1) if values else 0.0,
+    }
+
+
+def measure_import(env) -> float:
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env, text=True)
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_boot(env):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"API exited with code {process.returncode} during startup")
+                try:
+                    if client.get("/livez").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    time.sleep(0.01)
+            first_response = time.perf_counter() - start
+
+            name = uuid.uuid4().hex[:12]
+            request_start = time.perf_counter()
+            response = client.post("/api/auth/register", json={
+                "email": f"{name}@example.com", "username": name, "password": "benchmark-password"
+            })
+            response.raise_for_status()
+            register = time.perf_counter() - request_start
+            client_token = response.json()["access_token"]
+
+            headers = {"Authorization": f"Bearer {client_token}"}
+            request_start = time.perf_counter()
+            client.post("/api/chat/message", headers=headers, json={
+                "content": "Explain osmosis", "subject": "biology"
+            }).raise_for_status()
+            message = time.perf_counter() - request_start
+        return first_response, register, message
+    finally:
+        _terminate(process)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with ExitStack() as stack:
+        if args.database_url:
+            database_url = args.database_url
+        elif args.postgres_docker:
+            database_url = stack.enter_context(postgres_container())
+        else:
+            database_url = stack.enter_context(sqlite_database())
+        llm_base_url = stack.enter_context(fake_openai_server(latency_ms=50))
+
+        # Stands in for running migrations, so the no-ddl modes find their tables
+        subprocess.check_call(
+            [sys.executable, "-c", SCHEMA_SNIPPET], cwd=BACKEND_DIR,
+            env=app_environment(database_url, llm_base_url)
+        )
+
+        report = {}
+        for mode in args.modes:
+            env = app_environment(database_url, llm_base_url, MODES[mode])
+            imports, first_responses, registers, messages = [], [], [], []
+            for run in range(args.runs):
+                print(f"{mode}: run {run + 1}/{args.runs}", file=sys.stderr)
+                imports.append(measure_import(env))
+                first_response, register, message = measure_boot(env)
+                first_responses.append(first_response)
+                registers.append(register)
+                messages.append(message)
+            report[mode] = {
+                "import_app": summarize(imports),
+                "time_to_first_response": summarize(first_responses),
+                "first_register": summarize(registers),
+                "first_chat_message": summarize(messages),
+            }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Compare two benchmark result files
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+
+import argparse
+import json
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors")
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{100 * (after - before) / before:+.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["scenarios"]
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)["scenarios"]
+
+    for name in sorted(set(baseline) & set(candidate)):
+        print(name)
+        for metric in METRICS:
+            before, after = baseline[name][metric], candidate[name][metric]
+            print(f"  {metric:<16}{before:>12}{after:>12}{_change(before, after):>10}")
+
+
+if __name__ == "__main__":
+    main()
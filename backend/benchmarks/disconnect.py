@@ -0,0 +1,144 @@
+"""
+Client disconnect check
+Starts the API against a slow fake OpenAI server and abandons requests while
+they are waiting on the LLM: a single message and a batch (client timeouts)
+and a streamed batch (closed before the first result). Once the fake answers
+would have been ready it verifies that:
+
+    - every upstream call was cancelled (llm_cancelled_total, and the fake
+      server saw each caller hang up)
+    - each abandoned request is counted in chat_client_disconnects_total
+    - no message from an abandoned request was persisted
+
+    python -m benchmarks.disconnect
+    python -m benchmarks.disconnect --llm-latency-ms 5000 --batch-size 4
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import ExitStack
+from typing import Dict
+
+import httpx
+
+from benchmarks.graceful_shutdown import count_answers
+from benchmarks.harness import api_server, fake_openai_server, postgres_container, sqlite_database
+from benchmarks.scenarios import QUESTIONS, _auth, register_users
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Client disconnect check")
+    parser.add_argument("--database-url", help="Database to run against (default: temporary SQLite file)")
+    parser.add_argument("--postgres-docker", action="store_true", help="Start a throwaway Postgres container")
+    parser.add_argument("--llm-latency-ms", type=float, default=3000.0)
+    parser.add_argument("--disconnect-after-ms", type=float, default=800.0)
+    parser.add_argument("--batch-size", type=int, default=3)
+    return parser.parse_args(argv)
+
+
+def metric_totals(exposition: str, name: str) -> Dict[str, float]:
+    # Sums the samples of one metric per label set, e.g. {'endpoint="message"': 1.0}
+    totals = {}
+    for line in exposition.splitlines():
+        if not line.startswith(name):
+            continue
+        sample, _, value = line.rpartition(" ")
+        if sample == name or sample.startswith(name + "{"):
+            labels = sample[len(name):].strip("{}")
+            totals[labels] = totals.get(labels, 0.0) + float(value)
+    return totals
+
+
+async def abandon_requests(base_url: str, llm_base_url: str, args) -> dict:
+    timeout = args.disconnect_after_ms / 1000
+    prompts = [QUESTIONS[index % len(QUESTIONS)] for index in range(args.batch_size)]
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        users = await register_users(client, 3, 3)
+        outcomes = {}
+
+        async def abandon(name: str, path: str, payload: dict, user: Dict[str, str]):
+            try:
+                response = await client.post(path, headers=_auth(user), json=payload, timeout=timeout)
+                outcomes[name] = response.status_code
+            except httpx.TimeoutException:
+                outcomes[name] = "abandoned"
+
+        async def read_stream(user: Dict[str, str]) -> int:
+            async with client.stream(
+                "POST", "/api/chat/message/batch", headers=_auth(user),
+                json={"prompts": prompts, "subject": "biology", "stream": True}
+            ) as response:
+                await response.aread()
+            return response.status_code
+
+        async def abandon_stream(user: Dict[str, str]):
+            # Headers only arrive with the first result, so the whole exchange is timed out
+            try:
+                outcomes["stream"] = await asyncio.wait_for(read_stream(user), timeout)
+            except asyncio.TimeoutError:
+                outcomes["stream"] = "abandoned"
+
+        await asyncio.gather(
+            abandon("message", "/api/chat/message", {"content": prompts[0], "subject": "biology"}, users[0]),
+            abandon("batch", "/api/chat/message/batch", {"prompts": prompts, "subject": "biology"}, users[1]),
+            abandon_stream(users[2]),
+        )
+
+        # Past the point where the fake answers would have arrived
+        await asyncio.sleep(args.llm_latency_ms / 1000 + 1.0)
+        exposition = (await client.get("/metrics")).text
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        upstream = (await client.get(llm_base_url.rsplit("/v1", 1)[0] + "/stats")).json()
+
+    return {
+        "outcomes": outcomes,
+        "disconnects": metric_totals(exposition, "chat_client_disconnects_total"),
+        "llm_cancelled": sum(metric_totals(exposition, "llm_cancelled_total").values()),
+        "llm_cancelled_prompt_tokens": sum(metric_totals(exposition, "llm_cancelled_prompt_tokens_total").values()),
+        "llm_cancelled_completion_budget": sum(
+            metric_totals(exposition, "llm_cancelled_completion_budget_tokens_total").values()
+        ),
+        "upstream": upstream,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with ExitStack() as stack:
+        if args.database_url:
+            database_url = args.database_url
+        elif args.postgres_docker:
+            database_url = stack.enter_context(postgres_container())
+        else:
+            database_url = stack.enter_context(sqlite_database())
+        llm_base_url = stack.enter_context(fake_openai_server(latency_ms=args.llm_latency_ms, jitter_ms=0))
+        base_url = stack.enter_context(api_server(database_url, llm_base_url, extra_env={
+            "LLM_COALESCE_ENABLED": "false",
+            "CHAT_BATCH_CONCURRENCY": str(args.batch_size),
+        }))
+
+        answers_before = count_answers(database_url)
+        report = asyncio.run(abandon_requests(base_url, llm_base_url, args))
+        report["answers_persisted"] = count_answers(database_url) - answers_before
+
+    expected_calls = 1 + 2 * args.batch_size
+    disconnects = report["disconnects"]
+    report["passed"] = (
+        all(outcome == "abandoned" for outcome in report["outcomes"].values())
+        and all(
+            disconnects.get(f'endpoint="{endpoint}"') == 1
+            for endpoint in ("message", "message_batch", "message_batch_stream")
+        )
+        and report["llm_cancelled"] == expected_calls
+        and report["upstream"]["requests"] == expected_calls
+        and report["upstream"]["abandoned"] == expected_calls
+        and report["answers_persisted"] == 0
+    )
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
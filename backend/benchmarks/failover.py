@@ -0,0 +1,118 @@
+"""
+Multi-provider routing check against local fake servers
+Boots a "primary" and a "local" fake OpenAI server, points the API at both
+through LLM_PROVIDERS and runs chat turns under three conditions:
+
+    healthy  - both fast; the primary should serve nearly everything
+    slow     - primary's first token far slower than the hedge delay; hedges win
+    down     - primary fails every request; traffic fails over
+
+    python -m benchmarks.failover --requests 40 --hedge-delay-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import ExitStack
+
+import httpx
+
+from benchmarks.harness import LatencyRecorder, api_server, fake_openai_server, sqlite_database
+from benchmarks.scenarios import QUESTIONS, _auth, _timed, register_users
+
+# Routed completions are streamed, so hedging reacts to first_token_ms
+CONDITIONS = {
+    "healthy": {"latency_ms": 200, "first_token_ms": 150, "error_rate": 0.0},
+    "slow": {"latency_ms": 3000, "first_token_ms": 3000, "error_rate": 0.0},
+    "down": {"latency_ms": 200, "first_token_ms": 150, "error_rate": 1.0},
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="LLM provider failover and hedging check")
+    parser.add_argument("--conditions", default=",".join(CONDITIONS))
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--hedge-delay-ms", type=float, default=500.0)
+    parser.add_argument("--local-latency-ms", type=float, default=300.0)
+    return parser.parse_args(argv)
+
+
+async def chat_turns(base_url: str, requests: int, concurrency: int) -> LatencyRecorder:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        users = await register_users(client, concurrency, concurrency)
+        recorder = LatencyRecorder("chat")
+        statuses = {}
+
+        async def worker(user, count):
+            for index in range(count):
+                response = await _timed(recorder, client.post(
+                    "/api/chat/message",
+                    json={"content": QUESTIONS[index % len(QUESTIONS)]},
+                    headers=_auth(user),
+                ))
+                code = response.status_code if response is not None else "error"
+                statuses[code] = statuses.get(code, 0) + 1
+
+        recorder.start()
+        await asyncio.gather(*(
+            worker(user, requests // concurrency) for user in users
+        ))
+        recorder.stop()
+        recorder.statuses = statuses
+        return recorder
+
+
+def run_condition(name: str, args) -> dict:
+    primary_options = CONDITIONS[name]
+    with ExitStack() as stack:
+        primary_url = stack.enter_context(fake_openai_server(
+            latency_ms=primary_options["latency_ms"],
+            first_token_ms=primary_options["first_token_ms"],
+            jitter_ms=0,
+            error_rate=primary_options["error_rate"],
+        ))
+        local_url = stack.enter_context(fake_openai_server(
+            latency_ms=args.local_latency_ms, first_token_ms=args.local_latency_ms, jitter_ms=0
+        ))
+        providers = [
+            {"name": "primary", "base_url": primary_url, "model": "primary-model"},
+            {"name": "local", "base_url": local_url, "model": "local-model", "weight": 0.5},
+        ]
+        database_url = stack.enter_context(sqlite_database())
+        base_url = stack.enter_context(api_server(database_url, extra_env={
+            "LLM_BACKEND": "routed",
+            "LLM_PROVIDERS": json.dumps(providers),
+            "LLM_HEDGE_DELAY_MS": str(args.hedge_delay_ms),
+            "LLM_COALESCE_ENABLED": "false",
+        }))
+
+        recorder = asyncio.run(chat_turns(base_url, args.requests, args.concurrency))
+        served = {
+            "primary": httpx.get(primary_url.replace("/v1", "/stats")).json(),
+            "local": httpx.get(local_url.replace("/v1", "/stats")).json(),
+        }
+    return {"summary": recorder.summary(), "statuses": recorder.statuses, "upstream": served}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    for name in [c.strip() for c in args.conditions.split(",") if c.strip()]:
+        print(f"Running {name} ...", file=sys.stderr)
+        results[name] = run_condition(name, args)
+
+    header = f"{'condition':<10}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'primary':>10}{'local':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        summary, upstream = result["summary"], result["upstream"]
+        print(
+            f"{name:<10}{summary['requests']:>6}{summary['errors']:>6}{summary['p50_ms']:>10}"
+            f"{summary['p95_ms']:>10}{upstream['primary']['requests']:>10}{upstream['local']['requests']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Fake OpenAI-compatible HTTP server
+Serves /v1/chat/completions (plain and streaming) and /v1/models with
+configurable latency, streaming speed and error rate so the API can be
+benchmarked without network access or token spend
+
+    python -m benchmarks.fake_openai --port 9100 --latency-ms 800 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+WORDS = (
+    "the cell divides into two identical daughter cells during mitosis while "
+    "energy is conserved in every closed system and the derivative measures "
+    "the instantaneous rate of change of a function with respect to its input"
+).split()
+
+
+class FakeOpenAIConfig:
+
+    def __init__(
+        self,
+        latency_ms: float = 500.0,
+        jitter_ms: float = 100.0,
+        first_token_ms: float = 150.0,
+        tokens_per_second: float = 80.0,
+        completion_tokens: int = 200,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.first_token_ms = first_token_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+
+def _estimate_prompt_tokens(messages) -> int:
+    return sum(len(m.get("content") or "") for m in messages) // 4 + 4 * len(messages)
+
+
+def _completion_words(rng: random.Random, max_tokens: int, configured: int):
+    count = max(1, min(max_tokens or configured, configured))
+    return [rng.choice(WORDS) for _ in range(count)]
+
+
+def build_app(config: FakeOpenAIConfig) -> web.Application:
+    stats = {"requests": 0, "errors": 0, "streams": 0, "abandoned": 0}
+
+    async def chat_completions(request: web.Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        if config.random.random() < config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(config.first_token_ms / 1000)
+            return web.json_response(
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+                status=503,
+            )
+
+        model = body.get("model", "fake-model")
+        words = _completion_words(config.random, body.get("max_tokens"), config.completion_tokens)
+        prompt_tokens = _estimate_prompt_tokens(body.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            stats["streams"] += 1
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            await asyncio.sleep(config.first_token_ms / 1000)
+            delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+            for index, word in enumerate(words):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": ("" if index == 0 else " ") + word},
+                        "finish_reason": None,
+                    }],
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                if delay:
+                    await asyncio.sleep(delay)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            await response.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+            await response.write_eof()
+            return response
+
+        latency = max(0.0, config.random.gauss(config.latency_ms, config.jitter_ms))
+        await asyncio.sleep(latency / 1000)
+        if request.transport is None or request.transport.is_closing():
+            # The caller hung up while the answer was being "generated"
+            stats["abandoned"] += 1
+            return web.Response(status=499)
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(words),
+                "total_tokens": prompt_tokens + len(words),
+            },
+        })
+
+    async def get_model(request: web.Request):
+        return web.json_response({
+            "id": request.match_info["model"],
+            "object": "model",
+            "created": 0,
+            "owned_by": "fake",
+        })
+
+    async def get_stats(request: web.Request):
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/v1/models/{model}", get_model)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--first-token-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = FakeOpenAIConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        first_token_ms=args.first_token_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    web.run_app(build_app(config), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
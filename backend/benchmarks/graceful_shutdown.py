@@ -0,0 +1,152 @@
+"""
+Graceful shutdown check
+Boots the production entrypoint (gunicorn -c gunicorn.conf.py) against a slow
+fake OpenAI server, starts a burst of chat messages, sends SIGTERM to the
+master while they are waiting on the LLM, and then verifies that:
+
+    - a connection attempted after the signal is refused
+    - every request that was in flight completes with 201
+    - every answer was committed (assistant rows in chat_messages)
+    - the server exits on its own within the drain deadline
+
+With --llm-latency-ms above --drain-seconds the requests outlive the deadline
+instead; they are expected to fail and the server must still exit in time.
+
+    python -m benchmarks.graceful_shutdown --workers 2 --requests 8
+    python -m benchmarks.graceful_shutdown --llm-latency-ms 8000 --drain-seconds 3
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from benchmarks.harness import (
+    BACKEND_DIR,
+    _terminate,
+    app_environment,
+    fake_openai_server,
+    free_port,
+    postgres_container,
+    sqlite_database,
+    wait_for_http,
+)
+from benchmarks.scenarios import QUESTIONS, _auth, register_users
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Graceful shutdown check")
+    parser.add_argument("--database-url", help="Database to run against (default: temporary SQLite file)")
+    parser.add_argument("--postgres-docker", action="store_true", help="Start a throwaway Postgres container")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=3000.0)
+    parser.add_argument("--signal-after-ms", type=float, default=500.0, help="Delay between starting the burst and SIGTERM")
+    parser.add_argument("--drain-seconds", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def count_answers(database_url: str) -> int:
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(text("SELECT COUNT(*) FROM chat_messages WHERE role = 'ASSISTANT'")).scalar()
+    finally:
+        engine.dispose()
+
+
+async def run_burst(base_url: str, process: subprocess.Popen, args) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.drain_seconds + 30) as client:
+        users = await register_users(client, args.requests, args.requests)
+
+        async def send(index: int):
+            start = time.perf_counter()
+            try:
+                response = await client.post("/api/chat/message", headers=_auth(users[index]), json={
+                    "content": QUESTIONS[index % len(QUESTIONS)], "subject": "biology"
+                })
+                outcome = response.status_code
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            return outcome, time.perf_counter() - start
+
+        tasks = [asyncio.create_task(send(index)) for index in range(args.requests)]
+        await asyncio.sleep(args.signal_after_ms / 1000)
+        process.send_signal(signal.SIGTERM)
+        signalled_at = time.perf_counter()
+
+        # The listening socket should be gone almost immediately
+        await asyncio.sleep(0.5)
+        try:
+            async with httpx.AsyncClient(base_url=base_url, timeout=2.0) as fresh:
+                late = (await fresh.get("/livez")).status_code
+        except httpx.HTTPError as e:
+            late = type(e).__name__
+
+        results = await asyncio.gather(*tasks)
+    exit_code = await asyncio.to_thread(process.wait, args.drain_seconds + 30)
+    return {
+        "outcomes": [outcome for outcome, _ in results],
+        "latest_response_s": round(max(duration for _, duration in results), 2),
+        "request_after_signal": late,
+        "exit_code": exit_code,
+        "shutdown_s": round(time.perf_counter() - signalled_at, 2),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with ExitStack() as stack:
+        if args.database_url:
+            database_url = args.database_url
+        elif args.postgres_docker:
+            database_url = stack.enter_context(postgres_container())
+        else:
+            database_url = stack.enter_context(sqlite_database())
+        llm_base_url = stack.enter_context(fake_openai_server(latency_ms=args.llm_latency_ms, jitter_ms=0))
+
+        port = free_port()
+        env = app_environment(database_url, llm_base_url, {
+            "PORT": str(port),
+            "WEB_CONCURRENCY": str(args.workers),
+            "SHUTDOWN_DRAIN_SECONDS": str(args.drain_seconds),
+            "LLM_COALESCE_ENABLED": "false",
+        })
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            wait_for_http(f"http://127.0.0.1:{port}/readyz", process=process)
+            answers_before = count_answers(database_url)
+            report = asyncio.run(run_burst(f"http://127.0.0.1:{port}", process, args))
+        finally:
+            _terminate(process)
+        report["answers_persisted"] = count_answers(database_url) - answers_before
+
+    report["requests"] = args.requests
+    report["completed"] = sum(1 for outcome in report["outcomes"] if outcome == 201)
+    if args.llm_latency_ms / 1000 < args.drain_seconds:
+        report["passed"] = (
+            report["completed"] == args.requests
+            and report["answers_persisted"] == args.requests
+            and report["request_after_signal"] != 200
+            and report["exit_code"] == 0
+        )
+    else:
+        # Past the deadline the requests are cancelled; the server must still exit in time
+        report["passed"] = report["shutdown_s"] <= args.drain_seconds + 15
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
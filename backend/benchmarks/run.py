@@ -0,0 +1,142 @@
+"""
+Run the HTTP load scenarios and store the results as JSON
+
+    python -m benchmarks.run                                  # SQLite + fake OpenAI
+    python -m benchmarks.run --postgres-docker --workers 4
+    python -m benchmarks.run --database-url postgresql://... --scenarios chat_turns
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.harness import (
+    BACKEND_DIR,
+    api_server,
+    fake_openai_server,
+    postgres_container,
+    sqlite_database,
+)
+from benchmarks.scenarios import SCENARIOS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="StudyBuddy AI load benchmarks")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names")
+    parser.add_argument("--database-url", help="Use an existing database instead of a temporary SQLite file")
+    parser.add_argument("--postgres-docker", action="store_true", help="Start a throwaway Postgres container")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--users", type=int, default=20, help="Accounts used by login_storm")
+    parser.add_argument("--sessions-per-user", type=int, default=3)
+    parser.add_argument("--messages-per-session", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=150.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the API process, e.g. --env TRACING_ENABLED=true")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    return parser.parse_args(argv)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_scenarios(base_url: str, names, options):
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        for name in names:
+            print(f"Running {name} ...", file=sys.stderr)
+            recorder = await SCENARIOS[name](client, options)
+            results[name] = recorder.summary()
+    return results
+
+
+def print_table(results):
+    header = f"{'scenario':<18}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, summary in results.items():
+        print(
+            f"{name:<18}{summary['requests']:>7}{summary['errors']:>6}{summary['throughput_rps']:>9}"
+            f"{summary['p50_ms']:>10}{summary['p95_ms']:>10}{summary['p99_ms']:>10}"
+        )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    options = {
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "users": args.users,
+        "sessions_per_user": args.sessions_per_user,
+        "messages_per_session": args.messages_per_session,
+    }
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    with ExitStack() as stack:
+        if args.database_url:
+            database_url = args.database_url
+        elif args.postgres_docker:
+            database_url = stack.enter_context(postgres_container())
+        else:
+            database_url = stack.enter_context(sqlite_database())
+        llm_base_url = stack.enter_context(fake_openai_server(
+            latency_ms=args.llm_latency_ms,
+            jitter_ms=args.llm_jitter_ms,
+            first_token_ms=args.llm_first_token_ms,
+            tokens_per_second=args.llm_tokens_per_second,
+            error_rate=args.llm_error_rate,
+        ))
+        base_url = stack.enter_context(api_server(
+            database_url, llm_base_url, workers=args.workers, extra_env=extra_env
+        ))
+        results = asyncio.run(run_scenarios(base_url, names, options))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": database_url.split(":", 1)[0],
+            "args": vars(args),
+        },
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print_table(results)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
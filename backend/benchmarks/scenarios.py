@@ -0,0 +1,141 @@
+"""
+Load scenarios driven against a running API
+Each scenario does its own untimed setup (accounts, seed data) and then
+records the latency of every measured request
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.harness import LatencyRecorder
+
+PASSWORD = "benchmark-password"
+
+QUESTIONS = [
+    "Explain the stages of mitosis",
+    "What is the difference between speed and velocity?",
+    "How do I solve a quadratic equation by completing the square?",
+    "Why did the Roman Republic collapse?",
+    "What is opportunity cost?",
+    "How does a hash table handle collisions?",
+]
+
+
+async def _timed(recorder: LatencyRecorder, request) -> httpx.Response:
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        recorder.record(time.perf_counter() - start, ok=False)
+        return None
+    recorder.record(time.perf_counter() - start, ok=response.status_code < 400)
+    return response
+
+
+async def register_users(client: httpx.AsyncClient, count: int, concurrency: int) -> List[Dict[str, str]]:
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def register(index: int) -> Dict[str, str]:
+        username = f"bench_{run_id}_{index}"
+        async with semaphore:
+            response = await client.post("/api/auth/register", json={
+                "email": f"{username}@bench.example.com",
+                "username": username,
+                "password": PASSWORD,
+            })
+        response.raise_for_status()
+        return {"username": username, "token": response.json()["access_token"]}
+
+    return await asyncio.gather(*(register(i) for i in range(count)))
+
+
+def _auth(user: Dict[str, str]) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {user['token']}"}
+
+
+async def login_storm(client: httpx.AsyncClient, options: Dict[str, int]) -> LatencyRecorder:
+    users = await register_users(client, options["users"], options["concurrency"])
+    recorder = LatencyRecorder("login_storm")
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(options["requests"]):
+        queue.put_nowait(users[index % len(users)])
+
+    async def worker():
+        while not queue.empty():
+            user = queue.get_nowait()
+            await _timed(recorder, client.post("/api/auth/login", json={
+                "email_or_username": user["username"],
+                "password": PASSWORD,
+            }))
+
+    recorder.start()
+    await asyncio.gather(*(worker() for _ in range(options["concurrency"])))
+    recorder.stop()
+    return recorder
+
+
+async def chat_turns(client: httpx.AsyncClient, options: Dict[str, int]) -> LatencyRecorder:
+    users = await register_users(client, options["concurrency"], options["concurrency"])
+    recorder = LatencyRecorder("chat_turns")
+    turns = max(1, options["requests"] // len(users))
+
+    async def conversation(user: Dict[str, str]):
+        session_id = None
+        for turn in range(turns):
+            payload = {"content": QUESTIONS[turn % len(QUESTIONS)], "subject": "biology"}
+            if session_id is not None:
+                payload["session_id"] = session_id
+            response = await _timed(recorder, client.post(
+                "/api/chat/message", json=payload, headers=_auth(user)
+            ))
+            if response is not None and response.status_code < 400 and session_id is None:
+                session_id = response.json()["session_id"]
+
+    recorder.start()
+    await asyncio.gather(*(conversation(user) for user in users))
+    recorder.stop()
+    return recorder
+
+
+async def session_listing(client: httpx.AsyncClient, options: Dict[str, int]) -> LatencyRecorder:
+    users = await register_users(client, options["concurrency"], options["concurrency"])
+    session_ids: Dict[str, List[int]] = {}
+    for user in users:
+        session_ids[user["username"]] = []
+        for _ in range(options["sessions_per_user"]):
+            response = await client.post("/api/chat/message/batch", json={
+                "prompts": QUESTIONS[:options["messages_per_session"]],
+                "subject": "history",
+            }, headers=_auth(user), timeout=300)
+            response.raise_for_status()
+            session_ids[user["username"]].append(response.json()["session_id"])
+
+    recorder = LatencyRecorder("session_listing")
+    per_user = max(1, options["requests"] // len(users))
+
+    async def browse(user: Dict[str, str]):
+        sessions = session_ids[user["username"]]
+        for index in range(per_user):
+            if index % 2 == 0:
+                request = client.get("/api/chat/sessions", headers=_auth(user))
+            else:
+                session_id = sessions[index % len(sessions)]
+                request = client.get(f"/api/chat/sessions/{session_id}/messages", headers=_auth(user))
+            await _timed(recorder, request)
+
+    recorder.start()
+    await asyncio.gather(*(browse(user) for user in users))
+    recorder.stop()
+    return recorder
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "chat_turns": chat_turns,
+    "session_listing": session_listing,
+}
@@ -0,0 +1,63 @@
+"""
+Gunicorn configuration for production
+Runs WEB_CONCURRENCY uvicorn workers forked from one preloaded app. On SIGTERM
+the listening socket is closed at once, requests already running (typically
+waiting on the LLM) get SHUTDOWN_DRAIN_SECONDS to finish and commit, then
+whatever is left is cancelled and the app's shutdown hooks run
+
+    gunicorn -c gunicorn.conf.py app.main:app
+"""
+
+import os
+import shutil
+
+from app.core.config import settings
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "app.core.workers.DrainingUvicornWorker"
+preload_app = True
+graceful_timeout = settings.SHUTDOWN_DRAIN_SECONDS + 15
+keepalive = 5
+accesslog = "-"
+
+# Must exist before preload_app imports the metrics; emptied again in on_starting
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def on_starting(server):
+    # Metric files left by a previous run would otherwise be summed into this one's.
+    # Workers open their own files after forking, so the master's are not needed either
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    # Runs in the master before any worker is forked; workers inherit the flag and skip it
+    if settings.DB_AUTO_CREATE_SCHEMA:
+        from app.main import init_schema
+        from app.db.session import engine
+
+        init_schema()
+        engine.dispose()
+        os.environ["SCHEMA_INITIALIZED"] = "1"
+
+
+def post_fork(server, worker):
+    # Pooled connections must never be shared between processes; each worker opens its own
+    from app.db.session import engine, replica_engine
+
+    engine.dispose(close=False)
+    if replica_engine is not engine:
+        replica_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,42 @@
+import itertools
+import os
+import tempfile
+
+# Settings are read at import time, so the environment must be set before any app module loads
+_data_dir = tempfile.mkdtemp(prefix="studybuddy-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_data_dir, 'app.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("LLM_BACKEND", "mock")
+os.environ.setdefault("RETRIEVAL_INDEX_DIR", os.path.join(_data_dir, "retrieval"))
+
+import pytest  # noqa: E402
+
+_user_numbers = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    """Registers a fresh user and returns (user json, auth headers)"""
+    def register_user():
+        number = next(_user_numbers)
+        response = client.post("/api/auth/register", json={
+            "email": f"student{number}@example.com",
+            "username": f"student{number}",
+            "password": "password123",
+            "full_name": f"Student {number}",
+        })
+        assert response.status_code == 201, response.text
+        body = response.json()
+        return body["user"], {"Authorization": f"Bearer {body['access_token']}"}
+    return register_user
@@ -0,0 +1,94 @@
+from app.db.models import ArchivedSession, ChatMessage
+from app.db.session import SessionLocal
+from app.services.archive_service import archive_service
+
+
+def _start_session(client, headers, turns: int) -> int:
+    session_id = None
+    for n in range(turns):
+        response = client.post(
+            "/api/chat/message",
+            json={"session_id": session_id, "content": f"Question {n} about photosynthesis"},
+            headers=headers
+        )
+        assert response.status_code == 201
+        session_id = response.json()["session_id"]
+    return session_id
+
+
+def _hot_messages(session_id: int):
+    db = SessionLocal()
+    try:
+        return db.query(ChatMessage).filter(
+            ChatMessage.session_id == session_id
+        ).order_by(ChatMessage.id).all()
+    finally:
+        db.close()
+
+
+def _archive(session_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return archive_service.archive_session(db, session_id)
+    finally:
+        db.close()
+
+
+def _snapshot(messages):
+    return [(m.id, m.role, m.content, m.tokens_used, m.model_used) for m in messages]
+
+
+def test_archived_session_reads_like_a_hot_one(client, register):
+    _, headers = register()
+    session_id = _start_session(client, headers, turns=2)
+    url = f"/api/chat/sessions/{session_id}/messages"
+    before = client.get(url, headers=headers).json()
+    assert len(before) == 4
+
+    assert _archive(session_id)
+
+    assert _hot_messages(session_id) == []
+    assert client.get(url, headers=headers).json() == before
+
+
+def test_restore_brings_back_the_original_rows(client, register):
+    _, headers = register()
+    session_id = _start_session(client, headers, turns=2)
+    original = _snapshot(_hot_messages(session_id))
+    _archive(session_id)
+
+    db = SessionLocal()
+    try:
+        restored = archive_service.restore_session(db, session_id)
+        assert db.get(ArchivedSession, session_id) is None
+    finally:
+        db.close()
+
+    assert restored == len(original) == 4
+    assert _snapshot(_hot_messages(session_id)) == original
+
+
+def test_new_turn_restores_an_archived_session(client, register):
+    _, headers = register()
+    session_id = _start_session(client, headers, turns=1)
+    original = _snapshot(_hot_messages(session_id))
+    _archive(session_id)
+
+    response = client.post(
+        "/api/chat/message",
+        json={"session_id": session_id, "content": "And at night?"},
+        headers=headers
+    )
+
+    assert response.status_code == 201
+    messages = _hot_messages(session_id)
+    assert _snapshot(messages[:2]) == original
+    assert len(messages) == 4
+
+
+def test_archiving_a_session_without_hot_messages_is_a_no_op(client, register):
+    _, headers = register()
+    session_id = _start_session(client, headers, turns=1)
+
+    assert _archive(session_id)
+    assert not _archive(session_id)
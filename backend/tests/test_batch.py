@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.db.models import ChatMessage, MessageRole
+from app.db.session import SessionLocal
+from app.services.ai_service import ai_service
+from app.services.llm_backends import MockBackend
+
+
+class StaggeredBackend(MockBackend):
+    """Mock answers where prompts mentioning "slow" take longer, tracking peak concurrency"""
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.peak = 0
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.2 if "slow" in messages[-1]["content"] else 0.01)
+            return await super().complete(messages, model, max_tokens, temperature, stop)
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    staggered = StaggeredBackend()
+    monkeypatch.setattr(ai_service, "_backend", staggered)
+    return staggered
+
+
+def _stored_prompts(session_id: int):
+    db = SessionLocal()
+    try:
+        return [content for (content,) in db.query(ChatMessage.content).filter(
+            ChatMessage.session_id == session_id,
+            ChatMessage.role == MessageRole.USER
+        ).order_by(ChatMessage.id).all()]
+    finally:
+        db.close()
+
+
+def test_batch_answers_come_back_in_submission_order(client, register, backend):
+    _, headers = register()
+    prompts = ["A slow one: define entropy", "Define enthalpy", "Define free energy"]
+
+    response = client.post("/api/chat/message/batch", json={"prompts": prompts}, headers=headers)
+
+    assert response.status_code == 201
+    batch = response.json()
+    assert [r["user_message"]["content"] for r in batch["results"]] == prompts
+    assert all(r["assistant_message"]["role"] == "assistant" for r in batch["results"])
+    assert all(r["session_id"] == batch["session_id"] for r in batch["results"])
+    assert _stored_prompts(batch["session_id"]) == prompts
+
+
+def test_batch_joins_an_existing_session(client, register, backend):
+    _, headers = register()
+    session = client.post("/api/chat/sessions", json={"title": "Optics"}, headers=headers).json()
+
+    response = client.post(
+        "/api/chat/message/batch",
+        json={"session_id": session["id"], "prompts": ["What is refraction?", "What is diffraction?"]},
+        headers=headers
+    )
+
+    assert response.json()["session_id"] == session["id"]
+    updated = client.get(f"/api/chat/sessions/{session['id']}", headers=headers).json()
+    assert updated["message_count"] == 4
+
+
+def test_batch_concurrency_is_bounded(client, register, backend, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_BATCH_CONCURRENCY", 2)
+    _, headers = register()
+    prompts = [f"slow question {n} about waves" for n in range(5)]
+
+    response = client.post("/api/chat/message/batch", json={"prompts": prompts}, headers=headers)
+
+    assert response.status_code == 201
+    assert backend.peak == 2
+
+
+def test_streamed_batch_sends_each_answer_as_it_finishes(client, register, backend):
+    _, headers = register()
+    prompts = ["A slow one: what is a gene?", "What is an allele?"]
+
+    response = client.post(
+        "/api/chat/message/batch", json={"prompts": prompts, "stream": True}, headers=headers
+    )
+
+    assert response.status_code == 201
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["event"] for e in events] == ["result", "result", "complete"]
+    # The fast prompt is answered first; the final event lists both in submission order
+    assert [e["index"] for e in events[:2]] == [1, 0]
+    complete = events[-1]
+    assert [r["user_message"]["content"] for r in complete["results"]] == prompts
+    assert _stored_prompts(complete["session_id"]) == prompts
+
+
+def test_oversized_batch_is_rejected(client, register):
+    _, headers = register()
+    prompts = ["q"] * (settings.CHAT_BATCH_MAX_PROMPTS + 1)
+
+    response = client.post("/api/chat/message/batch", json={"prompts": prompts}, headers=headers)
+
+    assert response.status_code == 422
@@ -0,0 +1,158 @@
+import asyncio
+import json
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.disconnect import ClientDisconnected, cancel_on_disconnect
+from app.db.models import ChatMessage, ChatSession
+from app.db.session import SessionLocal
+from app.services.ai_service import ai_service
+from app.services.llm_backends import MockBackend
+
+
+class BlockingBackend(MockBackend):
+    """Mock answers, except that while blocking is set every call hangs until cancelled"""
+
+    def __init__(self):
+        super().__init__()
+        self.blocking = True
+        self.started = asyncio.Event()
+        self.cancelled = 0
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        if self.blocking:
+            self.started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return await super().complete(messages, model, max_tokens, temperature, stop)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    blocking = BlockingBackend()
+    monkeypatch.setattr(ai_service, "_backend", blocking)
+    return blocking
+
+
+def _abandon(client, backend, path: str, payload: dict, headers: dict) -> list:
+    """Sends a request straight to the app and hangs up once the LLM call has started"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    body_sent = False
+    sent = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": json.dumps(payload).encode(), "more_body": False}
+        await backend.started.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def call():
+        await asyncio.wait_for(client.app(scope, receive, send), timeout=10)
+
+    # On the test client's event loop, where the app's startup ran
+    client.portal.call(call)
+    return sent
+
+
+def _cancelled_total() -> float:
+    return REGISTRY.get_sample_value("llm_cancelled_total", {"model": ai_service.model}) or 0.0
+
+
+def _message_count(user_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(ChatMessage).join(ChatSession).filter(ChatSession.user_id == user_id).count()
+    finally:
+        db.close()
+
+
+def test_disconnect_cancels_the_llm_call(client, register, backend):
+    user, headers = register()
+    cancelled_before = _cancelled_total()
+
+    _abandon(client, backend, "/api/chat/message", {"content": "What is osmosis?"}, headers)
+
+    assert backend.cancelled == 1
+    assert _cancelled_total() == cancelled_before + 1
+    assert _message_count(user["id"]) == 0
+
+
+def test_disconnect_cancels_every_batch_call(client, register, backend):
+    user, headers = register()
+
+    _abandon(client, backend, "/api/chat/message/batch", {"prompts": ["q1", "q2", "q3"]}, headers)
+
+    assert backend.cancelled == 3
+    assert _message_count(user["id"]) == 0
+
+
+def test_disconnect_releases_the_idempotency_key(client, register, backend):
+    user, headers = register()
+    headers = {**headers, "Idempotency-Key": "retry-after-disconnect"}
+    payload = {"content": "What is diffusion?"}
+
+    _abandon(client, backend, "/api/chat/message", payload, headers)
+    assert backend.cancelled == 1
+
+    backend.blocking = False
+    retry = client.post("/api/chat/message", json=payload, headers=headers)
+
+    assert retry.status_code == 201, retry.text
+    assert "Idempotent-Replayed" not in retry.headers
+    assert _message_count(user["id"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect_returns_the_result():
+    class Connected:
+        async def receive(self):
+            await asyncio.sleep(10)
+
+    async def work():
+        return "answer"
+
+    assert await cancel_on_disconnect(Connected(), work()) == "answer"
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect_cancels_the_work():
+    class Gone:
+        async def receive(self):
+            return {"type": "http.disconnect"}
+
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ClientDisconnected):
+        await cancel_on_disconnect(Gone(), work())
+    assert cancelled.is_set()
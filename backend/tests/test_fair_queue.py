@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from app.core.fair_queue import FairScheduler
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def _queue(scheduler: FairScheduler, key, order, priority=0, weight=1.0):
+    async def run():
+        await scheduler.acquire(key, weight=weight, priority=priority)
+        order.append(key)
+    return asyncio.create_task(run())
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        FairScheduler(0)
+
+
+@pytest.mark.asyncio
+async def test_keys_take_turns_regardless_of_backlog():
+    scheduler = FairScheduler(1)
+    await scheduler.acquire("blocker")
+    order = []
+    tasks = [_queue(scheduler, "heavy", order) for _ in range(4)]
+    tasks.append(_queue(scheduler, "light", order))
+    await _settle()
+    assert scheduler.queued() == 5
+
+    for _ in range(5):
+        scheduler.release(order[-1] if order else "blocker")
+        await _settle()
+    await asyncio.gather(*tasks)
+    # The light user's single request goes second, not behind the heavy user's whole burst
+    assert order[:2] == ["heavy", "light"]
+
+
+@pytest.mark.asyncio
+async def test_weight_gives_a_larger_share():
+    scheduler = FairScheduler(1)
+    await scheduler.acquire("blocker")
+    order = []
+    tasks = [_queue(scheduler, "admin", order, weight=2.0) for _ in range(4)]
+    tasks += [_queue(scheduler, "student", order) for _ in range(4)]
+    await _settle()
+
+    for _ in range(8):
+        scheduler.release(order[-1] if order else "blocker")
+        await _settle()
+    await asyncio.gather(*tasks)
+    assert order[:6].count("admin") == 4
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_class_served_first():
+    scheduler = FairScheduler(1)
+    await scheduler.acquire("blocker")
+    order = []
+    background = _queue(scheduler, "background", order, priority=1)
+    await _settle()
+    interactive = _queue(scheduler, "interactive", order, priority=0)
+    await _settle()
+
+    scheduler.release("blocker")
+    await _settle()
+    scheduler.release(order[-1])
+    await asyncio.gather(background, interactive)
+    assert order == ["interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_per_key_cap_leaves_slots_for_others():
+    scheduler = FairScheduler(3, max_per_key=2)
+    order = []
+    tasks = [_queue(scheduler, "heavy", order) for _ in range(3)]
+    tasks.append(_queue(scheduler, "light", order))
+    await _settle()
+
+    assert sorted(order) == ["heavy", "heavy", "light"]
+    assert scheduler.active == 3
+    assert scheduler.queued() == 1
+
+    scheduler.release("heavy")
+    await asyncio.gather(*tasks)
+    assert scheduler.queued() == 0
+
+
+@pytest.mark.asyncio
+async def test_promote_moves_background_ahead():
+    scheduler = FairScheduler(1)
+    await scheduler.acquire("blocker")
+    order = []
+    speculative = _queue(scheduler, "student", order, priority=1)
+    await _settle()
+    other = _queue(scheduler, "other", order, priority=1)
+    await _settle()
+    interactive = _queue(scheduler, "someone", order, priority=0)
+    await _settle()
+
+    scheduler.promote("student", 0)
+    assert scheduler.queued(priority=1) == 1
+
+    for _ in range(3):
+        scheduler.release(order[-1] if order else "blocker")
+        await _settle()
+    await asyncio.gather(speculative, other, interactive)
+    assert order.index("student") < order.index("other")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = FairScheduler(1)
+    await scheduler.acquire("blocker")
+    waiter = asyncio.create_task(scheduler.acquire("gone"))
+    await _settle()
+    assert scheduler.queued() == 1
+
+    waiter.cancel()
+    await _settle()
+    assert scheduler.queued() == 0
+
+    scheduler.release("blocker")
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_releases_on_exit():
+    scheduler = FairScheduler(1)
+    async with scheduler.slot("user") as waited:
+        assert waited >= 0
+        assert scheduler.active == 1
+    assert scheduler.active == 0
@@ -0,0 +1,98 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.db.models import ChatSession
+from app.db.session import SessionLocal
+from app.services.ai_service import ai_service
+from app.services.llm_backends import MockBackend
+
+
+class CountingBackend(MockBackend):
+    """Mock answers that take delay seconds, counting upstream calls"""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+
+    async def complete(self, messages, model, max_tokens, temperature, stop=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return await super().complete(messages, model, max_tokens, temperature, stop)
+
+
+def _session_count(user_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(ChatSession).filter(ChatSession.user_id == user_id).count()
+    finally:
+        db.close()
+
+
+def test_retry_replays_the_stored_response(client, register):
+    user, headers = register()
+    headers = {**headers, "Idempotency-Key": "create-1"}
+
+    first = client.post("/api/chat/sessions", json={"title": "Cells"}, headers=headers)
+    retry = client.post("/api/chat/sessions", json={"title": "Cells"}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert _session_count(user["id"]) == 1
+
+
+def test_same_key_with_a_different_body_is_rejected(client, register):
+    _, headers = register()
+    headers = {**headers, "Idempotency-Key": "create-2"}
+
+    client.post("/api/chat/sessions", json={"title": "Cells"}, headers=headers)
+    conflict = client.post("/api/chat/sessions", json={"title": "Atoms"}, headers=headers)
+
+    assert conflict.status_code == 422
+
+
+def test_keys_are_scoped_per_user(client, register):
+    first_user, first_headers = register()
+    second_user, second_headers = register()
+
+    for headers in (first_headers, second_headers):
+        response = client.post(
+            "/api/chat/sessions", json={"title": "Cells"},
+            headers={**headers, "Idempotency-Key": "shared-key"}
+        )
+        assert "Idempotent-Replayed" not in response.headers
+
+    assert _session_count(first_user["id"]) == _session_count(second_user["id"]) == 1
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, register):
+    user, headers = register()
+    client.post("/api/chat/sessions", json={"title": "Cells"}, headers=headers)
+    client.post("/api/chat/sessions", json={"title": "Cells"}, headers=headers)
+    assert _session_count(user["id"]) == 2
+
+
+@pytest.fixture
+def slow_backend(monkeypatch):
+    backend = CountingBackend(delay=0.5)
+    monkeypatch.setattr(ai_service, "_backend", backend)
+    return backend
+
+
+def test_concurrent_retry_waits_for_the_original(client, register, slow_backend):
+    _, headers = register()
+    headers = {**headers, "Idempotency-Key": "message-1"}
+    payload = {"content": "Explain photosynthesis"}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(pool.map(
+            lambda _: client.post("/api/chat/message", json=payload, headers=headers), range(2)
+        ))
+
+    assert [response.status_code for response in responses] == [201, 201]
+    assert sorted("Idempotent-Replayed" in response.headers for response in responses) == [False, True]
+    assert responses[0].json() == responses[1].json()
+    assert slow_backend.calls == 1
@@ -0,0 +1,33 @@
+import json
+import time
+
+import pytest
+
+from app.services.llm_recording import ReplayBackend
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    path.write_text(json.dumps({"fingerprint": "any", "response": {"content": "answer"}}) + "\n")
+    return str(path)
+
+
+async def _delay(backend: ReplayBackend, offset_ms: float) -> float:
+    start = time.perf_counter()
+    await backend._sleep_until(start, offset_ms)
+    return (time.perf_counter() - start) * 1000
+
+
+@pytest.mark.asyncio
+async def test_higher_speed_replays_faster(recording):
+    normal = await _delay(ReplayBackend(recording, speed=1.0), 200)
+    fast = await _delay(ReplayBackend(recording, speed=4.0), 200)
+
+    assert normal >= 190
+    assert 40 <= fast < 120
+
+
+@pytest.mark.asyncio
+async def test_zero_speed_skips_delays(recording):
+    assert await _delay(ReplayBackend(recording, speed=0), 500) < 50
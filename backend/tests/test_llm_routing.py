@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_backends import LLMBackend, LLMUnavailableError
+from app.services.llm_routing import Provider, RoutingBackend
+
+
+class SlowBackend(LLMBackend):
+    """Streams its answer after first_token_s, then takes body_s more to finish"""
+
+    def __init__(self, answer: str, first_token_s: float, body_s: float = 0.0, fail: bool = False):
+        self.answer = answer
+        self.first_token_s = first_token_s
+        self.body_s = body_s
+        self.fail = fail
+        self.calls = 0
+
+    async def stream(self, messages, model, max_tokens, temperature, stop=None):
+        self.calls += 1
+        await asyncio.sleep(self.first_token_s)
+        if self.fail:
+            raise RuntimeError("upstream error")
+        yield {"type": "delta", "content": self.answer}
+        await asyncio.sleep(self.body_s)
+        yield {
+            "type": "done",
+            "content": self.answer,
+            "prompt_tokens": 1,
+            "completion_tokens": 1,
+            "tokens_used": 2,
+            "model_used": model,
+            "response_time": 0,
+        }
+
+
+def _router(primary: LLMBackend, secondary: LLMBackend, hedge_delay_ms: float = 50.0) -> RoutingBackend:
+    return RoutingBackend(
+        [Provider("primary", primary), Provider("secondary", secondary)],
+        hedge_delay_ms=hedge_delay_ms,
+    )
+
+
+async def _complete(router: RoutingBackend):
+    return await router.complete([{"role": "user", "content": "hi"}], "model", 16, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_long_answer_with_fast_first_token_is_not_hedged():
+    primary = SlowBackend("primary", first_token_s=0.01, body_s=0.2)
+    secondary = SlowBackend("secondary", first_token_s=0.01)
+
+    result = await _complete(_router(primary, secondary))
+
+    assert result["content"] == "primary"
+    assert "type" not in result
+    assert secondary.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_first_token_is_hedged():
+    primary = SlowBackend("primary", first_token_s=1.0)
+    secondary = SlowBackend("secondary", first_token_s=0.01)
+
+    result = await _complete(_router(primary, secondary))
+
+    assert result["content"] == "secondary"
+    assert primary.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_fails_over():
+    primary = SlowBackend("primary", first_token_s=0.0, fail=True)
+    secondary = SlowBackend("secondary", first_token_s=0.0)
+
+    result = await _complete(_router(primary, secondary, hedge_delay_ms=0))
+
+    assert result["content"] == "secondary"
+
+
+@pytest.mark.asyncio
+async def test_all_providers_failing_raises():
+    router = _router(
+        SlowBackend("a", first_token_s=0.0, fail=True),
+        SlowBackend("b", first_token_s=0.0, fail=True),
+    )
+    with pytest.raises(LLMUnavailableError):
+        await _complete(router)
@@ -0,0 +1,50 @@
+def _pdf(text: str) -> bytes:
+    """A one-page PDF showing text in Helvetica"""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def _upload(client, headers, filename: str, data: bytes):
+    return client.post(
+        "/api/materials/upload",
+        data={"subject": "biology"},
+        files={"file": (filename, data)},
+        headers=headers,
+    )
+
+
+def test_pdf_upload_is_indexed(client, register):
+    _, headers = register()
+    response = _upload(client, headers, "cells.pdf", _pdf("Mitochondria produce ATP for the cell"))
+
+    assert response.status_code == 201, response.text
+    assert response.json()["chunk_count"] >= 1
+
+
+def test_unreadable_pdf_is_rejected(client, register):
+    _, headers = register()
+    response = _upload(client, headers, "broken.pdf", b"%PDF-1.4 not really a pdf")
+    assert response.status_code == 422
+
+
+def test_unsupported_extension_is_rejected(client, register):
+    _, headers = register()
+    response = _upload(client, headers, "slides.pptx", b"binary")
+    assert response.status_code == 415
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session as db_session
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """Points reads at a copy of the primary that only changes when snapshot() is called"""
+    path = tmp_path / "replica.db"
+    replica_engine = create_engine(f"sqlite:///{path}")
+
+    def snapshot():
+        source = sqlite3.connect(db_session.engine.url.database)
+        target = sqlite3.connect(path)
+        with target:
+            source.backup(target)
+        source.close()
+        target.close()
+
+    monkeypatch.setattr(db_session, "replica_engine", replica_engine)
+    monkeypatch.setattr(db_session, "ReadSessionLocal", sessionmaker(bind=replica_engine))
+    monkeypatch.setattr(db_session, "_sticky_until", {})
+    yield snapshot
+    replica_engine.dispose()
+
+
+def _session_titles(client, headers):
+    response = client.get("/api/chat/sessions", headers=headers)
+    assert response.status_code == 200, response.text
+    return [session["title"] for session in response.json()]
+
+
+def _write_then_forget(client, register, replica):
+    _, headers = register()
+    replica()
+    response = client.post("/api/chat/sessions", json={"title": "Fresh"}, headers=headers)
+    assert response.status_code == 201, response.text
+    # As if the next request reached another worker, which never saw this commit
+    db_session._sticky_until.clear()
+    return headers
+
+
+def test_read_right_after_write_goes_to_primary(client, register, replica):
+    headers = _write_then_forget(client, register, replica)
+    assert _session_titles(client, {**headers, "X-Last-Write-Age-Ms": "50"}) == ["Fresh"]
+
+
+def test_read_without_signal_uses_replica(client, register, replica):
+    headers = _write_then_forget(client, register, replica)
+    assert _session_titles(client, headers) == []
+
+
+def test_read_after_sticky_window_uses_replica(client, register, replica):
+    headers = _write_then_forget(client, register, replica)
+    stale_ms = str(int((db_session.settings.DB_REPLICA_STICKY_SECONDS + 1) * 1000))
+    assert _session_titles(client, {**headers, "X-Last-Write-Age-Ms": stale_ms}) == []
+
+
+def test_same_worker_remembers_writes(client, register, replica):
+    _, headers = register()
+    replica()
+    client.post("/api/chat/sessions", json={"title": "Fresh"}, headers=headers)
+    assert _session_titles(client, headers) == ["Fresh"]
+
+
+def test_malformed_header_is_ignored(client, register, replica):
+    headers = _write_then_forget(client, register, replica)
+    assert _session_titles(client, {**headers, "X-Last-Write-Age-Ms": "soon"}) == []
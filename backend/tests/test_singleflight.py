@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "answer"
+
+    callers = [asyncio.create_task(flight.do("key", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert calls == 1
+    assert [value for value, _ in results] == ["answer"] * 5
+    assert [shared for _, shared in results].count(False) == 1
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def echo(value):
+        await asyncio.sleep(0)
+        return value
+
+    first, second = await asyncio.gather(
+        flight.do("a", lambda: echo(1)),
+        flight.do("b", lambda: echo(2)),
+    )
+    assert first == (1, False)
+    assert second == (2, False)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "answer"
+
+    leaving = asyncio.create_task(flight.do("key", fetch))
+    staying = asyncio.create_task(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    leaving.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await staying == ("answer", True)
+    with pytest.raises(asyncio.CancelledError):
+        await leaving
+
+
+@pytest.mark.asyncio
+async def test_last_caller_leaving_cancels_call():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_are_not_cached():
+    flight = SingleFlight()
+    attempts = 0
+
+    async def failing():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        flight.do("key", failing), flight.do("key", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert attempts == 1
+
+    with pytest.raises(RuntimeError):
+        await flight.do("key", failing)
+    assert attempts == 2
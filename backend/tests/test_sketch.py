@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from app.core.sketch import DDSketch
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def _assert_within(sketch, values, accuracy):
+    for q in (0.5, 0.9, 0.95, 0.99):
+        expected = _exact(values, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=accuracy)
+
+
+def test_empty_sketch_has_no_quantiles():
+    sketch = DDSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.mean is None
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(20000)]
+    sketch = DDSketch(0.01)
+    for value in values:
+        sketch.add(value)
+
+    _assert_within(sketch, values, 0.01)
+    assert sketch.count == len(values)
+    assert sketch.min == min(values)
+    assert sketch.max == max(values)
+
+
+def test_merge_matches_a_single_sketch():
+    rng = random.Random(11)
+    values = [rng.expovariate(1 / 800) for _ in range(10000)]
+    whole = DDSketch(0.01)
+    parts = [DDSketch(0.01) for _ in range(4)]
+    for index, value in enumerate(values):
+        whole.add(value)
+        parts[index % 4].add(value)
+
+    merged = DDSketch(0.01)
+    for part in parts:
+        merged.merge(part)
+
+    assert merged.bins == whole.bins
+    assert merged.count == whole.count
+    assert merged.sum == pytest.approx(whole.sum)
+    for q in (0.5, 0.95, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+def test_merge_across_accuracies_adds_error_bounds():
+    rng = random.Random(3)
+    values = [rng.uniform(1, 1000) for _ in range(5000)]
+    fine, coarse = DDSketch(0.01), DDSketch(0.02)
+    for index, value in enumerate(values):
+        (fine if index % 2 else coarse).add(value)
+
+    fine.merge(coarse)
+    _assert_within(fine, values, 0.03)
+
+
+def test_zeros_are_counted():
+    sketch = DDSketch()
+    for value in [0.0] * 60 + [5.0] * 40:
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(0.9) == pytest.approx(5.0, rel=0.01)
+
+
+def test_collapse_keeps_upper_quantiles():
+    rng = random.Random(5)
+    values = [10 ** rng.uniform(-6, 6) for _ in range(20000)]
+    sketch = DDSketch(0.01, max_bins=256)
+    for value in values:
+        sketch.add(value)
+
+    assert len(sketch.bins) <= 256
+    assert sketch.quantile(0.99) == pytest.approx(_exact(values, 0.99), rel=0.01)
+
+
+def test_bytes_round_trip():
+    sketch = DDSketch(0.02)
+    for value in (0.0, 1.5, 20.0, 350.0):
+        sketch.add(value)
+
+    restored = DDSketch.from_bytes(sketch.to_bytes())
+    assert restored.bins == sketch.bins
+    assert restored.zero_count == sketch.zero_count
+    assert restored.relative_accuracy == sketch.relative_accuracy
+    assert restored.quantile(0.75) == sketch.quantile(0.75)
@@ -0,0 +1,115 @@
+import pytest
+
+from app.core.config import settings
+from app.db.models import StudyStats, StudyWeek
+from app.db.session import SessionLocal
+from app.services.archive_service import archive_service
+from app.services.stats_service import stats_service
+
+STATS_FIELDS = (
+    "total_sessions", "total_questions", "total_tokens", "active_seconds",
+    "current_streak_days", "longest_streak_days", "last_active_date"
+)
+WEEK_FIELDS = ("sessions_started", "questions", "tokens_used", "active_seconds")
+
+
+@pytest.fixture(autouse=True)
+def no_idle_gap(monkeypatch):
+    # SQLite stores message times in whole seconds while the rollup uses the clock, so
+    # time-on-task could differ by a second per question; every other figure must match exactly
+    monkeypatch.setattr(settings, "STATS_IDLE_GAP_SECONDS", 0)
+
+
+def _study(client, headers):
+    for subject, turns in (("biology", 2), ("physics", 1)):
+        session = client.post(
+            "/api/chat/sessions", json={"title": subject, "subject": subject}, headers=headers
+        ).json()
+        for n in range(turns):
+            response = client.post(
+                "/api/chat/message",
+                json={"session_id": session["id"], "content": f"{subject} question {n}"},
+                headers=headers
+            )
+            assert response.status_code == 201
+
+    batch = client.post(
+        "/api/chat/message/batch",
+        json={"prompts": ["What is a vector?", "What is a scalar?"], "subject": "mathematics"},
+        headers=headers
+    )
+    assert batch.status_code == 201
+    return session["id"]
+
+
+def _rollup(user_id: int):
+    db = SessionLocal()
+    try:
+        stats = db.get(StudyStats, user_id)
+        weeks = db.query(StudyWeek).filter(StudyWeek.user_id == user_id).all()
+        return _figures(stats, weeks)
+    finally:
+        db.close()
+
+
+def _rebuilt(user_id: int):
+    db = SessionLocal()
+    try:
+        return _figures(*stats_service._rebuild(db, user_id))
+    finally:
+        db.close()
+
+
+def _figures(stats, weeks):
+    return (
+        {field: getattr(stats, field) for field in STATS_FIELDS},
+        {(w.week_start, w.subject): tuple(getattr(w, f) for f in WEEK_FIELDS) for w in weeks}
+    )
+
+
+def test_incremental_rollup_matches_a_full_rebuild(client, register):
+    user, headers = register()
+    _study(client, headers)
+
+    stats, weeks = _rollup(user["id"])
+
+    assert (stats, weeks) == _rebuilt(user["id"])
+    assert stats["total_sessions"] == 3
+    assert stats["total_questions"] == 5
+    assert stats["current_streak_days"] == 1
+    assert len(weeks) == 3
+
+
+def test_rebuild_reads_archived_sessions(client, register):
+    user, headers = register()
+    session_id = _study(client, headers)
+    db = SessionLocal()
+    try:
+        assert archive_service.archive_session(db, session_id)
+    finally:
+        db.close()
+
+    assert _rollup(user["id"]) == _rebuilt(user["id"])
+
+
+def test_missing_rollup_is_backfilled_from_history(client, register):
+    user, headers = register()
+    session_id = _study(client, headers)
+    db = SessionLocal()
+    try:
+        db.query(StudyWeek).filter(StudyWeek.user_id == user["id"]).delete()
+        db.query(StudyStats).filter(StudyStats.user_id == user["id"]).delete()
+        db.commit()
+    finally:
+        db.close()
+
+    client.post(
+        "/api/chat/message",
+        json={"session_id": session_id, "content": "One more about forces"},
+        headers=headers
+    )
+
+    assert _rollup(user["id"]) == _rebuilt(user["id"])
+    stats = client.get("/api/users/me/stats", headers=headers).json()
+    assert stats["total_questions"] == 6
+    assert stats["total_sessions"] == 3
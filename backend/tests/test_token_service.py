@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import RefreshToken, User
+from app.services.token_service import token_service
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tokens.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="student@example.com", username="student", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _record(db, token: str) -> RefreshToken:
+    return db.query(RefreshToken).filter(RefreshToken.token_hash == token_service._hash(token)).one()
+
+
+def _age_rotation(db, token: str, seconds: float):
+    record = _record(db, token)
+    record.rotated_at = datetime.utcnow() - timedelta(seconds=seconds)
+    db.commit()
+
+
+def test_rotation_issues_a_new_token_in_the_same_family(db, user):
+    first = token_service.issue_refresh_token(db, user)
+    rotated_user, second = token_service.rotate_refresh_token(db, first)
+
+    assert rotated_user.id == user.id
+    assert second != first
+    assert _record(db, first).rotated_at is not None
+    assert _record(db, second).family_id == _record(db, first).family_id
+
+
+def test_rotated_token_can_keep_rotating(db, user):
+    token = token_service.issue_refresh_token(db, user)
+    for _ in range(3):
+        _, token = token_service.rotate_refresh_token(db, token)
+    assert _record(db, token).rotated_at is None
+
+
+def test_unknown_token_is_rejected(db, user):
+    with pytest.raises(HTTPException) as error:
+        token_service.rotate_refresh_token(db, "not-a-token")
+    assert error.value.status_code == 401
+
+
+def test_reuse_within_grace_is_rejected_without_revoking(db, user):
+    first = token_service.issue_refresh_token(db, user)
+    _, second = token_service.rotate_refresh_token(db, first)
+
+    with pytest.raises(HTTPException):
+        token_service.rotate_refresh_token(db, first)
+
+    # A concurrent refresh from another tab loses, but the session stays usable
+    assert _record(db, second).revoked_at is None
+    token_service.rotate_refresh_token(db, second)
+
+
+def test_reuse_after_grace_revokes_the_family(db, user):
+    first = token_service.issue_refresh_token(db, user)
+    _, second = token_service.rotate_refresh_token(db, first)
+    _age_rotation(db, first, settings.REFRESH_REUSE_GRACE_SECONDS + 1)
+
+    with pytest.raises(HTTPException):
+        token_service.rotate_refresh_token(db, first)
+
+    db.expire_all()
+    assert _record(db, second).revoked_at is not None
+    with pytest.raises(HTTPException):
+        token_service.rotate_refresh_token(db, second)
+
+
+def test_reuse_does_not_touch_other_sessions(db, user):
+    stolen = token_service.issue_refresh_token(db, user)
+    other_device = token_service.issue_refresh_token(db, user)
+    token_service.rotate_refresh_token(db, stolen)
+    _age_rotation(db, stolen, settings.REFRESH_REUSE_GRACE_SECONDS + 1)
+
+    with pytest.raises(HTTPException):
+        token_service.rotate_refresh_token(db, stolen)
+    token_service.rotate_refresh_token(db, other_device)
+
+
+def test_expired_token_is_rejected(db, user):
+    token = token_service.issue_refresh_token(db, user)
+    record = _record(db, token)
+    record.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+    with pytest.raises(HTTPException):
+        token_service.rotate_refresh_token(db, token)
+
+
+def test_rotation_cannot_extend_past_session_limit(db, user):
+    started = datetime.utcnow() - timedelta(days=settings.REFRESH_SESSION_MAX_DAYS, seconds=-60)
+    token = token_service.issue_refresh_token(db, user, session_started_at=started)
+    _, rotated = token_service.rotate_refresh_token(db, token)
+
+    limit = started + timedelta(days=settings.REFRESH_SESSION_MAX_DAYS)
+    assert _record(db, rotated).expires_at <= limit
+
+
+def test_revoke_ends_the_session(db, user):
+    token = token_service.issue_refresh_token(db, user)
+    _, rotated = token_service.rotate_refresh_token(db, token)
+    token_service.revoke_refresh_token(db, token)
+
+    with pytest.raises(HTTPException):
+        token_service.rotate_refresh_token(db, rotated)
@@ -28,7 +28,7 @@ export function AuthProvider({ children }) {
 
   const login = async (credentials) => {
     const data = await authService.login(credentials)
-    authService.setAuth(data.access_token, data.user)
+    authService.setAuth(data.access_token, data.user, data.refresh_token)
     setUser(data.user)
     // Ensure localStorage and state are synchronized before navigation
     await new Promise(resolve => setTimeout(resolve, 50))
@@ -37,7 +37,7 @@ export function AuthProvider({ children }) {
 
   const register = async (userData) => {
     const data = await authService.register(userData)
-    authService.setAuth(data.access_token, data.user)
+    authService.setAuth(data.access_token, data.user, data.refresh_token)
     setUser(data.user)
     // Ensure localStorage and state are synchronized before navigation
     await new Promise(resolve => setTimeout(resolve, 50))
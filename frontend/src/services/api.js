@@ -9,14 +9,71 @@ const api = axios.create({
   },
 })
 
+// Time of our last successful write, so reads right after it skip a lagging replica
+// whichever server worker they reach
+let lastWriteAt = null
+
 // Add auth token to requests
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token')
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  if (lastWriteAt !== null) {
+    config.headers['X-Last-Write-Age-Ms'] = String(Date.now() - lastWriteAt)
+  }
   return config
 })
 
+// On an expired access token, trade the refresh token for a new pair once and retry
+let refreshing = null
+
+api.interceptors.response.use(
+  (response) => {
+    if (!['get', 'head'].includes((response.config.method || 'get').toLowerCase())) {
+      lastWriteAt = Date.now()
+    }
+    return response
+  },
+  async (error) => {
+    const original = error.config
+    const refreshToken = localStorage.getItem('refreshToken')
+    if (
+      error.response?.status !== 401 ||
+      !refreshToken ||
+      !original ||
+      original._retried ||
+      original.url.startsWith('/auth/')
+    ) {
+      return Promise.reject(error)
+    }
+    original._retried = true
+
+    // Parallel requests share one refresh, since each refresh token is single-use
+    if (!refreshing) {
+      refreshing = axios
+        .post(`${API_BASE_URL}/api/auth/refresh`, { refresh_token: refreshToken })
+        .then(({ data }) => {
+          localStorage.setItem('token', data.access_token)
+          localStorage.setItem('refreshToken', data.refresh_token)
+          return data.access_token
+        })
+        .finally(() => {
+          refreshing = null
+        })
+    }
+
+    try {
+      const token = await refreshing
+      original.headers.Authorization = `Bearer ${token}`
+      return api(original)
+    } catch {
+      localStorage.removeItem('token')
+      localStorage.removeItem('refreshToken')
+      return Promise.reject(error)
+    }
+  }
+)
+
 export default api
 
@@ -12,12 +12,20 @@ export const authService = {
   },
 
   logout() {
+    const refreshToken = localStorage.getItem('refreshToken')
+    if (refreshToken) {
+      api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {})
+    }
     localStorage.removeItem('token')
+    localStorage.removeItem('refreshToken')
     localStorage.removeItem('user')
   },
 
-  setAuth(token, user) {
+  setAuth(token, user, refreshToken) {
     localStorage.setItem('token', token)
+    if (refreshToken) {
+      localStorage.setItem('refreshToken', refreshToken)
+    }
     localStorage.setItem('user', JSON.stringify(user))
   },
 